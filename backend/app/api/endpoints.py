@@ -1,60 +1,435 @@
-from fastapi import APIRouter, File, UploadFile, HTTPException, Depends
+from fastapi import APIRouter, File, UploadFile, HTTPException, Depends, Query
 from fastapi.responses import StreamingResponse
-from typing import List, Dict
-import shutil
-import os
-import uuid
+from typing import Awaitable, Callable, List, Dict, Optional, Sequence, Union
+import hashlib
 import logging
 import json
 import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 # Dependencies
 from backend.app.dependencies import get_drug_db, get_interaction_checker
-from backend.app.ocr import extract_text, preload_ocr
+from backend.app import ocr
+from backend.app.ocr import ImageDecodeError, extract_segments, extract_segments_batch, preload_ocr
+from backend.app.ocr_pool import OCRWorkerPool, OCRPoolBusy
 from backend.app.safety import SafetyGuard
 
 from backend.app.inference import AIInference, RealMedGemmaInference
-
-# Initialize real MedGemma model (do this at module level, before endpoint)
-print("\n" + "="*70)
-print("🚀 INITIALIZING PHARMA-SAFE LENS BACKEND")
-print("="*70)
-
-# Pre-load OCR engines to avoid first-request timeout
-preload_ocr()
-
-real_inference = RealMedGemmaInference()
-print("📦 Attempting to load TxGemma 9B Chat model...")
-print("   🏥 Model: google/txgemma-9b-chat (Health AI collection)")
-# Load TxGemma 9B Chat - conversational model for drug-interaction explanations
-model_loaded = real_inference.load_model("google/txgemma-9b-chat")
-
-if not model_loaded:
-    print("⚠️  WARNING: Failed to load TxGemma, falling back to MOCK inference")
-    print("   Possible reasons:")
-    print("   - Missing packages: torch, transformers")
-    print("   - No GPU available")
-    print("   - Model download failed")
-    print("   → Install: pip install torch transformers accelerate")
-    print("="*70)
-    real_inference = None
-else:
-    # Warmup model for faster first inference
-    real_inference.warmup()
-    print("✅ SUCCESS: TxGemma model loaded and warmed up!")
+from backend.app.config import settings
+from backend.app.coalesce import SingleFlight, TTLCache
+from backend.app.generation_profiles import select_profile, templated_explanation
+from backend.app.ocr_cache import PerceptualOCRCache, dhash, text_signature
+from backend.app.metrics import metrics
+from backend.app.schemas import OCRSegment, TextAnalysisRequest
+from backend.app.translation import Translator, parse_languages
+
+# Backends used by the endpoints. Until init_backend() runs (FastAPI startup),
+# OCR runs in-process and loads its engine on first use, and explanations
+# come from the mock.
+real_inference = None
+ocr_pool = None
+
+
+def init_backend():
+    """
+    Load models and OCR engines (called once from the FastAPI startup event).
+    
+    Importing this module stays cheap; the heavy work happens here, and
+    PSL_PRELOAD_OCR / PSL_LOAD_MODEL can turn it off for lightweight
+    (knowledge-base only) deployments.
+    """
+    global extract_segments, extract_segments_batch, real_inference, ocr_pool
+    
+    print("\n" + "="*70)
+    print("🚀 INITIALIZING PHARMA-SAFE LENS BACKEND")
     print("="*70)
+    
+    if settings.MODEL_SERVER_ADDRESS:
+        # Stateless worker: the shared model server owns TxGemma and the OCR engines
+        from backend.app.model_server import ModelServerClient
+        model_client = ModelServerClient(
+            settings.MODEL_SERVER_ADDRESS,
+            settings.MODEL_SERVER_AUTHKEY.encode()
+        )
+        extract_segments = model_client.extract_segments
+        extract_segments_batch = model_client.extract_segments_batch
+        real_inference = model_client
+        print(f"🔌 Using shared model server at {settings.MODEL_SERVER_ADDRESS}")
+        print("="*70)
+        return
+    
+    if settings.OCR_WORKERS > 0:
+        # OCR runs in a farm of worker processes, each with its own reader
+        ocr_pool = OCRWorkerPool(
+            workers=settings.OCR_WORKERS,
+            max_pending=settings.OCR_MAX_PENDING,
+            threads_per_worker=settings.OCR_THREADS_PER_WORKER,
+            submit_timeout=settings.OCR_SUBMIT_TIMEOUT,
+        )
+        print(f"🔤 Starting OCR worker pool ({settings.OCR_WORKERS} processes)...")
+        ocr_pool.warmup()
+        extract_segments = ocr_pool.extract_segments
+        extract_segments_batch = ocr_pool.extract_segments_batch
+    elif settings.PRELOAD_OCR:
+        # Pre-load OCR engines to avoid first-request timeout
+        preload_ocr()
+
+    if settings.LLM_BASE_URL:
+        # TxGemma runs behind an OpenAI-compatible server (vLLM, llama.cpp)
+        from backend.app.llm_client import OpenAICompatibleInference
+        client = OpenAICompatibleInference(
+            settings.LLM_BASE_URL,
+            settings.LLM_MODEL or settings.MODEL_NAME,
+            api_key=settings.LLM_API_KEY,
+            max_concurrency=settings.LLM_MAX_CONCURRENCY,
+            timeout=settings.LLM_TIMEOUT,
+            connect_timeout=settings.LLM_CONNECT_TIMEOUT,
+            retries=settings.LLM_RETRIES,
+            retry_backoff=settings.LLM_RETRY_BACKOFF,
+        )
+        if client.load_model():
+            real_inference = client
+            print(f"✅ Using LLM server at {settings.LLM_BASE_URL}")
+        else:
+            client.close()
+            print("⚠️  WARNING: LLM server not reachable, falling back to MOCK inference")
+        print("="*70)
+        return
+
+    if not settings.LOAD_MODEL:
+        print("ℹ️  PSL_LOAD_MODEL=false: serving MOCK explanations")
+        print("="*70)
+        return
+    
+    inference = RealMedGemmaInference()
+    print("📦 Attempting to load TxGemma 9B Chat model...")
+    print(f"   🏥 Model: {settings.MODEL_NAME} (Health AI collection)")
+    # Load TxGemma 9B Chat - conversational model for drug-interaction explanations
+    model_loaded = inference.load_model(settings.MODEL_NAME)
+    
+    if not model_loaded:
+        print("⚠️  WARNING: Failed to load TxGemma, falling back to MOCK inference")
+        print("   Possible reasons:")
+        print("   - Missing packages: torch, transformers")
+        print("   - No GPU available")
+        print("   - Model download failed")
+        print("   → Install: pip install torch transformers accelerate")
+        print("="*70)
+    else:
+        # Warmup model for faster first inference
+        inference.warmup()
+        real_inference = inference
+        print("✅ SUCCESS: TxGemma model loaded and warmed up!")
+        print("="*70)
+
+
+def shutdown_backend():
+    """
+    Release what init_backend() started (called on FastAPI shutdown).
+
+    Stops the OCR worker processes, so reloads and restarts do not leave
+    them behind; OCR falls back to running in-process.
+    """
+    global extract_segments, extract_segments_batch, ocr_pool
+
+    if ocr_pool is not None:
+        print("🛑 Stopping OCR worker pool...")
+        ocr_pool.shutdown(wait=True)
+        ocr_pool = None
+        extract_segments = ocr.extract_segments
+        extract_segments_batch = ocr.extract_segments_batch
+
 
 # Router initialization
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-# Temporary directory for uploads
-UPLOAD_DIR = "temp_uploads"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
+# Duplicate uploads (retries, double-submits) share one computation per content hash
+ocr_flight = SingleFlight(
+    "coalesce.ocr",
+    TTLCache(settings.RESULT_CACHE_TTL, settings.RESULT_CACHE_SIZE)
+)
+analysis_flight = SingleFlight(
+    "coalesce.analysis",
+    TTLCache(settings.RESULT_CACHE_TTL, settings.RESULT_CACHE_SIZE)
+)
+
+# Near-duplicate photos (same product, re-shot strip) reuse OCR results
+ocr_cache = PerceptualOCRCache(
+    max_entries=settings.OCR_CACHE_SIZE,
+    max_distance=settings.OCR_CACHE_MAX_DISTANCE,
+    disk_path=settings.OCR_CACHE_PATH or None,
+    min_text_similarity=settings.OCR_CACHE_MIN_TEXT_SIMILARITY,
+) if settings.OCR_CACHE_SIZE > 0 else None
+
+# AI explanations per drug pair (the slowest step by far; shared by all endpoints)
+explanation_cache = TTLCache(settings.EXPLANATION_CACHE_TTL, settings.EXPLANATION_CACHE_SIZE)
+# All interactions of a request are explained concurrently (the model batches them)
+explanation_executor = ThreadPoolExecutor(
+    max_workers=max(1, settings.EXPLANATION_WORKERS),
+    thread_name_prefix="explain"
+)
+
+# language_versions: one batched translation job per requested language
+translator = Translator(
+    TTLCache(settings.TRANSLATION_CACHE_TTL, settings.TRANSLATION_CACHE_SIZE),
+    max_segments=settings.TRANSLATION_MAX_SEGMENTS
+)
+
+
+def _ocr_segments(contents: bytes) -> List[OCRSegment]:
+    """OCR one upload, through the perceptual cache when enabled."""
+    if ocr_cache is None:
+        return extract_segments(contents)
+    return ocr_cache.get_or_compute(contents, lambda: extract_segments(contents))
+
+
+def _ocr_segments_batch(uploads: List[bytes]) -> List[List[OCRSegment]]:
+    """OCR several uploads in one batch; images already in the perceptual cache are skipped."""
+    if ocr_cache is None:
+        return extract_segments_batch(uploads)
+
+    hashes = [dhash(contents) for contents in uploads]
+    signatures = [text_signature(contents) if h is not None else None
+                  for contents, h in zip(uploads, hashes)]
+    results = [ocr_cache.get(h, sig) if h is not None else None for h, sig in zip(hashes, signatures)]
+    missing = [i for i, segments in enumerate(results) if segments is None]
+    if missing:
+        started = time.perf_counter()
+        fresh = extract_segments_batch([uploads[i] for i in missing])
+        cost_ms = (time.perf_counter() - started) * 1000 / len(missing)
+        for i, segments in zip(missing, fresh):
+            results[i] = segments
+            if segments and hashes[i] is not None:
+                ocr_cache.put(hashes[i], segments, cost_ms, signatures[i])
+    return results
+
+
+def _segment_text(segment: Union[str, OCRSegment]) -> str:
+    return segment.text if isinstance(segment, OCRSegment) else segment
+
+
+async def _read_upload(file: UploadFile) -> bytes:
+    """Read the upload body into memory, enforcing MAX_UPLOAD_BYTES."""
+    contents = await file.read(settings.MAX_UPLOAD_BYTES + 1)
+    if len(contents) > settings.MAX_UPLOAD_BYTES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Image too large (limit {settings.MAX_UPLOAD_BYTES} bytes)"
+        )
+    return contents
+
+
+def _basic_result(interaction: Dict) -> Dict:
+    """Knowledge-base view of one interaction, before the AI explanation is attached."""
+    return {
+        "drug_pair": interaction['drug_pair'],
+        "risk_level": interaction['risk_level'],
+        "basic_info": {
+            "mechanism": interaction.get('mechanism', 'Unknown'),
+            "clinical_effect": interaction.get('clinical_effect', 'Unknown'),
+            "recommendation": interaction.get('recommendation', 'Consult healthcare provider')
+        },
+        "ai_explanation": None,
+        "safety_alert": False
+    }
+
+
+def _explain(interaction: Dict) -> Dict:
+    """
+    Structured AI explanation for one interaction, cached per drug pair.
+    
+    The knowledge base is static, so the same pair always yields the same
+    prompt; repeats within EXPLANATION_CACHE_TTL skip the model entirely.
+    """
+    key = tuple(interaction['drug_pair'])
+    cached = explanation_cache.get(key)
+    if cached is not None:
+        metrics.incr("explanations.cache_hits")
+        return cached
+
+    profile = select_profile(interaction)
+    if profile.templated:
+        # Nothing for the model to add beyond the knowledge-base entry
+        metrics.incr("explanations.templated")
+        explanation_dict = templated_explanation(interaction)
+        explanation_cache.set(key, explanation_dict)
+        return explanation_dict
+
+    metrics.incr("explanations.generated")
+    # Use real MedGemma if loaded, otherwise fallback to mock
+    if real_inference is not None:
+        # Format prompt for MedGemma
+        from backend.app.prompts import PromptTemplates
+        if settings.EXPLANATION_FORMAT == "json":
+            prompt = PromptTemplates.format_json_explanation_prompt(interaction, settings.JSON_MAX_POINTS)
+        else:
+            prompt = PromptTemplates.format_explanation_prompt(interaction, profile.points)
+        explanation_dict = real_inference.generate_explanation(interaction, prompt)
+    else:
+        explanation_dict = AIInference.generate_explanation(interaction)
+    explanation_cache.set(key, explanation_dict)
+    return explanation_dict
+
+
+def _interaction_result(interaction: Dict) -> Dict:
+    """Steps 5-6 for one interaction: AI explanation plus safety validation."""
+    # 5. AI Explanation Generation (Mock/API) - Returns structured dict
+    explanation_dict = _explain(interaction)
+
+    # 6. Safety Validation on the whole explanation (every section, every point);
+    # generation may already have been stopped mid-decode by the streaming guard
+    verdict = SafetyGuard.validate_explanation(explanation_dict)
+    is_safe = verdict.is_safe and not explanation_dict.get("safety_violation")
+
+    return {
+        **_basic_result(interaction),
+        "ai_explanation": explanation_dict,  # Structured detailed explanation
+        "safety_alert": not is_safe
+    }
+
+
+def _analyze_text(
+    extracted_text: Sequence[Union[str, OCRSegment]],
+    db,
+    checker,
+    empty_message: str = "No text detected in the image."
+) -> Dict:
+    """Steps 3-6 of /analyze-image, from OCR segments (or plain text) to the response (runs in a worker thread)."""
+    logger.info(f"OCR Result: {[_segment_text(seg) for seg in extracted_text]}")
+
+    if not extracted_text:
+        return {
+            "status": "warning",
+            "message": empty_message,
+            "detected_drugs": [],
+            "drug_details": [],
+            "interactions": []
+        }
+
+    # 3. Drug Name Normalization (low-confidence OCR segments are skipped)
+    detected = db.detect(extracted_text)
+    normalized_drugs = [drug.generic_name for drug in detected]
+    drug_details = [drug.model_dump() for drug in detected]
+    logger.info(f"Normalized Drugs: {normalized_drugs}")
+
+    if len(normalized_drugs) < 2:
+        return {
+            "status": "success",
+            "message": "Fewer than 2 drugs detected. No interactions check possible.",
+            "detected_drugs": normalized_drugs,
+            "drug_details": drug_details,
+            "interactions": []
+        }
+
+    # 4. Interaction Check
+    interactions = checker.check_multiple(normalized_drugs)
+    logger.info(f"Interactions Found: {len(interactions)}")
+
+    results = list(explanation_executor.map(_interaction_result, interactions))
+
+    return {
+        "status": "success",
+        "detected_drugs": normalized_drugs,
+        "drug_details": drug_details,
+        "interaction_count": len(results),
+        "interactions": results
+    }
+
+
+def _clean_texts(request: TextAnalysisRequest) -> List[str]:
+    """Validate /analyze-text input: drop blank entries, enforce MAX_TEXT_ITEMS."""
+    if len(request.texts) > settings.MAX_TEXT_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many text items (limit {settings.MAX_TEXT_ITEMS})"
+        )
+    return [text.strip() for text in request.texts if text and text.strip()]
+
+
+def _text_key(texts: List[str]) -> str:
+    """Analysis cache key for a text list; order and case do not change the result."""
+    joined = "\n".join(sorted(text.upper() for text in texts))
+    return "text:" + hashlib.sha256(joined.encode()).hexdigest()
+
+
+def _languages(languages: Optional[str]) -> List[str]:
+    """Validate a `languages` parameter ("hi,te")."""
+    try:
+        return parse_languages(languages)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _translate(explanations: List[Dict], languages: List[str]) -> Dict[str, List[Optional[Dict]]]:
+    """
+    Translate all explanations of a response, one batched job per language
+    (languages run concurrently so the model can batch them too).
+
+    Translations go through the same SafetyGuard check as the English
+    explanations; a translated explanation that fails it is dropped (None).
+    Points the model skipped stay in English, and the version lists their
+    sections under `untranslated_sections`.
+    Without a loaded model nothing is translated: mock output must not reach
+    patients or the translation cache.
+
+    Returns:
+        language -> translated explanations (languages that failed, or all
+        languages when no model is loaded, are left out)
+    """
+    if real_inference is None:
+        return {}
+
+    def translate(language):
+        try:
+            versions = translator.translate_explanations(explanations, language, real_inference)
+        except Exception as e:
+            logger.error(f"Translation to '{language}' failed: {e}")
+            return None
+        checked = []
+        for version in versions:
+            if SafetyGuard.validate_explanation(version).is_safe:
+                checked.append(version)
+            else:
+                metrics.incr("translation.blocked")
+                checked.append(None)
+        return checked
+
+    results = explanation_executor.map(translate, languages)
+    return {lang: result for lang, result in zip(languages, results) if result is not None}
+
+
+def _with_translations(result: Dict, languages: List[str]) -> Dict:
+    """
+    Copy of an analysis result with `language_versions` on each interaction (runs in a worker thread).
+
+    Languages that could not be translated are listed in `translations_unavailable`;
+    a version blocked by the safety check is left out of that interaction's
+    `language_versions`, and a partly translated one carries `untranslated_sections`.
+    """
+    interactions = result.get("interactions", [])
+    if not languages or not interactions:
+        return result
+    translated = _translate([ix.get("ai_explanation") or {} for ix in interactions], languages)
+    unavailable = [lang for lang in languages if lang not in translated]
+    result = {**result, "translations_unavailable": unavailable} if unavailable else result
+    if not translated:
+        return result
+    return {
+        **result,
+        "interactions": [
+            {**ix, "language_versions": {lang: versions[idx] for lang, versions in translated.items()
+                                         if versions[idx] is not None}}
+            for idx, ix in enumerate(interactions)
+        ]
+    }
+
 
 @router.post("/analyze-image", response_model=Dict)
 async def analyze_image(
     file: UploadFile = File(...),
+    languages: Optional[str] = Query(None, description="Comma-separated language codes for language_versions, e.g. hi,te"),
     db = Depends(get_drug_db),
     checker = Depends(get_interaction_checker)
 ):
@@ -67,101 +442,97 @@ async def analyze_image(
     3. Interaction Check
     4. AI Explanation Generation (Mock/API)
     5. Safety Validation
+
+    Identical uploads in flight at the same time share one computation, and
+    repeats within RESULT_CACHE_TTL seconds are answered from cache.
+    With `languages`, each interaction also gets `language_versions`.
     """
+    langs = _languages(languages)
     
-    # 1. Save Uploaded File
-    file_extension = file.filename.split(".")[-1]
-    temp_filename = f"{uuid.uuid4()}.{file_extension}"
-    temp_path = os.path.join(UPLOAD_DIR, temp_filename)
+    # 1. Read upload into memory (decoded with cv2.imdecode, no temp file)
+    contents = await _read_upload(file)
+    content_hash = hashlib.sha256(contents).hexdigest()
     
+    async def run_pipeline():
+        # 2. OCR Extraction (shared with concurrent stream requests for the same bytes)
+        segments = await ocr_flight.run(
+            content_hash,
+            lambda: _ocr_segments(contents)
+        )
+        return await asyncio.to_thread(_analyze_text, segments, db, checker)
+
     try:
-        with open(temp_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-            
-        logger.info(f"File saved to {temp_path}")
-        
-        # 2. OCR Extraction
-        extracted_text = extract_text(temp_path)
-        logger.info(f"OCR Result: {extracted_text}")
-        
-        if not extracted_text:
-            return {
-                "status": "warning",
-                "message": "No text detected in the image.",
-                "detected_drugs": [],
-                "interactions": []
-            }
+        result = await analysis_flight.run(content_hash, run_pipeline)
+        if langs:
+            result = await asyncio.to_thread(_with_translations, result, langs)
+        return result
 
-        # 3. Drug Name Normalization
-        normalized_drugs = db.normalize(extracted_text)
-        logger.info(f"Normalized Drugs: {normalized_drugs}")
-        
-        if len(normalized_drugs) < 2:
-            return {
-                "status": "success",
-                "message": "Fewer than 2 drugs detected. No interactions check possible.",
-                "detected_drugs": normalized_drugs,
-                "interactions": []
-            }
+    except OCRPoolBusy as e:
+        logger.warning(f"Analysis rejected: {e}")
+        raise HTTPException(status_code=503, detail="Server busy, please retry shortly")
 
-        # 4. Interaction Check
-        interactions = checker.check_multiple(normalized_drugs)
-        logger.info(f"Interactions Found: {len(interactions)}")
-        
-        results = []
-        for interaction in interactions:
-            # 5. AI Explanation Generation (Mock/API) - Returns structured dict
-            # Use real MedGemma if loaded, otherwise fallback to mock
-            if real_inference is not None:
-                # Format prompt for MedGemma
-                from backend.app.prompts import PromptTemplates
-                prompt = PromptTemplates.format_explanation_prompt(interaction)
-                explanation_dict = real_inference.generate_explanation(interaction, prompt)
-            else:
-                explanation_dict = AIInference.generate_explanation(interaction)
-            
-            # 6. Safety Validation on explanation text
-            # Convert structured explanation to text for safety check
-            explanation_text = "\n".join([
-                f"Mechanism: {' '.join(explanation_dict.get('mechanism_of_interaction', [])[:2])}",
-                f"Clinical: {' '.join(explanation_dict.get('clinical_manifestations', [])[:2])}"
-            ])
-            is_safe,  _ = SafetyGuard.validate_output(explanation_text)
-            
-            interaction_result = {
-                "drug_pair": interaction['drug_pair'],
-                "risk_level": interaction['risk_level'],
-                "basic_info": {
-                    "mechanism": interaction.get('mechanism', 'Unknown'),
-                    "clinical_effect": interaction.get('clinical_effect', 'Unknown'),
-                    "recommendation": interaction.get('recommendation', 'Consult healthcare provider')
-                },
-                "ai_explanation": explanation_dict,  # Structured detailed explanation
-                "safety_alert": not is_safe
-            }
-            results.append(interaction_result)
-            
-        return {
-            "status": "success",
-            "detected_drugs": normalized_drugs,
-            "interaction_count": len(results),
-            "interactions": results
-        }
+    except ImageDecodeError as e:
+        logger.warning(f"Analysis rejected: {e}")
+        raise HTTPException(status_code=400, detail=f"Invalid image: {e}")
 
     except Exception as e:
         logger.error(f"Analysis failed: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
-        
-    finally:
-        # Cleanup: Remove temp file
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
-            logger.info(f"Cleaned up {temp_path}")
+
+
+@router.post("/analyze-images", response_model=Dict)
+async def analyze_images(
+    files: List[UploadFile] = File(...),
+    languages: Optional[str] = Query(None, description="Comma-separated language codes for language_versions, e.g. hi,te"),
+    db = Depends(get_drug_db),
+    checker = Depends(get_interaction_checker)
+):
+    """
+    Analyze several images of one patient's medication in a single call
+    (front and back of a strip, a whole pill organiser, ...).
+
+    All images are OCR'd in one batch, their text is merged, and drugs are
+    normalized and checked once over the union, so interactions between
+    drugs seen on different images are reported too. Same response shape
+    as /analyze-image, plus `image_count`.
+    """
+    langs = _languages(languages)
+    if len(files) > settings.MAX_BATCH_IMAGES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many images (limit {settings.MAX_BATCH_IMAGES})"
+        )
+
+    uploads = [await _read_upload(file) for file in files]
+    image_hashes = [hashlib.sha256(contents).hexdigest() for contents in uploads]
+    # Same set of images in any order -> same analysis
+    batch_hash = "batch:" + hashlib.sha256("".join(sorted(image_hashes)).encode()).hexdigest()
+
+    async def run_pipeline():
+        per_image = await asyncio.to_thread(_ocr_segments_batch, uploads)
+        merged = [seg for segments in per_image for seg in segments]
+        result = await asyncio.to_thread(_analyze_text, merged, db, checker)
+        return {**result, "image_count": len(uploads)}
+
+    try:
+        result = await analysis_flight.run(batch_hash, run_pipeline)
+        if langs:
+            result = await asyncio.to_thread(_with_translations, result, langs)
+        return result
+
+    except OCRPoolBusy as e:
+        logger.warning(f"Batch analysis rejected: {e}")
+        raise HTTPException(status_code=503, detail="Server busy, please retry shortly")
+
+    except Exception as e:
+        logger.error(f"Batch analysis failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/analyze-image-stream")
 async def analyze_image_stream(
     file: UploadFile = File(...),
+    languages: Optional[str] = Query(None, description="Comma-separated language codes for language_versions, e.g. hi,te"),
     db = Depends(get_drug_db),
     checker = Depends(get_interaction_checker)
 ):
@@ -172,135 +543,84 @@ async def analyze_image_stream(
     
     Event types:
       - init:        {detected_drugs, interaction_count, interactions_basic}
-      - interaction:  {index, interaction}   (one per interaction, with ai_explanation)
+      - interaction:  {index, interaction}   (one per interaction, with ai_explanation,
+                     in completion order; index is the position in interactions_basic)
+      - translation: {language, explanations}   (one per requested language, after
+                     all interactions; explanations[index] is null if that one failed
+                     or was blocked, and lists untranslated_sections if partly
+                     translated; explanations is null and unavailable is true
+                     when no model could translate)
       - done:        {}
       - error:       {detail}
     """
+    langs = _languages(languages)
     
-    # 1. Save uploaded file
-    file_extension = file.filename.split(".")[-1]
-    temp_filename = f"{uuid.uuid4()}.{file_extension}"
-    temp_path = os.path.join(UPLOAD_DIR, temp_filename)
-    
-    with open(temp_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-    logger.info(f"[stream] File saved to {temp_path}")
+    # 1. Read upload into memory (decoded with cv2.imdecode, no temp file)
+    contents = await _read_upload(file)
+    content_hash = hashlib.sha256(contents).hexdigest()
 
-    async def event_generator():
-        try:
-            # 2. OCR
-            extracted_text = extract_text(temp_path)
-            logger.info(f"[stream] OCR: {extracted_text}")
-
-            if not extracted_text:
-                yield _sse("init", {
-                    "detected_drugs": [],
-                    "interaction_count": 0,
-                    "interactions_basic": [],
-                    "message": "No text detected in the image."
-                })
-                yield _sse("done", {})
-                return
-
-            # 3. Drug normalization
-            normalized_drugs = db.normalize(extracted_text)
-            logger.info(f"[stream] Drugs: {normalized_drugs}")
-
-            if len(normalized_drugs) < 2:
-                yield _sse("init", {
-                    "detected_drugs": normalized_drugs,
-                    "interaction_count": 0,
-                    "interactions_basic": [],
-                    "message": "Fewer than 2 drugs detected."
-                })
-                yield _sse("done", {})
-                return
-
-            # 4. Interaction check (fast — no AI yet)
-            interactions = checker.check_multiple(normalized_drugs)
-            logger.info(f"[stream] Interactions found: {len(interactions)}")
-
-            # Build basic info list (without AI explanations)
-            interactions_basic = []
-            for ix in interactions:
-                interactions_basic.append({
-                    "drug_pair": ix['drug_pair'],
-                    "risk_level": ix['risk_level'],
-                    "basic_info": {
-                        "mechanism": ix.get('mechanism', 'Unknown'),
-                        "clinical_effect": ix.get('clinical_effect', 'Unknown'),
-                        "recommendation": ix.get('recommendation', 'Consult healthcare provider')
-                    },
-                    "ai_explanation": None,
-                    "safety_alert": False
-                })
+    async def get_segments():
+        # 2. OCR (coalesced with concurrent identical uploads)
+        return await ocr_flight.run(content_hash, lambda: _ocr_segments(contents))
 
-            # Send init event immediately — frontend can start rendering
-            yield _sse("init", {
-                "detected_drugs": normalized_drugs,
-                "interaction_count": len(interactions),
-                "interactions_basic": interactions_basic
-            })
+    return _sse_response(_stream_analysis(content_hash, get_segments, db, checker, languages=langs))
 
-            # Small delay so frontend can process the init event
-            await asyncio.sleep(0.05)
-
-            # 5. Generate AI explanations one-by-one
-            for idx, interaction in enumerate(interactions):
-                try:
-                    if real_inference is not None:
-                        from backend.app.prompts import PromptTemplates
-                        prompt = PromptTemplates.format_explanation_prompt(interaction)
-                        explanation_dict = real_inference.generate_explanation(interaction, prompt)
-                    else:
-                        explanation_dict = AIInference.generate_explanation(interaction)
-
-                    # Safety check
-                    explanation_text = "\n".join([
-                        f"Mechanism: {' '.join(explanation_dict.get('mechanism_of_interaction', [])[:2])}",
-                        f"Clinical: {' '.join(explanation_dict.get('clinical_manifestations', [])[:2])}"
-                    ])
-                    is_safe, _ = SafetyGuard.validate_output(explanation_text)
-
-                    result = {
-                        "drug_pair": interaction['drug_pair'],
-                        "risk_level": interaction['risk_level'],
-                        "basic_info": {
-                            "mechanism": interaction.get('mechanism', 'Unknown'),
-                            "clinical_effect": interaction.get('clinical_effect', 'Unknown'),
-                            "recommendation": interaction.get('recommendation', 'Consult healthcare provider')
-                        },
-                        "ai_explanation": explanation_dict,
-                        "safety_alert": not is_safe
-                    }
-
-                    yield _sse("interaction", {"index": idx, "interaction": result})
-                    logger.info(f"[stream] Sent interaction {idx+1}/{len(interactions)}")
-
-                    # Small yield between interactions
-                    await asyncio.sleep(0.05)
-
-                except Exception as ix_err:
-                    logger.error(f"[stream] Interaction {idx} failed: {ix_err}")
-                    yield _sse("interaction", {
-                        "index": idx,
-                        "interaction": interactions_basic[idx],
-                        "error": str(ix_err)
-                    })
 
-            yield _sse("done", {})
+@router.post("/analyze-text", response_model=Dict)
+async def analyze_text(
+    request: TextAnalysisRequest,
+    db = Depends(get_drug_db),
+    checker = Depends(get_interaction_checker)
+):
+    """
+    Analyze medication names that are already text (EHR exports, a
+    pharmacist's typed list) without rendering an image.
 
-        except Exception as e:
-            logger.error(f"[stream] Fatal error: {e}")
-            yield _sse("error", {"detail": str(e)})
+    Skips OCR: the strings go straight to drug normalization, the
+    interaction check and (cached) AI explanations. Same response shape
+    as /analyze-image.
+    """
+    texts = _clean_texts(request)
+    langs = _languages(",".join(request.languages))
+
+    try:
+        result = await analysis_flight.run(
+            _text_key(texts),
+            lambda: _analyze_text(texts, db, checker, "No text provided.")
+        )
+        if langs:
+            result = await asyncio.to_thread(_with_translations, result, langs)
+        return result
 
-        finally:
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
-                logger.info(f"[stream] Cleaned up {temp_path}")
+    except Exception as e:
+        logger.error(f"Text analysis failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/analyze-text-stream")
+async def analyze_text_stream(
+    request: TextAnalysisRequest,
+    db = Depends(get_drug_db),
+    checker = Depends(get_interaction_checker)
+):
+    """
+    Streaming version of analyze-text, with the same SSE events as
+    /analyze-image-stream.
+    """
+    texts = _clean_texts(request)
+    langs = _languages(",".join(request.languages))
 
+    async def get_segments():
+        return texts
+
+    return _sse_response(
+        _stream_analysis(_text_key(texts), get_segments, db, checker, "No text provided.", langs)
+    )
+
+
+def _sse_response(events) -> StreamingResponse:
     return StreamingResponse(
-        event_generator(),
+        events,
         media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache",
@@ -311,6 +631,156 @@ async def analyze_image_stream(
     )
 
 
+async def _stream_analysis(
+    cache_key: str,
+    get_segments: Callable[[], Awaitable[List]],
+    db,
+    checker,
+    empty_message: str = "No text detected in the image.",
+    languages: Sequence[str] = ()
+):
+    """
+    SSE event sequence shared by the image and text streams.
+
+    Args:
+        cache_key: analysis_flight key; a finished non-streaming result is replayed
+        get_segments: Coroutine function returning OCR segments (or plain strings)
+        db: DrugDatabase
+        checker: InteractionChecker
+        empty_message: init message when there is no text at all
+        languages: Language codes to send translation events for
+    """
+    try:
+        # A finished /analyze-image result for the same input can be replayed as-is
+        cached = analysis_flight.cache.get(cache_key)
+        if cached is not None:
+            metrics.incr("coalesce.analysis.cache_hits")
+            async for event in _replay_analysis(cached, languages):
+                yield event
+            return
+
+        segments = await get_segments()
+        logger.info(f"[stream] OCR: {[_segment_text(seg) for seg in segments]}")
+
+        if not segments:
+            yield _sse("init", {
+                "detected_drugs": [],
+                "drug_details": [],
+                "interaction_count": 0,
+                "interactions_basic": [],
+                "message": empty_message
+            })
+            yield _sse("done", {})
+            return
+
+        # 3. Drug normalization
+        detected = db.detect(segments)
+        normalized_drugs = [drug.generic_name for drug in detected]
+        drug_details = [drug.model_dump() for drug in detected]
+        logger.info(f"[stream] Drugs: {normalized_drugs}")
+
+        if len(normalized_drugs) < 2:
+            yield _sse("init", {
+                "detected_drugs": normalized_drugs,
+                "drug_details": drug_details,
+                "interaction_count": 0,
+                "interactions_basic": [],
+                "message": "Fewer than 2 drugs detected."
+            })
+            yield _sse("done", {})
+            return
+        # 4. Interaction check (fast — no AI yet)
+        interactions = checker.check_multiple(normalized_drugs)
+        logger.info(f"[stream] Interactions found: {len(interactions)}")
+
+        # Build basic info list (without AI explanations)
+        interactions_basic = [_basic_result(ix) for ix in interactions]
+
+        # Send init event immediately — frontend can start rendering
+        yield _sse("init", {
+            "detected_drugs": normalized_drugs,
+            "drug_details": drug_details,
+            "interaction_count": len(interactions),
+            "interactions_basic": interactions_basic
+        })
+
+        # Small delay so frontend can process the init event
+        await asyncio.sleep(0.05)
+
+        # 5. Generate all AI explanations concurrently; send each as it completes
+        # (the `index` field lets the client put them back in order)
+        loop = asyncio.get_running_loop()
+
+        async def explain(idx: int, interaction: Dict):
+            try:
+                result = await loop.run_in_executor(explanation_executor, _interaction_result, interaction)
+                return idx, result, None
+            except Exception as ix_err:
+                return idx, None, ix_err
+
+        explanations: List[Optional[Dict]] = [None] * len(interactions)
+        pending = [explain(idx, ix) for idx, ix in enumerate(interactions)]
+        for sent, next_done in enumerate(asyncio.as_completed(pending), start=1):
+            idx, result, ix_err = await next_done
+            if ix_err is None:
+                explanations[idx] = result["ai_explanation"]
+                yield _sse("interaction", {"index": idx, "interaction": result})
+                logger.info(f"[stream] Sent interaction {idx+1} ({sent}/{len(interactions)})")
+            else:
+                logger.error(f"[stream] Interaction {idx} failed: {ix_err}")
+                yield _sse("interaction", {
+                    "index": idx,
+                    "interaction": interactions_basic[idx],
+                    "error": str(ix_err)
+                })
+
+        async for event in _translation_events(explanations, languages):
+            yield event
+        yield _sse("done", {})
+
+    except Exception as e:
+        logger.error(f"[stream] Fatal error: {e}")
+        yield _sse("error", {"detail": str(e)})
+
+
+async def _translation_events(explanations: List[Optional[Dict]], languages: Sequence[str]):
+    """One `translation` event per language for the explanations of a stream."""
+    if not languages or not any(explanations):
+        return
+    done = [idx for idx, explanation in enumerate(explanations) if explanation]
+    translated = await asyncio.to_thread(
+        _translate, [explanations[idx] for idx in done], list(languages)
+    )
+    for language in languages:
+        versions = translated.get(language)
+        if versions is None:
+            yield _sse("translation", {"language": language, "explanations": None, "unavailable": True})
+            continue
+        by_index: List[Optional[Dict]] = [None] * len(explanations)
+        for idx, version in zip(done, versions):
+            by_index[idx] = version
+        yield _sse("translation", {"language": language, "explanations": by_index})
+
+
+async def _replay_analysis(result: Dict, languages: Sequence[str] = ()):
+    """Re-emit a cached /analyze-image result as the SSE event sequence."""
+    interactions = result.get("interactions", [])
+    init = {
+        "detected_drugs": result.get("detected_drugs", []),
+        "drug_details": result.get("drug_details", []),
+        "interaction_count": len(interactions),
+        "interactions_basic": [{**ix, "ai_explanation": None, "safety_alert": False} for ix in interactions]
+    }
+    if "message" in result:
+        init["message"] = result["message"]
+    yield _sse("init", init)
+    for idx, interaction in enumerate(interactions):
+        yield _sse("interaction", {"index": idx, "interaction": interaction})
+    async for event in _translation_events([ix.get("ai_explanation") for ix in interactions], languages):
+        yield event
+    yield _sse("done", {})
+
+
 def _sse(event: str, data: dict) -> str:
     """Format a Server-Sent Event string."""
     return f"event: {event}\ndata: {json.dumps(data)}\n\n"
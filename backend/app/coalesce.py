@@ -0,0 +1,113 @@
+"""
+Request Coalescing - single-flight execution plus a short-TTL result cache.
+
+Clinics retry uploads and double-submit the same photo. Identical requests
+(same content hash) that arrive while one is already running wait for that
+computation instead of re-running OCR and the LLM; repeats shortly after it
+finished are served from the cache. Scope is one worker process.
+"""
+
+from typing import Any, Callable, Dict, Hashable, Optional
+from collections import OrderedDict
+import asyncio
+import threading
+import time
+
+from backend.app.metrics import metrics
+
+
+class TTLCache:
+    """Small LRU cache whose entries expire after `ttl` seconds (thread-safe)."""
+
+    def __init__(self, ttl: float, max_entries: int = 256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any):
+        if self.ttl <= 0 or self.max_entries <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SingleFlight:
+    """
+    Run at most one computation per key at a time.
+
+    `fn` is either a coroutine function, or synchronous (OCR, model calls) in
+    which case it runs in a worker thread so the event loop stays free.
+
+    Concurrent callers with the same key await the same task; successful
+    results are kept in an optional TTLCache.
+
+    Metrics (prefixed with `name`): `.executions`, `.coalesced`, `.cache_hits`.
+    """
+
+    def __init__(self, name: str, cache: Optional[TTLCache] = None):
+        self.name = name
+        self.cache = cache
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+
+    async def _execute(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        try:
+            if asyncio.iscoroutinefunction(fn):
+                result = await fn()
+            else:
+                result = await asyncio.to_thread(fn)
+            if self.cache is not None:
+                self.cache.set(key, result)
+            return result
+        finally:
+            self._inflight.pop(key, None)
+
+    async def run(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        Return the result for `key`, computing it with `fn` only if needed.
+
+        Args:
+            key: Content hash (or any hashable) identifying the work
+            fn: Zero-argument callable (or coroutine function) doing the work
+
+        Returns:
+            The (possibly shared) result of `fn`
+        """
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                metrics.incr(f"{self.name}.cache_hits")
+                return cached
+
+        task = self._inflight.get(key)
+        if task is not None:
+            metrics.incr(f"{self.name}.coalesced")
+        else:
+            metrics.incr(f"{self.name}.executions")
+            task = asyncio.ensure_future(self._execute(key, fn))
+            self._inflight[key] = task
+
+        # Shield: one client disconnecting must not cancel work others wait on
+        return await asyncio.shield(task)
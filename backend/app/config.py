@@ -0,0 +1,172 @@
+"""
+Runtime configuration for Pharma-Safe Lens.
+All settings come from environment variables (optionally loaded from a .env file).
+"""
+
+import os
+
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+except ImportError:
+    pass
+
+
+def _env_str(name: str, default: str = "") -> str:
+    return os.environ.get(name, default).strip()
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.environ.get(name)
+    if value is None or not value.strip():
+        return default
+    return int(value)
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.environ.get(name)
+    if value is None or not value.strip():
+        return default
+    return float(value)
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.environ.get(name)
+    if value is None or not value.strip():
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+class Settings:
+    """
+    Deployment settings, read once from the environment.
+
+    Every variable is prefixed with ``PSL_`` (Pharma-Safe Lens).
+    """
+
+    def __init__(self):
+        # Model
+        self.MODEL_NAME = _env_str("PSL_MODEL_NAME", "google/txgemma-9b-chat")
+        # Optional speculative (assisted) decoding: a small draft model of the
+        # same family (shared tokenizer), e.g. "google/gemma-2-2b-it"; empty = off.
+        # Assisted generation decodes one sequence at a time, so it replaces
+        # micro-batching and pays off when requests rarely overlap.
+        self.DRAFT_MODEL = _env_str("PSL_DRAFT_MODEL", "")
+        self.DRAFT_NUM_TOKENS = _env_int("PSL_DRAFT_NUM_TOKENS", 5)
+
+        # Startup loading. Turn both off for a lightweight (knowledge-base only)
+        # worker: torch / OpenCV are then imported only if an image arrives.
+        self.PRELOAD_OCR = _env_bool("PSL_PRELOAD_OCR", True)
+        self.LOAD_MODEL = _env_bool("PSL_LOAD_MODEL", True)
+
+        # Shared model server (one process owns the LLM + OCR engines).
+        # Either a unix socket path ("/tmp/psl.sock") or "host:port". Messages
+        # are pickled, so anyone holding the key can run code in the server:
+        # the key is required (no default) and TCP addresses must be loopback
+        # unless MODEL_SERVER_ALLOW_REMOTE is set.
+        self.MODEL_SERVER_ADDRESS = _env_str("PSL_MODEL_SERVER_ADDRESS")
+        self.MODEL_SERVER_AUTHKEY = _env_str("PSL_MODEL_SERVER_AUTHKEY")
+        self.MODEL_SERVER_ALLOW_REMOTE = _env_bool("PSL_MODEL_SERVER_ALLOW_REMOTE", False)
+
+        # Remote LLM: an OpenAI-compatible completion server (vLLM, llama.cpp
+        # server), e.g. "http://127.0.0.1:8001/v1". Used instead of loading
+        # TxGemma in-process; OCR still runs as configured above.
+        self.LLM_BASE_URL = _env_str("PSL_LLM_BASE_URL")
+        self.LLM_MODEL = _env_str("PSL_LLM_MODEL")  # default: MODEL_NAME
+        self.LLM_API_KEY = _env_str("PSL_LLM_API_KEY")
+        self.LLM_MAX_CONCURRENCY = _env_int("PSL_LLM_MAX_CONCURRENCY", 8)
+        self.LLM_TIMEOUT = _env_float("PSL_LLM_TIMEOUT", 60.0)
+        self.LLM_CONNECT_TIMEOUT = _env_float("PSL_LLM_CONNECT_TIMEOUT", 5.0)
+        self.LLM_RETRIES = _env_int("PSL_LLM_RETRIES", 2)
+        self.LLM_RETRY_BACKOFF = _env_float("PSL_LLM_RETRY_BACKOFF", 0.5)
+
+        # Uploads are decoded in memory; larger bodies are rejected with 413
+        self.MAX_UPLOAD_BYTES = _env_int("PSL_MAX_UPLOAD_BYTES", 20 * 1024 * 1024)
+        # Maximum number of images accepted by /analyze-images
+        self.MAX_BATCH_IMAGES = _env_int("PSL_MAX_BATCH_IMAGES", 8)
+        # Maximum number of strings accepted by /analyze-text
+        self.MAX_TEXT_ITEMS = _env_int("PSL_MAX_TEXT_ITEMS", 100)
+
+        # OCR preprocessing preset: "quality" (full resolution) or "fast"
+        self.OCR_PREPROCESS_MODE = _env_str("PSL_OCR_PREPROCESS_MODE", "quality")
+
+        # Detect label text regions first and recognise only those crops
+        self.OCR_TEXT_REGIONS = _env_bool("PSL_OCR_TEXT_REGIONS", False)
+        self.OCR_REGION_WORKERS = _env_int("PSL_OCR_REGION_WORKERS", 4)
+
+        # Primary OCR engine: "easyocr" (PyTorch) or "onnx" (EasyOCR's detector
+        # and recognizer exported to ONNX, run on ONNX Runtime; CPU nodes)
+        self.OCR_ENGINE = _env_str("PSL_OCR_ENGINE", "easyocr")
+        self.OCR_ONNX_MODEL_DIR = _env_str("PSL_OCR_ONNX_MODEL_DIR", "models/onnx")
+        # Intra-op threads per ONNX session (0 = one per core)
+        self.OCR_ONNX_THREADS = _env_int("PSL_OCR_ONNX_THREADS", 0)
+        # EasyOCR weights directory (empty = EasyOCR default, ~/.EasyOCR/model)
+        self.EASYOCR_MODEL_DIR = _env_str("PSL_EASYOCR_MODEL_DIR")
+
+        # Tiled OCR: images larger than OCR_TILE_SIZE (+ overlap) are recognised
+        # as overlapping tiles so engine memory is bounded (0 = never tile).
+        # The overlap should exceed the tallest expected text line.
+        self.OCR_TILE_SIZE = _env_int("PSL_OCR_TILE_SIZE", 0)
+        self.OCR_TILE_OVERLAP = _env_int("PSL_OCR_TILE_OVERLAP", 160)
+
+        # OCR engine strategy: "fallback" (EasyOCR, Tesseract on failure) or
+        # "race" (both in parallel; first result naming a known drug with
+        # segments above OCR_RACE_MIN_CONFIDENCE wins)
+        self.OCR_STRATEGY = _env_str("PSL_OCR_STRATEGY", "fallback")
+        self.OCR_RACE_MIN_CONFIDENCE = _env_float("PSL_OCR_RACE_MIN_CONFIDENCE", 0.5)
+
+        # OCR worker farm: N processes with preloaded readers (0 = OCR in-process).
+        # Keep workers * threads_per_worker <= cores (per uvicorn worker).
+        self.OCR_WORKERS = _env_int("PSL_OCR_WORKERS", 0)
+        self.OCR_THREADS_PER_WORKER = _env_int("PSL_OCR_THREADS_PER_WORKER", 1)
+        self.OCR_MAX_PENDING = _env_int("PSL_OCR_MAX_PENDING", 16)
+        self.OCR_SUBMIT_TIMEOUT = _env_float("PSL_OCR_SUBMIT_TIMEOUT", 0.5)
+
+        # Perceptual OCR cache: near-duplicate photos (dHash within
+        # OCR_CACHE_MAX_DISTANCE bits and text signatures correlating at
+        # OCR_CACHE_MIN_TEXT_SIMILARITY) reuse OCR results. Off by default: labels
+        # differing in a character or two can still match. OCR_CACHE_PATH adds
+        # a shared sqlite tier.
+        self.OCR_CACHE_SIZE = _env_int("PSL_OCR_CACHE_SIZE", 0)
+        self.OCR_CACHE_MAX_DISTANCE = _env_int("PSL_OCR_CACHE_MAX_DISTANCE", 6)
+        self.OCR_CACHE_MIN_TEXT_SIMILARITY = _env_float("PSL_OCR_CACHE_MIN_TEXT_SIMILARITY", 0.9)
+        self.OCR_CACHE_PATH = _env_str("PSL_OCR_CACHE_PATH")
+
+        # Request coalescing: results for identical uploads are reused for this long
+        self.RESULT_CACHE_TTL = _env_float("PSL_RESULT_CACHE_TTL", 60.0)
+        self.RESULT_CACHE_SIZE = _env_int("PSL_RESULT_CACHE_SIZE", 256)
+
+        # AI explanations per drug pair are reused across requests for this long
+        self.EXPLANATION_CACHE_TTL = _env_float("PSL_EXPLANATION_CACHE_TTL", 3600.0)
+        self.EXPLANATION_CACHE_SIZE = _env_int("PSL_EXPLANATION_CACHE_SIZE", 1024)
+        # Explanations for one request are generated concurrently (threads per
+        # API worker); the model batches up to EXPLANATION_BATCH_SIZE of them per call
+        self.EXPLANATION_WORKERS = _env_int("PSL_EXPLANATION_WORKERS", 4)
+        self.EXPLANATION_BATCH_SIZE = _env_int("PSL_EXPLANATION_BATCH_SIZE", 4)
+        # Check generated text against SafetyGuard while decoding and stop a
+        # sequence at the first dangerous pattern
+        self.SAFETY_STOP_GENERATION = _env_bool("PSL_SAFETY_STOP_GENERATION", True)
+
+        # Explanation output format: "prose" (numbered sections, parsed with
+        # heuristics) or "json" (schema-constrained with lm-format-enforcer)
+        self.EXPLANATION_FORMAT = _env_str("PSL_EXPLANATION_FORMAT", "prose")
+        self.JSON_MAX_POINTS = _env_int("PSL_JSON_MAX_POINTS", 3)
+        self.JSON_MAX_POINT_CHARS = _env_int("PSL_JSON_MAX_POINT_CHARS", 160)
+
+        # Generation profiles: token budget per risk level (see
+        # generation_profiles); pairs without evidence get a templated
+        # explanation from the knowledge base instead of a model call
+        self.GENERATION_PROFILES = _env_bool("PSL_GENERATION_PROFILES", True)
+        self.GEN_TOKENS_HIGH = _env_int("PSL_GEN_TOKENS_HIGH", 512)
+        self.GEN_TOKENS_MODERATE = _env_int("PSL_GEN_TOKENS_MODERATE", 384)
+        self.GEN_TOKENS_LOW = _env_int("PSL_GEN_TOKENS_LOW", 192)
+
+        # Translations of explanation points, keyed by (text hash, language)
+        self.TRANSLATION_CACHE_TTL = _env_float("PSL_TRANSLATION_CACHE_TTL", 24 * 3600.0)
+        self.TRANSLATION_CACHE_SIZE = _env_int("PSL_TRANSLATION_CACHE_SIZE", 4096)
+        # Segments per translation job, and its generation budget
+        self.TRANSLATION_MAX_SEGMENTS = _env_int("PSL_TRANSLATION_MAX_SEGMENTS", 64)
+        self.TRANSLATION_MAX_NEW_TOKENS = _env_int("PSL_TRANSLATION_MAX_NEW_TOKENS", 2048)
+
+
+settings = Settings()
@@ -4,14 +4,15 @@ Drug Database Module - Normalize OCR output to known drug names.
 PHASE 1 - Sub-Phase 1.2
 """
 
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Sequence, Tuple, Union
 import json
+import re
 from pathlib import Path
 import Levenshtein
 import logging
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+from backend.app.schemas import DrugInfo, OCRSegment
+
 logger = logging.getLogger(__name__)
 
 
@@ -24,6 +25,11 @@ class DrugDatabase:
     # Fuzzy matching threshold (0-100, higher = stricter)
     SIMILARITY_THRESHOLD = 80
     
+    # OCR segments below this confidence (0-1) are not matched at all
+    MIN_SEGMENT_CONFIDENCE = 0.3
+    # OCR segments shorter than this (px) are specks / fine print, not drug names
+    MIN_SEGMENT_HEIGHT = 8
+    
     def __init__(self, db_path: Optional[str] = None):
         """
         Initialize the drug database.
@@ -87,8 +93,6 @@ class DrugDatabase:
         Returns:
             List of potential drug name words
         """
-        import re
-        
         # Remove common non-drug patterns
         text = re.sub(r'\d+\s*(mg|ml|mcg|g|tablets?|pills?|caps?)', '', text, flags=re.IGNORECASE)
         text = re.sub(r'(mfg|exp|batch|lot|strip|pack)[:.]?\s*\S+', '', text, flags=re.IGNORECASE)
@@ -102,29 +106,29 @@ class DrugDatabase:
         
         return words
     
-    def get_generic_name(self, text: str) -> Optional[str]:
+    def match(self, text: str) -> Optional[Tuple[str, float]]:
         """
-        Get the generic name for a drug (from brand name or alias).
+        Match a drug name (brand, generic, or misspelling) to its generic name.
         
         Args:
             text: Drug name (brand or generic)
             
         Returns:
-            Generic drug name if found, None otherwise
+            (generic name, similarity score 0-100) if found, None otherwise
         """
         text_lower = text.lower().strip()
         
         # First, try exact match with generic names
         if text_lower in self.drug_map:
             logger.debug(f"Exact match: '{text}' -> '{text_lower}'")
-            return text_lower
+            return text_lower, 100.0
         
         # Try exact match with brand names
         for generic_name, data in self.drug_map.items():
             brand_names = [b.lower() for b in data.get('brand_names', [])]
             if text_lower in brand_names:
                 logger.debug(f"Brand name match: '{text}' -> '{generic_name}'")
-                return generic_name
+                return generic_name, 100.0
         
         # Try fuzzy matching with generic names
         best_match = None
@@ -138,7 +142,7 @@ class DrugDatabase:
         
         if best_match:
             logger.debug(f"Fuzzy match: '{text}' -> '{best_match}' (score: {best_score:.1f})")
-            return best_match
+            return best_match, best_score
         
         # Try fuzzy matching with brand names and misspellings
         for generic_name, data in self.drug_map.items():
@@ -155,40 +159,92 @@ class DrugDatabase:
         
         if best_match:
             logger.debug(f"Fuzzy variant match: '{text}' -> '{best_match}' (score: {best_score:.1f})")
-            return best_match
+            return best_match, best_score
         
         logger.debug(f"No match found for: '{text}'")
         return None
     
-    def normalize(self, raw_text: List[str]) -> List[str]:
+    def get_generic_name(self, text: str) -> Optional[str]:
         """
-        Normalize OCR output to known drug names.
+        Get the generic name for a drug (from brand name or alias).
         
         Args:
-            raw_text: List of raw text strings from OCR
+            text: Drug name (brand or generic)
             
         Returns:
-            List of normalized generic drug names (duplicates removed)
+            Generic drug name if found, None otherwise
+        """
+        result = self.match(text)
+        return result[0] if result else None
+    
+    def _usable_segment(self, segment: OCRSegment) -> bool:
+        """Filter out OCR segments that cannot be (or are unlikely to be) drug names."""
+        if segment.confidence < self.MIN_SEGMENT_CONFIDENCE:
+            return False
+        if segment.bbox is not None and segment.bbox[3] < self.MIN_SEGMENT_HEIGHT:
+            return False
+        # Drug names need at least 3 letters ("MFG: 2024", "10", "|" never match)
+        return len(re.findall(r'[A-Za-z]', segment.text)) >= 3
+    
+    def detect(self, raw_text: Sequence[Union[str, OCRSegment]]) -> List[DrugInfo]:
+        """
+        Normalize OCR output to known drugs, with a confidence per drug.
+        
+        Low-confidence and tiny OCR segments are skipped before fuzzy
+        matching. A drug's confidence is the best (OCR confidence x match
+        similarity) over the segments that named it; plain strings count
+        as OCR confidence 1.0.
+        
+        Args:
+            raw_text: Raw text strings or OCRSegments from OCR
+            
+        Returns:
+            DrugInfo per detected drug, sorted by generic name
         """
         logger.info(f"Normalizing {len(raw_text)} text segments")
         
-        found_drugs = set()
+        found: Dict[str, float] = {}
+        skipped = 0
         
-        for text in raw_text:
-            # Extract potential drug words from text
-            words = self._extract_drug_words(text)
+        for item in raw_text:
+            segment = item if isinstance(item, OCRSegment) else OCRSegment(item, 1.0)
+            if not self._usable_segment(segment):
+                skipped += 1
+                continue
             
-            # Try to match each word
-            for word in words:
-                generic_name = self.get_generic_name(word)
-                if generic_name:
-                    found_drugs.add(generic_name)
+            # Extract potential drug words from text, and also try the full text
+            candidates = self._extract_drug_words(segment.text) + [segment.text]
             
-            # Also try the full text
-            generic_name = self.get_generic_name(text)
-            if generic_name:
-                found_drugs.add(generic_name)
-        
-        result = sorted(list(found_drugs))
-        logger.info(f"Found {len(result)} drugs: {result}")
-        return result
+            # Try to match each candidate
+            for candidate in candidates:
+                result = self.match(candidate)
+                if result:
+                    generic_name, similarity = result
+                    score = segment.confidence * similarity / 100.0
+                    found[generic_name] = max(found.get(generic_name, 0.0), score)
+        
+        if skipped:
+            logger.info(f"Skipped {skipped} low-confidence or non-text segments")
+        
+        drugs = [
+            DrugInfo(
+                generic_name=name,
+                brand_names=self.drug_map.get(name, {}).get('brand_names', []),
+                confidence=round(found[name], 3),
+            )
+            for name in sorted(found)
+        ]
+        logger.info(f"Found {len(drugs)} drugs: {[d.generic_name for d in drugs]}")
+        return drugs
+    
+    def normalize(self, raw_text: Sequence[Union[str, OCRSegment]]) -> List[str]:
+        """
+        Normalize OCR output to known drug names.
+        
+        Args:
+            raw_text: List of raw text strings (or OCRSegments) from OCR
+            
+        Returns:
+            List of normalized generic drug names (duplicates removed)
+        """
+        return [drug.generic_name for drug in self.detect(raw_text)]
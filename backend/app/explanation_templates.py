@@ -0,0 +1,267 @@
+"""
+Explanation Templates - deterministic, knowledge-base grounded explanations.
+
+The fast tier behind AIInference: serves a structured explanation in
+microseconds when the model is not loaded, fails, or is not worth calling
+(see generation_profiles). Content comes from three places:
+
+- the interaction's own KB fields (mechanism, clinical_effect, severity,
+  evidence, source, and the non-dosing sentences of the recommendation;
+  KB sentences SafetyGuard would block are left out, they remain in
+  basic_info),
+- per-mechanism facts (bleeding, serotonergic, CNS depression, ...) for
+  the mechanisms the KB entry lists in its `mechanism_tags` field; each
+  contributes points to every section. The tags are curated per entry
+  rather than inferred from the free-text fields, where words like
+  "gastric" or "metabolism" also occur in negations and side remarks,
+- per-drug facts from the drug database (other brand names of each drug).
+
+All point templates are compiled once at import into literal / field
+pieces; rendering only joins strings. Explanations are rendered the first
+time a pair is asked for and memoized per pair (TemplateEngine.render).
+"""
+
+from functools import lru_cache
+from string import Formatter
+from typing import Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+import re
+
+from backend.app.output_parser import SECTIONS, default_points
+from backend.app.safety import SafetyGuard
+
+MAX_POINTS = 5
+MAX_BRANDS = 3
+
+# Per-mechanism facts; points may use {drug1} / {drug2}. Every point must hold
+# for every KB entry that lists the mechanism in its mechanism_tags.
+MECHANISMS: Dict[str, Dict] = {
+    "bleeding": {
+        "mechanism_of_interaction": ["Together, {drug1} and {drug2} have a stronger effect on blood clotting than either alone, so bleeding becomes more likely."],
+        "clinical_manifestations": ["Bleeding may show as easy bruising, nosebleeds, bleeding gums, blood in urine, or black or bloody stools."],
+        "risk_factors": ["A history of stomach ulcers, gastrointestinal bleeding, or recent surgery raises the bleeding risk."],
+        "monitoring_recommendations": ["Clotting tests such as INR and signs of unusual bleeding or bruising are watched more closely with this combination."],
+        "alternative_suggestions": ["A doctor or pharmacist can check whether a medicine with less effect on bleeding could be used instead."],
+    },
+    "serotonin": {
+        "mechanism_of_interaction": ["{drug1} and {drug2} both raise serotonin activity, and the effects add up."],
+        "clinical_manifestations": ["Serotonin excess can cause agitation, sweating, tremor, fast heartbeat, fever, or muscle twitching."],
+        "risk_factors": ["Other serotonergic medicines or supplements (for example St John's wort) add to the risk."],
+        "monitoring_recommendations": ["Restlessness, confusion, shivering, or a racing heart after starting or changing either medicine need prompt medical attention."],
+        "alternative_suggestions": ["Medicines without serotonergic activity may be available for the same purpose."],
+    },
+    "cns_depression": {
+        "mechanism_of_interaction": ["{drug1} and {drug2} both slow down the central nervous system, and their sedating effects add up."],
+        "clinical_manifestations": ["Drowsiness, dizziness, slowed or shallow breathing, and poor coordination can occur."],
+        "risk_factors": ["Alcohol, sleep aids, older age, and lung conditions such as COPD or sleep apnea increase the danger."],
+        "monitoring_recommendations": ["Excessive sleepiness or slow, shallow breathing is a medical emergency; family members should know the warning signs."],
+        "alternative_suggestions": ["Non-sedating options for pain, anxiety, or sleep may be worth discussing with a doctor."],
+    },
+    "metabolism": {
+        "mechanism_of_interaction": ["One drug changes how the body processes or carries the other, so blood levels of {drug1} or {drug2} can shift."],
+        "clinical_manifestations": ["Changed blood levels can mean stronger side effects or a weaker therapeutic effect than expected."],
+        "risk_factors": ["Starting, stopping, or changing other medicines that use the same enzymes or transporters can shift levels further."],
+        "monitoring_recommendations": ["Effects are most likely in the first weeks after either medicine is started or changed."],
+        "alternative_suggestions": ["A doctor or pharmacist can check whether a related medicine that is processed differently would avoid the interaction."],
+    },
+    "potassium_kidney": {
+        "mechanism_of_interaction": ["The combination affects kidney function and the body's handling of potassium."],
+        "clinical_manifestations": ["High potassium or reduced kidney function may cause weakness, fatigue, irregular heartbeat, or less urine."],
+        "risk_factors": ["Existing kidney disease, dehydration, diabetes, and potassium supplements or salt substitutes increase the risk."],
+        "monitoring_recommendations": ["Blood tests for potassium and kidney function (creatinine) are typically checked after starting the combination."],
+        "alternative_suggestions": ["Using a single medicine from this class, or one with less effect on the kidneys, may be possible."],
+    },
+    "blood_pressure": {
+        "mechanism_of_interaction": ["Both drugs influence blood pressure, so the combined effect can be larger or smaller than intended."],
+        "clinical_manifestations": ["Blood pressure may end up lower or higher than intended; low blood pressure can cause dizziness or fainting, especially when standing up quickly."],
+        "risk_factors": ["Dehydration, heart disease, and other blood-pressure-lowering medicines increase the risk."],
+        "monitoring_recommendations": ["Home blood pressure readings help show whether the combination is well tolerated."],
+        "alternative_suggestions": ["Other blood pressure medicines with a different mechanism may fit better."],
+    },
+    "muscle": {
+        "mechanism_of_interaction": ["The combination raises statin exposure in muscle tissue."],
+        "clinical_manifestations": ["Unexplained muscle pain, tenderness, or weakness, sometimes with dark urine, can signal muscle damage."],
+        "risk_factors": ["Older age, low thyroid function, kidney disease, and intense exercise raise the risk of muscle problems."],
+        "monitoring_recommendations": ["New muscle symptoms should be reported; a blood test (CK) can check for muscle damage."],
+        "alternative_suggestions": ["A doctor or pharmacist can review whether a different statin or statin dose fits better."],
+    },
+    "absorption": {
+        "mechanism_of_interaction": ["One product reduces how much of the other is absorbed from the gut."],
+        "clinical_manifestations": ["The affected medicine may work less well, without any obvious symptoms."],
+        "risk_factors": ["Taking both products at the same time of day makes the interaction more likely."],
+        "monitoring_recommendations": ["Signs that the affected medicine is less effective should be reported."],
+        "alternative_suggestions": ["Spacing the two products apart during the day often avoids the problem; a pharmacist can suggest a schedule."],
+    },
+    "liver": {
+        "mechanism_of_interaction": ["The combination increases stress on the liver."],
+        "clinical_manifestations": ["Liver injury may cause nausea, tiredness, dark urine, or yellowing of the skin or eyes."],
+        "risk_factors": ["Regular alcohol use, existing liver disease, and fasting increase the risk."],
+        "monitoring_recommendations": ["Liver function tests may be checked, and symptoms of liver injury need prompt attention."],
+        "alternative_suggestions": ["Avoiding alcohol and other liver-stressing products lowers the risk."],
+    },
+    "stomach": {
+        "mechanism_of_interaction": ["Both drugs can irritate the stomach lining, and the effects add up."],
+        "clinical_manifestations": ["Stomach pain, heartburn, nausea, or dark stools may indicate irritation or bleeding."],
+        "risk_factors": ["Older age and a history of ulcers increase the risk of stomach complications."],
+        "monitoring_recommendations": ["Stomach pain, vomiting blood, or black stools should be reported promptly."],
+        "alternative_suggestions": ["A pharmacist can suggest options that are gentler on the stomach."],
+    },
+    "alcohol_reaction": {
+        "mechanism_of_interaction": ["The medicine blocks the breakdown of alcohol, so a toxic by-product builds up."],
+        "clinical_manifestations": ["Flushing, pounding headache, nausea, vomiting, and a fast heartbeat can follow even small amounts of alcohol."],
+        "risk_factors": ["Hidden alcohol in mouthwashes, syrups, and some foods can also trigger the reaction."],
+        "monitoring_recommendations": ["Any reaction after alcohol exposure should be reported."],
+        "alternative_suggestions": ["Alcohol-free versions of everyday products avoid accidental exposure."],
+    },
+}
+
+# Points every explanation gets, by severity of the KB entry
+_SEVERITY = {
+    "high": "The knowledge base rates the {drug1}-{drug2} combination as HIGH risk.",
+    "moderate": "The knowledge base rates the {drug1}-{drug2} combination as MODERATE risk.",
+    "low": "The knowledge base rates the {drug1}-{drug2} combination as LOW risk.",
+    "none": "No clinically significant interaction between {drug1} and {drug2} is recorded in the knowledge base.",
+    "unknown": "No documented interaction between {drug1} and {drug2} was found in the knowledge base.",
+}
+_EVIDENCE = "Source: {source} (evidence: {evidence_level})."
+_BRANDS = "{drug} is also sold as {brands}; check other medicines for the same ingredient to avoid taking it twice."
+
+# Recommendation sentences about doses stay in basic_info only
+_DOSING = re.compile(r"\b(doses?|dosing|dosages?|\d+(\.\d+)?\s*(mg|g|ml|%))", re.IGNORECASE)
+_SENTENCES = re.compile(r"(?<=[.!?])\s+")
+
+Renderer = Callable[[Mapping[str, str]], str]
+
+
+def compile_template(template: str) -> Renderer:
+    """
+    Compile a "{field}" template into a renderer.
+
+    The template is parsed once; rendering joins the literal pieces with
+    the field values, without re-parsing.
+    """
+    pieces: List[Tuple[str, Optional[str]]] = [
+        (literal, field) for literal, field, _, _ in Formatter().parse(template)
+    ]
+
+    def render(values: Mapping[str, str]) -> str:
+        return "".join(literal + (values[field] if field is not None else "") for literal, field in pieces)
+
+    return render
+
+
+_MECHANISMS = {
+    name: {key: [compile_template(point) for point in facts[key]] for key in SECTIONS}
+    for name, facts in MECHANISMS.items()
+}
+_SEVERITY_RENDERERS = {level: compile_template(text) for level, text in _SEVERITY.items()}
+_EVIDENCE_RENDERER = compile_template(_EVIDENCE)
+_BRANDS_RENDERER = compile_template(_BRANDS)
+
+
+def kb_point(text: str, skip_dosing: bool = False) -> List[str]:
+    """
+    One point from a KB field: its sentences, minus those SafetyGuard would
+    block (and, with skip_dosing, those about doses).
+
+    Returns:
+        [point], or [] if nothing is left
+    """
+    kept = []
+    for sentence in _SENTENCES.split((text or "").strip()):
+        sentence = sentence.strip()
+        if not sentence or (skip_dosing and _DOSING.search(sentence)):
+            continue
+        if SafetyGuard.find_violation(sentence) is None:
+            kept.append(sentence if sentence.endswith((".", "!", "?")) else sentence + ".")
+    return [" ".join(kept)] if kept else []
+
+
+def match_mechanisms(interaction: Mapping) -> List[str]:
+    """Names of the MECHANISMS an interaction's KB entry is tagged with (in MECHANISMS order; [] if none)."""
+    tags = interaction.get("mechanism_tags") or ()
+    return [name for name in MECHANISMS if name in tags]
+
+
+class TemplateEngine:
+    """
+    Renders structured explanations from the knowledge base.
+
+    Args:
+        brand_names: drug (generic, lowercase) -> brand names; loaded from the
+            drug database on first use when not given
+    """
+
+    def __init__(self, brand_names: Optional[Mapping[str, Sequence[str]]] = None):
+        self._brand_names = brand_names
+        self._render = lru_cache(maxsize=2048)(self._render_pair)
+
+    @property
+    def brand_names(self) -> Mapping[str, Sequence[str]]:
+        if self._brand_names is None:
+            from backend.app.dependencies import get_drug_db
+            drug_map = get_drug_db().drug_map
+            self._brand_names = {drug: info.get("brand_names", []) for drug, info in drug_map.items()}
+        return self._brand_names
+
+    def render(self, interaction: Mapping) -> Dict:
+        """
+        Structured explanation for one interaction.
+
+        Args:
+            interaction: Interaction dict from InteractionChecker
+
+        Returns:
+            Structured explanation (a fresh copy; rendering is memoized per pair)
+        """
+        drug_pair = interaction.get("drug_pair") or ("Drug A", "Drug B")
+        sections = self._render(
+            str(drug_pair[0]), str(drug_pair[1]),
+            str(interaction.get("risk_level") or "unknown").lower(),
+            interaction.get("mechanism") or "",
+            interaction.get("clinical_effect") or "",
+            interaction.get("recommendation") or "",
+            interaction.get("source") or "",
+            interaction.get("evidence_level") or "",
+            tuple(match_mechanisms(interaction)),
+        )
+        return {key: list(points) for key, points in sections}
+
+    def _render_pair(self, drug_a: str, drug_b: str, risk_level: str, mechanism: str,
+                     clinical_effect: str, recommendation: str, source: str,
+                     evidence_level: str, mechanisms: Tuple[str, ...]) -> Tuple[Tuple[str, Tuple[str, ...]], ...]:
+        values = {"drug1": drug_a.title(), "drug2": drug_b.title(),
+                  "source": source, "evidence_level": evidence_level}
+        points: Dict[str, List[str]] = {key: [] for key in SECTIONS}
+
+        severity = _SEVERITY_RENDERERS.get(risk_level, _SEVERITY_RENDERERS["unknown"])
+        points["mechanism_of_interaction"].append(severity(values))
+        if source and source != "insufficient_data":
+            points["mechanism_of_interaction"] += kb_point(mechanism)
+        points["clinical_manifestations"] += kb_point(clinical_effect)
+        points["monitoring_recommendations"] += kb_point(recommendation, skip_dosing=True)
+
+        for name in mechanisms:
+            for key in SECTIONS:
+                points[key] += [render(values) for render in _MECHANISMS[name][key]]
+
+        for drug in (drug_a, drug_b):
+            brands = self.brand_names.get(drug.lower())
+            if brands:
+                points["risk_factors"].append(_BRANDS_RENDERER({
+                    "drug": drug.title(),
+                    "brands": ", ".join(brand.title() for brand in brands[:MAX_BRANDS]),
+                }))
+        if source and evidence_level and evidence_level not in ("unknown", "n/a"):
+            points["mechanism_of_interaction"].append(_EVIDENCE_RENDERER(values))
+
+        defaults = default_points((drug_a, drug_b))
+        for key in ("risk_factors", "monitoring_recommendations", "alternative_suggestions"):
+            points[key].append(defaults[key])
+        return tuple(
+            (key, tuple(dict.fromkeys(points[key] or [defaults[key]]))[:MAX_POINTS])
+            for key in SECTIONS
+        )
+
+
+# Process-wide engine (memo shared by all requests)
+template_engine = TemplateEngine()
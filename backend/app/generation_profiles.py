@@ -0,0 +1,82 @@
+"""
+Generation Profiles - how much model work an interaction deserves.
+
+Explanations used to be decoded with the same 512-token budget for every
+pair, including "unknown" pairs whose knowledge-base entry is only
+"Insufficient data available". A profile is chosen from the pair's
+risk_level and evidence_level:
+
+    templated   unknown risk / no evidence: explanation from the KB fields,
+                no model call
+    full        high risk or critical evidence: GEN_TOKENS_HIGH
+    standard    moderate risk: GEN_TOKENS_MODERATE
+    short       low risk: GEN_TOKENS_LOW
+
+How much of its budget each generation used is recorded per profile
+(metrics `generation.budget_utilisation.<profile>`, and
+`generation.budget_exhausted.<profile>` when a reply hit the limit), so
+budgets can be tuned from real traffic.
+"""
+
+from typing import Dict, NamedTuple
+
+from backend.app.config import settings
+from backend.app.metrics import metrics
+from backend.app.explanation_templates import template_engine
+
+# Evidence levels with nothing to explain beyond the KB entry
+_NO_EVIDENCE = {"unknown", "n/a"}
+
+
+class GenerationProfile(NamedTuple):
+    """Generation settings for one class of interaction."""
+    name: str
+    max_new_tokens: int
+    templated: bool = False  # answer from the KB without calling the model
+    points: str = "2-3"      # points per section asked for in the prompt
+
+
+def select_profile(interaction: Dict) -> GenerationProfile:
+    """
+    Profile for one interaction from its risk and evidence levels.
+
+    Args:
+        interaction: Interaction dict from InteractionChecker
+
+    Returns:
+        GenerationProfile (always "full" when PSL_GENERATION_PROFILES is off)
+    """
+    if not settings.GENERATION_PROFILES:
+        return GenerationProfile("full", settings.GEN_TOKENS_HIGH)
+
+    risk = str(interaction.get("risk_level", "unknown")).lower()
+    evidence = str(interaction.get("evidence_level") or "").lower()
+    if risk == "unknown" or evidence in _NO_EVIDENCE:
+        return GenerationProfile("templated", settings.GEN_TOKENS_LOW, templated=True, points="1-2")
+    if risk == "high" or evidence == "critical":
+        return GenerationProfile("full", settings.GEN_TOKENS_HIGH)
+    if risk == "moderate":
+        return GenerationProfile("standard", settings.GEN_TOKENS_MODERATE)
+    return GenerationProfile("short", settings.GEN_TOKENS_LOW, points="1-2")
+
+
+def templated_explanation(interaction: Dict) -> Dict:
+    """
+    Structured explanation from the knowledge-base entry (no model call).
+
+    Args:
+        interaction: Interaction dict from InteractionChecker
+
+    Returns:
+        Structured explanation (see explanation_templates.TemplateEngine)
+    """
+    return template_engine.render(interaction)
+
+
+def record_utilisation(profile: GenerationProfile, tokens_used: int):
+    """Record how much of the profile's token budget one generation used."""
+    budget = max(1, profile.max_new_tokens)
+    metrics.observe(f"generation.budget_utilisation.{profile.name}", min(1.0, tokens_used / budget))
+    metrics.observe(f"generation.tokens.{profile.name}", tokens_used)
+    if tokens_used >= budget:
+        metrics.incr(f"generation.budget_exhausted.{profile.name}")
@@ -10,8 +10,6 @@ from pathlib import Path
 import json
 import logging
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
@@ -83,6 +81,8 @@ class InteractionChecker:
                 - recommendation: What to do
                 - source: Data source
                 - evidence_level: Quality of evidence
+                - mechanism_tags: Mechanism classes for templated explanations
+                  (KB entries only; see explanation_templates.MECHANISMS)
                 
         Rules:
             - Works without LLM
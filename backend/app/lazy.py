@@ -0,0 +1,72 @@
+"""
+Lazy Imports - defer heavy libraries until first use.
+
+cv2, numpy, PIL and pytesseract cost hundreds of milliseconds to import
+(torch several seconds), which every API worker paid at startup even when
+it only ever served knowledge-base checks. Modules bind them with
+lazy_import() instead; the real import happens on the first attribute
+access, e.g. when an engine is first used or explicitly preloaded.
+
+    cv2 = lazy_import("cv2")
+    np = lazy_import("numpy")
+"""
+
+from typing import Optional
+import importlib
+import sys
+import threading
+import types
+
+
+class LazyModule(types.ModuleType):
+    """Module stand-in that imports the real module on first attribute access."""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__["_lazy_module"] = None
+        self.__dict__["_lazy_lock"] = threading.Lock()
+
+    def _load(self) -> types.ModuleType:
+        module = self.__dict__["_lazy_module"]
+        if module is None:
+            with self.__dict__["_lazy_lock"]:
+                module = self.__dict__["_lazy_module"]
+                if module is None:
+                    module = importlib.import_module(self.__name__)
+                    self.__dict__["_lazy_module"] = module
+        return module
+
+    def __getattr__(self, attr: str):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = "loaded" if self.__dict__["_lazy_module"] is not None else "not loaded"
+        return f"<lazy module '{self.__name__}' ({state})>"
+
+
+def lazy_import(name: str) -> types.ModuleType:
+    """
+    Return `name` if it is already imported, else a LazyModule for it.
+
+    Args:
+        name: Absolute module name ("cv2", "PIL.Image", ...)
+    """
+    module: Optional[types.ModuleType] = sys.modules.get(name)
+    return module if module is not None else LazyModule(name)
+
+
+def is_loaded(module: types.ModuleType) -> bool:
+    """Whether a (possibly lazy) module has actually been imported."""
+    if isinstance(module, LazyModule):
+        return module.__dict__["_lazy_module"] is not None
+    return True
+
+
+def ensure_loaded(*modules: types.ModuleType):
+    """Import lazy modules now (explicit preload at startup)."""
+    for module in modules:
+        if isinstance(module, LazyModule):
+            module._load()
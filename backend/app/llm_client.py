@@ -0,0 +1,211 @@
+"""
+LLM Client - explanations from an OpenAI-compatible completion server.
+
+Instead of loading TxGemma in the API process, PSL_LLM_BASE_URL points at
+a local server speaking the OpenAI chat completions API (vLLM, llama.cpp
+server). The API process stays small and the GPU box scales on its own;
+the server batches concurrent requests itself.
+
+The client keeps one pooled httpx.AsyncClient on a private event loop
+thread, so the synchronous callers (explanation worker threads) share its
+connections. Requests are limited to LLM_MAX_CONCURRENCY in flight, have
+connect/read timeouts, and are retried with backoff on connection errors
+and 429/5xx responses as long as nothing has been streamed yet. Replies
+are streamed: the safety guard reads them as they arrive and closes the
+stream (which aborts generation on the server) at the first violation.
+Prompting and parsing are the same as for RealMedGemmaInference.
+"""
+
+from contextlib import aclosing
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+import asyncio
+import json
+import logging
+import threading
+
+import httpx
+
+from backend.app.config import settings
+from backend.app.inference import RealMedGemmaInference
+from backend.app.metrics import metrics
+from backend.app.safety import SafetyViolation, StreamingSafetyGuard
+from backend.app.structured_output import explanation_schema
+
+logger = logging.getLogger(__name__)
+
+# Statuses worth retrying (overloaded or restarting server)
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class LLMServerError(RuntimeError):
+    """The completion server could not produce a reply."""
+
+
+class OpenAICompatibleInference(RealMedGemmaInference):
+    """
+    RealMedGemmaInference backed by an OpenAI-compatible HTTP server.
+
+    Args:
+        base_url: API root, e.g. "http://127.0.0.1:8001/v1"
+        model: Model name the server serves
+        api_key: Bearer token, if the server wants one
+        max_concurrency: Requests in flight at once (also the connection pool size)
+        timeout: Read timeout in seconds (time between streamed chunks)
+        connect_timeout: Connect timeout in seconds
+        retries: Extra attempts for connection errors and RETRY_STATUS responses
+        retry_backoff: First retry delay in seconds (doubles per attempt)
+    """
+
+    def __init__(self, base_url: str, model: str, api_key: str = "",
+                 max_concurrency: int = 8, timeout: float = 60.0, connect_timeout: float = 5.0,
+                 retries: int = 2, retry_backoff: float = 0.5):
+        super().__init__()
+        self.model_name = model
+        self.base_url = base_url.rstrip("/")
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="llm-client", daemon=True)
+        self._thread.start()
+
+        async def setup():
+            headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+            client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=headers,
+                timeout=httpx.Timeout(timeout, connect=connect_timeout),
+                limits=httpx.Limits(max_connections=max_concurrency,
+                                    max_keepalive_connections=max_concurrency),
+            )
+            return client, asyncio.Semaphore(max(1, max_concurrency))
+
+        self._client, self._semaphore = self._run(setup())
+        self._loaded = False
+
+    def _run(self, coro):
+        """Run a coroutine on the client's loop and wait for it (from any thread)."""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._loaded
+
+    def load_model(self, model_name: str = None, hf_token: str = None) -> bool:
+        """Check that the server is up (the model lives on the server)."""
+        if model_name:
+            self.model_name = model_name
+        try:
+            response = self._run(self._client.get("/models"))
+            response.raise_for_status()
+            served = [m.get("id") for m in response.json().get("data", [])]
+            print(f"   🔌 LLM server at {self.base_url} serves: {', '.join(map(str, served)) or '?'}")
+            if served and self.model_name not in served:
+                print(f"   ⚠️  '{self.model_name}' not listed; using '{served[0]}'")
+                self.model_name = served[0]
+            self._loaded = True
+        except (httpx.HTTPError, ValueError) as e:
+            print(f"   ❌ LLM server at {self.base_url} not reachable: {e}")
+            self._loaded = False
+        return self._loaded
+
+    def warmup(self):
+        """Nothing to warm up locally; the server keeps the model loaded."""
+        self._is_warmed_up = True
+
+    def _count_tokens(self, text: str) -> Optional[int]:
+        # No local tokenizer; the server reports usage (see metrics llm.completion_tokens)
+        return None
+
+    def _payload(self, messages: list, max_new_tokens: int, constrained: bool) -> Dict:
+        payload = {
+            "model": self.model_name,
+            "messages": messages,
+            "max_tokens": max_new_tokens,
+            "temperature": 0,
+            "stream": True,
+            "stream_options": {"include_usage": True},
+        }
+        if constrained:
+            payload["response_format"] = {
+                "type": "json_schema",
+                "json_schema": {"name": "explanation", "schema": explanation_schema()},
+            }
+        return payload
+
+    async def astream(self, messages: list, max_new_tokens: int = 512,
+                      constrained: bool = False) -> AsyncIterator[str]:
+        """
+        Stream the reply to one chat, chunk by chunk.
+
+        Retries connection errors and RETRY_STATUS responses until the first
+        chunk arrives; later failures raise. Closing the generator early
+        closes the connection.
+
+        Raises:
+            LLMServerError: when the server fails (after retries)
+        """
+        payload = self._payload(messages, max_new_tokens, constrained)
+        async with self._semaphore:
+            for attempt in range(self.retries + 1):
+                streamed = False
+                try:
+                    async with self._client.stream("POST", "/chat/completions", json=payload) as response:
+                        if response.status_code >= 400:
+                            await response.aread()
+                            raise httpx.HTTPStatusError(
+                                f"{response.status_code}: {response.text[:200]}",
+                                request=response.request, response=response)
+                        async with aclosing(response.aiter_lines()) as lines:
+                            async for line in lines:
+                                if not line.startswith("data:"):
+                                    continue
+                                data = line[5:].strip()
+                                if data == "[DONE]":
+                                    return
+                                chunk = json.loads(data)
+                                if chunk.get("usage"):
+                                    metrics.incr("llm.completion_tokens", chunk["usage"].get("completion_tokens") or 0)
+                                for choice in chunk.get("choices") or []:
+                                    content = (choice.get("delta") or {}).get("content")
+                                    if content:
+                                        streamed = True
+                                        yield content
+                    return
+                except (httpx.TransportError, httpx.HTTPStatusError) as e:
+                    retryable = isinstance(e, httpx.TransportError) or e.response.status_code in RETRY_STATUS
+                    if streamed or not retryable or attempt == self.retries:
+                        metrics.incr("llm.errors")
+                        raise LLMServerError(f"LLM server request failed: {e}") from e
+                    metrics.incr("llm.retries")
+                    logger.warning(f"LLM server request failed ({e}); retry {attempt + 1}/{self.retries}")
+                    await asyncio.sleep(self.retry_backoff * 2 ** attempt)
+
+    async def _chat(self, messages: list, max_new_tokens: int,
+                    constrained: bool) -> Tuple[str, Optional[SafetyViolation]]:
+        guard = StreamingSafetyGuard() if settings.SAFETY_STOP_GENERATION else None
+        parts: List[str] = []
+        metrics.incr("llm.requests")
+        async with aclosing(self.astream(messages, max_new_tokens, constrained)) as chunks:
+            async for chunk in chunks:
+                parts.append(chunk)
+                if guard is not None and guard.feed(chunk) is not None:
+                    metrics.incr("llm.safety_stops")
+                    break
+        return "".join(parts).strip(), guard.violation if guard is not None else None
+
+    def _generate_checked(self, messages: list, max_new_tokens: int = 512,
+                          constrained: bool = False) -> Tuple[str, Optional[SafetyViolation]]:
+        """
+        Reply to one chat from the server (see RealMedGemmaInference._generate_checked).
+
+        Concurrent callers are batched by the server, not here.
+        """
+        return self._run(self._chat(messages, max_new_tokens, constrained))
+
+    def close(self):
+        """Close the connection pool and stop the client's loop."""
+        self._run(self._client.aclose())
+        self._run(self._loop.shutdown_asyncgens())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
@@ -1,7 +1,12 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+import logging
 from backend.app.drug_db import DrugDatabase
 from backend.app.interaction_logic import InteractionChecker
+from backend.app.metrics import metrics
+
+# Logging is configured by the application, not by library modules
+logging.basicConfig(level=logging.INFO)
 
 # Initialize App
 app = FastAPI(title="Pharma-Safe Lens API", version="0.5.0")
@@ -24,6 +29,12 @@ checker = InteractionChecker()
 async def startup_event():
     print("✅ Drug Database Loaded")
     print("✅ Interaction Logic Loaded")
+    # Models and OCR engines load here, not at import time
+    endpoints.init_backend()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    endpoints.shutdown_backend()
 
 @app.get("/")
 def read_root():
@@ -36,6 +47,11 @@ def health_check():
         "interactions_loaded": len(checker.interactions)
     }
 
+@app.get("/metrics")
+def get_metrics():
+    """Per-process counters and timings (cache hits, coalesced requests, latencies)."""
+    return metrics.snapshot()
+
 # Include Routers
 from backend.app.api import endpoints
 app.include_router(endpoints.router, prefix="/api/v1")
@@ -0,0 +1,60 @@
+"""
+Metrics Module - In-process counters and timings.
+
+Exposed as JSON on GET /metrics. Counters are per worker process.
+"""
+
+from typing import Dict
+import threading
+
+
+class Metrics:
+    """Thread-safe counters, gauges and timing summaries (count / total / max)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = {}
+        self._timings: Dict[str, Dict[str, float]] = {}
+        self._gauges: Dict[str, float] = {}
+
+    def incr(self, name: str, value: float = 1):
+        """Increment a counter."""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def set_gauge(self, name: str, value: float):
+        """Set a point-in-time value (e.g. a hit rate)."""
+        with self._lock:
+            self._gauges[name] = value
+
+    def observe(self, name: str, value: float):
+        """Record one observation (e.g. a latency in ms)."""
+        with self._lock:
+            stats = self._timings.setdefault(name, {"count": 0, "total": 0.0, "max": 0.0})
+            stats["count"] += 1
+            stats["total"] += value
+            stats["max"] = max(stats["max"], value)
+
+    def get(self, name: str) -> float:
+        """Current value of a counter (0 if never incremented)."""
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def snapshot(self) -> Dict:
+        """Copy of all counters, gauges and timings, with means filled in."""
+        with self._lock:
+            timings = {
+                name: {**stats, "mean": stats["total"] / stats["count"] if stats["count"] else 0.0}
+                for name, stats in self._timings.items()
+            }
+            return {"counters": dict(self._counters), "gauges": dict(self._gauges), "timings": timings}
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._timings.clear()
+
+
+# Process-wide registry
+metrics = Metrics()
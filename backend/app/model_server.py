@@ -0,0 +1,350 @@
+"""
+Model Server - one process owns the heavy models, API workers talk to it over IPC.
+
+Running uvicorn with several workers re-imports the endpoints in every worker,
+so each one would load its own TxGemma 9B and EasyOCR reader. With a model
+server, the models are loaded exactly once and the HTTP tier stays stateless:
+
+    # Both terminals: a shared secret, e.g. from `openssl rand -hex 32`
+    export PSL_MODEL_SERVER_AUTHKEY=...
+
+    # Terminal 1 - load models once
+    PSL_MODEL_SERVER_ADDRESS=/tmp/psl.sock python -m backend.app.model_server
+
+    # Terminal 2 - stateless API workers
+    PSL_MODEL_SERVER_ADDRESS=/tmp/psl.sock uvicorn backend.app.main:app --workers 4
+
+Transport is ``multiprocessing.connection`` (unix socket or localhost TCP,
+authenticated with a shared key). Messages are ``(op, payload)`` tuples.
+
+Trust boundary: ``multiprocessing.connection`` pickles every message, and
+unpickling runs code. The HMAC handshake on the shared key is the only thing
+keeping other local users (or hosts) from executing code in the server, or
+in the API workers through forged replies. So the key is mandatory and
+should be long and random (``PSL_MODEL_SERVER_AUTHKEY``); prefer a unix
+socket in a directory only the service user can open; and TCP listeners are
+restricted to loopback unless ``PSL_MODEL_SERVER_ALLOW_REMOTE`` is set, in
+which case the network path must be trusted as well (private network, TLS
+tunnel).
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from multiprocessing.connection import Client, Listener
+import ipaddress
+import logging
+import os
+import threading
+
+from backend.app.ocr import ImageDecodeError
+from backend.app.schemas import OCRSegment
+
+logger = logging.getLogger(__name__)
+
+Address = Union[str, Tuple[str, int]]
+
+
+def parse_address(address: str) -> Address:
+    """
+    Parse a model server address.
+
+    Args:
+        address: Unix socket path ("/tmp/psl.sock") or "host:port"
+
+    Returns:
+        Address usable by multiprocessing.connection
+    """
+    if ":" in address and not address.startswith(("/", ".")):
+        host, port = address.rsplit(":", 1)
+        return (host or "127.0.0.1", int(port))
+    return address
+
+
+def is_local_address(address: Address) -> bool:
+    """Whether an address is a unix socket or a loopback TCP address."""
+    if isinstance(address, str):
+        return True
+    host = address[0]
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        # Host names other than localhost may resolve anywhere
+        return False
+
+
+def _check_authkey(authkey: Optional[bytes]) -> bytes:
+    if not authkey:
+        raise ValueError("Model server needs a shared authkey (set PSL_MODEL_SERVER_AUTHKEY)")
+    return authkey
+
+
+class ModelServer:
+    """
+    Serves OCR and explanation generation to API workers.
+
+    Each client connection is handled in its own thread. OCR calls are
+    serialized with a lock, because the EasyOCR reader is not safe for
+    concurrent use; explanation requests go to the inference object
+    concurrently, which batches them into shared pipeline calls.
+    """
+
+    def __init__(self, address: Address, authkey: bytes,
+                 inference=None,
+                 ocr: Optional[Callable[[Any], List[OCRSegment]]] = None,
+                 ocr_batch: Optional[Callable[[List[Any]], List[List[OCRSegment]]]] = None,
+                 allow_remote: bool = False):
+        """
+        Args:
+            address: Where to listen (unix socket path or (host, port))
+            authkey: Shared secret clients must present (required)
+            inference: Loaded RealMedGemmaInference, or None for mock explanations
+            ocr: Segment extraction function (defaults to backend.app.ocr.extract_segments)
+            ocr_batch: Multi-image variant (defaults to backend.app.ocr.extract_segments_batch)
+            allow_remote: Allow listening on a non-loopback TCP address
+
+        Raises:
+            ValueError: if the authkey is empty, or the address is not local
+                and allow_remote is off
+        """
+        _check_authkey(authkey)
+        if not allow_remote and not is_local_address(address):
+            raise ValueError(
+                f"Refusing to listen on non-loopback address {address} "
+                "(set PSL_MODEL_SERVER_ALLOW_REMOTE to opt in)"
+            )
+        if ocr is None:
+            from backend.app.ocr import extract_segments
+            ocr = extract_segments
+        if ocr_batch is None:
+            from backend.app.ocr import extract_segments_batch
+            ocr_batch = extract_segments_batch
+
+        self.address = address
+        self.authkey = authkey
+        self.inference = inference
+        self.ocr = ocr
+        self.ocr_batch = ocr_batch
+        self._ocr_lock = threading.Lock()
+        self._listener: Optional[Listener] = None
+        self._stopped = threading.Event()
+
+    def _handle(self, op: str, payload: Dict):
+        """Dispatch a single request."""
+        if op == "ping":
+            return {"model_loaded": self.inference is not None}
+
+        if op == "extract_segments":
+            with self._ocr_lock:
+                return self.ocr(payload["image"])
+
+        if op == "extract_segments_batch":
+            with self._ocr_lock:
+                return self.ocr_batch(payload["images"])
+
+        if op == "generate_explanation":
+            interaction = payload["interaction"]
+            if self.inference is None:
+                from backend.app.inference import AIInference
+                return AIInference.generate_explanation(interaction)
+            return self.inference.generate_explanation(interaction, payload["prompt"])
+
+        if op == "translate_batch":
+            if self.inference is None:
+                # Mock translations must not reach patients (or translation caches)
+                raise RuntimeError("No translation model loaded")
+            return self.inference.translate_batch(payload["texts"], payload["language"])
+
+        raise ValueError(f"Unknown model server operation: {op}")
+
+    def _serve_connection(self, conn):
+        """Answer requests on one client connection until it closes."""
+        with conn:
+            while not self._stopped.is_set():
+                try:
+                    op, payload = conn.recv()
+                except (EOFError, OSError):
+                    return
+                try:
+                    conn.send(("ok", self._handle(op, payload)))
+                except ImageDecodeError as e:
+                    # Bad input, not a server fault: the client re-raises it as is
+                    conn.send(("invalid", str(e)))
+                except Exception as e:
+                    logger.error(f"Model server '{op}' failed: {e}")
+                    conn.send(("error", f"{type(e).__name__}: {e}"))
+
+    def start(self):
+        """Bind the listening socket (separate from serving so callers can wait on it)."""
+        self._listener = Listener(self.address, authkey=self.authkey)
+        self.address = self._listener.address
+        if isinstance(self.address, str):
+            # Only the service user may connect to the socket
+            os.chmod(self.address, 0o600)
+        logger.info(f"Model server listening on {self.address}")
+
+    def serve_forever(self):
+        """Accept clients until stop() is called."""
+        if self._listener is None:
+            self.start()
+        while not self._stopped.is_set():
+            try:
+                conn = self._listener.accept()
+            except (OSError, EOFError):
+                if self._stopped.is_set():
+                    break
+                continue
+            except Exception as e:
+                # Bad authkey etc. - reject this client, keep serving
+                logger.warning(f"Rejected model server client: {e}")
+                continue
+            threading.Thread(target=self._serve_connection, args=(conn,), daemon=True).start()
+
+    def stop(self):
+        """Stop accepting clients and close the socket."""
+        self._stopped.set()
+        if self._listener is not None:
+            self._listener.close()
+
+
+class ModelServerClient:
+    """
+    Client used by stateless API workers.
+
+    Mirrors the parts of the OCR / inference interface the endpoints use
+    (``extract_segments``, ``extract_text``, ``generate_explanation`` and
+    ``translate_batch``), so it can stand in for a local
+    RealMedGemmaInference. Each thread keeps its own connection.
+    """
+
+    def __init__(self, address: Union[str, Address], authkey: bytes):
+        self.address = parse_address(address) if isinstance(address, str) else address
+        self.authkey = _check_authkey(authkey)
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = Client(self.address, authkey=self.authkey)
+            self._local.conn = conn
+        return conn
+
+    def _drop_connection(self):
+        conn = getattr(self._local, "conn", None)
+        self._local.conn = None
+        if conn is not None:
+            try:
+                conn.close()
+            except OSError:
+                pass
+
+    def _call(self, op: str, payload: Optional[Dict] = None):
+        """Send a request, reconnecting once if the server was restarted."""
+        for attempt in range(2):
+            try:
+                conn = self._connection()
+                conn.send((op, payload or {}))
+                status, result = conn.recv()
+                break
+            except (EOFError, OSError, ConnectionError):
+                self._drop_connection()
+                if attempt == 1:
+                    raise
+        if status == "invalid":
+            raise ImageDecodeError(result)
+        if status != "ok":
+            raise RuntimeError(f"Model server error: {result}")
+        return result
+
+    def ping(self) -> Dict:
+        """Check the server is reachable and whether the real model is loaded."""
+        return self._call("ping")
+
+    def extract_segments(self, image) -> List[OCRSegment]:
+        """
+        Run OCR in the model server.
+
+        Args:
+            image: Encoded image bytes, decoded numpy image, or a file path
+                visible to the server process
+        """
+        return [OCRSegment(*seg) for seg in self._call("extract_segments", {"image": image})]
+
+    def extract_segments_batch(self, images: List) -> List[List[OCRSegment]]:
+        """Run batched multi-image OCR in the model server."""
+        return [[OCRSegment(*seg) for seg in segments]
+                for segments in self._call("extract_segments_batch", {"images": images})]
+
+    def extract_text(self, image) -> List[str]:
+        """Text-only view of extract_segments."""
+        return [seg.text for seg in self.extract_segments(image)]
+
+    def extract_text_batch(self, images: List) -> List[List[str]]:
+        """Text-only view of extract_segments_batch."""
+        return [[seg.text for seg in segments] for segments in self.extract_segments_batch(images)]
+
+    def generate_explanation(self, interaction_data: Dict, prompt: str) -> Dict:
+        """Generate an explanation in the model server."""
+        return self._call("generate_explanation", {
+            "interaction": interaction_data,
+            "prompt": prompt,
+        })
+
+    def translate_batch(self, texts: List[str], target_lang: str) -> str:
+        """Run a batched translation job in the model server."""
+        return self._call("translate_batch", {"texts": texts, "language": target_lang})
+
+    def close(self):
+        self._drop_connection()
+
+
+def main():
+    """Load the models once and serve them to API workers."""
+    from backend.app.config import settings
+    from backend.app.inference import RealMedGemmaInference
+    from backend.app.ocr import preload_ocr
+
+    logging.basicConfig(level=logging.INFO)
+
+    if not settings.MODEL_SERVER_ADDRESS:
+        raise SystemExit("Set PSL_MODEL_SERVER_ADDRESS (socket path or host:port)")
+    if not settings.MODEL_SERVER_AUTHKEY:
+        raise SystemExit("Set PSL_MODEL_SERVER_AUTHKEY to a long random secret shared with the API workers")
+    address = parse_address(settings.MODEL_SERVER_ADDRESS)
+    if not settings.MODEL_SERVER_ALLOW_REMOTE and not is_local_address(address):
+        raise SystemExit(f"{settings.MODEL_SERVER_ADDRESS} is not a loopback address; "
+                         "set PSL_MODEL_SERVER_ALLOW_REMOTE=1 to listen on it anyway")
+
+    print("\n" + "="*70)
+    print("🚀 STARTING PHARMA-SAFE LENS MODEL SERVER")
+    print("="*70)
+
+    preload_ocr()
+
+    inference = RealMedGemmaInference()
+    if inference.load_model(settings.MODEL_NAME):
+        inference.warmup()
+        print("✅ SUCCESS: TxGemma model loaded and warmed up!")
+    else:
+        print("⚠️  WARNING: Failed to load TxGemma, serving MOCK explanations")
+        inference = None
+
+    server = ModelServer(
+        address,
+        settings.MODEL_SERVER_AUTHKEY.encode(),
+        inference=inference,
+        allow_remote=settings.MODEL_SERVER_ALLOW_REMOTE,
+    )
+    server.start()
+    print(f"🔌 Model server listening on {server.address}")
+    print("="*70)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
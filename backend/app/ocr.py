@@ -5,19 +5,78 @@ Uses EasyOCR (primary) and Tesseract (fallback) - CPU-only, no GPU required.
 PHASE 1 - Sub-Phase 1.1
 """
 
-from typing import List, Optional
-import cv2
-import numpy as np
-from PIL import Image
-import pytesseract
+# Annotations stay unevaluated, so np.ndarray in signatures doesn't import numpy
+from __future__ import annotations
+
+from typing import Callable, Dict, List, Optional, Tuple, Union
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import logging
+import threading
+import time
+
+from backend.app.config import settings
+from backend.app.lazy import ensure_loaded, lazy_import
+from backend.app.metrics import metrics
+from backend.app.schemas import OCRSegment
+
+# Heavy imports are deferred to first use (see lazy.py)
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
+Image = lazy_import("PIL.Image")
+pytesseract = lazy_import("pytesseract")
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Anything the OCR functions accept: a file path, encoded image bytes
+# (JPEG/PNG/... straight from an upload), or an already-decoded numpy image
+ImageSource = Union[str, bytes, bytearray, memoryview, "np.ndarray"]
+
+
+class ImageDecodeError(ValueError):
+    """Input is not a decodable image (empty, too large, or not an image format)."""
+
+
+# Preprocessing presets (select with PSL_OCR_PREPROCESS_MODE or mode=...).
+#   quality: original pipeline - full resolution, NL-means denoising
+#   fast:    for 12MP phone photos on CPU - downscale so text is ~target_text_height
+#            pixels tall, optional CLAHE, cheap median denoise
+# NL-means cleans the binarized image (original behaviour); the cheap median /
+# bilateral filters smooth the grayscale before thresholding instead, where
+# they remove sensor noise that would otherwise turn into speckle.
+PREPROCESS_MODES: Dict[str, Dict] = {
+    "quality": {
+        "target_text_height": None,   # px; None = keep resolution
+        "max_side": None,             # px; cap on the long side
+        "clahe": False,
+        "denoise": "nlmeans",         # nlmeans | median | bilateral | none
+        "threshold_c": 2,             # adaptive threshold offset
+    },
+    "fast": {
+        "target_text_height": 32,
+        "max_side": 1600,
+        "clahe": True,
+        "denoise": "median",
+        "threshold_c": 5,
+    },
+}
+
+# Text region box: (x, y, width, height)
+Box = Tuple[int, int, int, int]
+
+# Thread pool for per-region Tesseract calls (lazy; pytesseract runs a
+# subprocess per call, so threads give real parallelism)
+_region_executor: Optional[ThreadPoolExecutor] = None
+# Thread pool running both engines side by side (OCR_STRATEGY=race)
+_race_executor: Optional[ThreadPoolExecutor] = None
+
 # Global EasyOCR reader (lazy loaded)
 _easyocr_reader = None
+# The reader is shared, but not safe for concurrent readtext() calls
+_easyocr_lock = threading.Lock()
+
+# Global ONNX Runtime engine (lazy loaded, PSL_OCR_ENGINE=onnx). Sessions
+# are safe for concurrent run() calls, so no lock is needed.
+_onnx_engine = None
 
 
 def _get_easyocr_reader():
@@ -36,7 +95,8 @@ def _get_easyocr_reader():
             _easyocr_reader = easyocr.Reader(
                 ['en'], 
                 gpu=use_gpu,
-                model_storage_directory='/kaggle/working/easyocr_models',
+                # None -> EasyOCR's default (~/.EasyOCR/model)
+                model_storage_directory=settings.EASYOCR_MODEL_DIR or None,
                 download_enabled=True
             )
             logger.info(f"✅ EasyOCR initialized on {device_str}")
@@ -46,122 +106,830 @@ def _get_easyocr_reader():
     return _easyocr_reader if _easyocr_reader is not False else None
 
 
+def _get_onnx_engine():
+    """Lazy load the ONNX Runtime OCR engine."""
+    global _onnx_engine
+    if _onnx_engine is None:
+        try:
+            from backend.app.ocr_onnx import ONNXOCREngine
+            
+            logger.info(f"Initializing ONNX OCR engine from {settings.OCR_ONNX_MODEL_DIR}...")
+            _onnx_engine = ONNXOCREngine.load(settings.OCR_ONNX_MODEL_DIR,
+                                              threads=settings.OCR_ONNX_THREADS)
+            logger.info("✅ ONNX OCR engine initialized on CPU")
+        except Exception as e:
+            logger.warning(f"Failed to initialize ONNX OCR engine: {e}")
+            _onnx_engine = False  # Mark as failed
+    return _onnx_engine if _onnx_engine is not False else None
+
+
 def preload_ocr():
     """Pre-initialize OCR engines at startup to avoid first-request delay."""
-    import torch
     logger.info("🔤 Pre-loading OCR engines...")
+    ensure_loaded(cv2, np, Image, pytesseract)
+    
+    if settings.OCR_ENGINE == "onnx":
+        # No torch import at all on this path
+        if _get_onnx_engine():
+            logger.info("✅ ONNX OCR engine pre-loaded")
+        else:
+            logger.warning("⚠️ ONNX OCR engine not available, will use Tesseract fallback")
+        return
+    
+    try:
+        import torch
+        use_gpu = torch.cuda.is_available()
+    except ImportError:
+        use_gpu = False
     
-    if torch.cuda.is_available():
+    if use_gpu:
         logger.info(f"   GPU detected: {torch.cuda.get_device_name(0)}")
         logger.info(f"   VRAM: {torch.cuda.get_device_properties(0).total_memory / 1024**3:.1f} GB")
     
     reader = _get_easyocr_reader()
     if reader:
-        logger.info("✅ EasyOCR pre-loaded on GPU" if torch.cuda.is_available() else "✅ EasyOCR pre-loaded on CPU")
+        logger.info("✅ EasyOCR pre-loaded on GPU" if use_gpu else "✅ EasyOCR pre-loaded on CPU")
     else:
         logger.warning("⚠️ EasyOCR not available, will use Tesseract fallback")
 
 
-def preprocess_image(image_path: str) -> np.ndarray:
+def decode_image(data: Union[bytes, bytearray, memoryview, np.ndarray],
+                 max_bytes: Optional[int] = None) -> np.ndarray:
     """
-    Preprocess image for better OCR accuracy.
+    Decode an encoded image (JPEG, PNG, ...) from memory.
     
     Args:
-        image_path: Path to the image file
+        data: Encoded image bytes or a 1-D uint8 buffer
+        max_bytes: Reject inputs larger than this (default settings.MAX_UPLOAD_BYTES, 0 = no cap)
         
     Returns:
-        Preprocessed image as numpy array
+        Decoded BGR image as numpy array
+        
+    Raises:
+        ImageDecodeError: if the data is empty, too large or not a decodable image
     """
-    # Read image
-    img = cv2.imread(image_path)
+    if max_bytes is None:
+        max_bytes = settings.MAX_UPLOAD_BYTES
+    buffer = np.frombuffer(data, dtype=np.uint8) if not isinstance(data, np.ndarray) else data
+    if buffer.size == 0:
+        raise ImageDecodeError("Empty image data")
+    if max_bytes and buffer.size > max_bytes:
+        raise ImageDecodeError(f"Image too large: {buffer.size} bytes (limit {max_bytes})")
+    
+    try:
+        img = cv2.imdecode(buffer, cv2.IMREAD_COLOR)
+    except cv2.error as e:
+        raise ImageDecodeError(f"Failed to decode image data: {e}") from e
     if img is None:
-        raise ValueError(f"Failed to load image: {image_path}")
+        raise ImageDecodeError("Failed to decode image data")
+    return img
+
+
+def load_image(image: ImageSource) -> np.ndarray:
+    """
+    Load an image from any supported source.
+    
+    Args:
+        image: File path, encoded image bytes, or decoded numpy image
+        
+    Returns:
+        Decoded image as numpy array (BGR or grayscale)
+    """
+    if isinstance(image, str):
+        img = cv2.imread(image)
+        if img is None:
+            raise ValueError(f"Failed to load image: {image}")
+        return img
+    
+    if isinstance(image, np.ndarray) and not (image.ndim == 1 and image.dtype == np.uint8):
+        # Already decoded
+        return image
+    
+    return decode_image(image)
+
+
+def estimate_text_height(gray: np.ndarray) -> Optional[float]:
+    """
+    Estimate the typical glyph height (px) of text in a grayscale image.
+    
+    Uses the median height of glyph-shaped connected components on a
+    small Otsu-binarized thumbnail, so it costs a few milliseconds even
+    on 12-megapixel photos.
+    
+    Args:
+        gray: Grayscale image
+        
+    Returns:
+        Estimated text height in pixels of `gray`, or None if no text-like
+        components were found
+    """
+    h, w = gray.shape[:2]
+    scale = min(1.0, 800.0 / max(h, w))
+    small = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA) if scale < 1.0 else gray
+    
+    _, binary = cv2.threshold(small, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    if binary.mean() > 127:
+        # Light text on dark background - glyphs must be the minority class
+        binary = cv2.bitwise_not(binary)
+    
+    _, _, stats, _ = cv2.connectedComponentsWithStats(binary, connectivity=8)
+    heights = stats[1:, cv2.CC_STAT_HEIGHT]
+    widths = stats[1:, cv2.CC_STAT_WIDTH]
+    glyphs = (heights >= 3) & (heights < small.shape[0] * 0.3) & (widths <= heights * 3)
+    if glyphs.sum() < 3:
+        return None
+    
+    return float(np.median(heights[glyphs])) / scale
+
+
+def _resize_for_ocr(gray: np.ndarray, target_text_height: Optional[int],
+                    max_side: Optional[int]) -> np.ndarray:
+    """Downscale (never upscale) so text is about `target_text_height` px tall."""
+    h, w = gray.shape[:2]
+    scale = 1.0
+    
+    if target_text_height:
+        text_height = estimate_text_height(gray)
+        if text_height:
+            scale = min(scale, target_text_height / text_height)
+    if max_side:
+        scale = min(scale, max_side / max(h, w))
+    
+    if scale >= 1.0:
+        return gray
+    return cv2.resize(gray, (max(1, int(w * scale)), max(1, int(h * scale))),
+                      interpolation=cv2.INTER_AREA)
+
+
+def _denoise(img: np.ndarray, method: str) -> np.ndarray:
+    if method == "nlmeans":
+        return cv2.fastNlMeansDenoising(img, None, 10, 7, 21)
+    if method == "median":
+        return cv2.medianBlur(img, 3)
+    if method == "bilateral":
+        return cv2.bilateralFilter(img, 5, 50, 50)
+    if method in ("none", None):
+        return img
+    raise ValueError(f"Unknown denoise method: {method}")
+
+
+def _preprocess_config(mode: Optional[str]) -> Dict:
+    mode = mode or settings.OCR_PREPROCESS_MODE
+    if mode not in PREPROCESS_MODES:
+        raise ValueError(f"Unknown preprocess mode: {mode}")
+    return PREPROCESS_MODES[mode]
+
+
+def _timed(timings: Optional[Dict[str, float]], stage: str, fn, *args):
+    """Run one preprocessing stage, recording its duration (ms)."""
+    start = time.perf_counter()
+    result = fn(*args)
+    elapsed = (time.perf_counter() - start) * 1000
+    if timings is not None:
+        timings[stage] = elapsed
+    metrics.observe(f"ocr.preprocess.{stage}_ms", elapsed)
+    return result
+
+
+def prepare_grayscale(image: ImageSource, mode: Optional[str] = None,
+                      timings: Optional[Dict[str, float]] = None) -> np.ndarray:
+    """
+    First half of preprocessing: decode, grayscale, resize, CLAHE, cheap denoise.
+    
+    The result is what text-region detection runs on; binarize() turns it
+    into the OCR input.
+    
+    Args:
+        image: Path to the image file, encoded image bytes, or decoded image
+        mode: Preset from PREPROCESS_MODES (default: settings.OCR_PREPROCESS_MODE)
+        timings: Optional dict that receives per-stage durations in ms
+        
+    Returns:
+        Grayscale image as numpy array
+    """
+    config = _preprocess_config(mode)
+    
+    # Read / decode image
+    img = _timed(timings, "decode", load_image, image)
     
     # Convert to grayscale
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    gray = _timed(timings, "grayscale",
+                  lambda i: cv2.cvtColor(i, cv2.COLOR_BGR2GRAY) if i.ndim == 3 else i, img)
+    
+    # Downscale large photos to a sensible text height
+    if config["target_text_height"] or config["max_side"]:
+        gray = _timed(timings, "resize", _resize_for_ocr,
+                      gray, config["target_text_height"], config["max_side"])
+    
+    # Local contrast equalisation (glare, uneven lighting on foil)
+    if config["clahe"]:
+        clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+        gray = _timed(timings, "clahe", clahe.apply, gray)
+    
+    if config["denoise"] in ("median", "bilateral"):
+        gray = _timed(timings, "denoise", _denoise, gray, config["denoise"])
+    
+    return gray
+
+
+def binarize(gray: np.ndarray, mode: Optional[str] = None,
+             timings: Optional[Dict[str, float]] = None) -> np.ndarray:
+    """
+    Second half of preprocessing: adaptive threshold (+ NL-means denoise).
+    
+    Args:
+        gray: Output of prepare_grayscale()
+        mode: Preset from PREPROCESS_MODES (default: settings.OCR_PREPROCESS_MODE)
+        timings: Optional dict that receives per-stage durations in ms
+        
+    Returns:
+        Binarized image as numpy array
+    """
+    config = _preprocess_config(mode)
     
     # Apply adaptive thresholding for better contrast
-    processed = cv2.adaptiveThreshold(
-        gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2
-    )
+    processed = _timed(timings, "threshold", cv2.adaptiveThreshold,
+                       gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY,
+                       11, config["threshold_c"])
     
     # Denoise
-    denoised = cv2.fastNlMeansDenoising(processed, None, 10, 7, 21)
+    if config["denoise"] == "nlmeans":
+        processed = _timed(timings, "denoise", _denoise, processed, "nlmeans")
     
-    return denoised
+    return processed
 
 
-def extract_text_easyocr(image_path: str) -> Optional[List[str]]:
+def preprocess_image(image: ImageSource, mode: Optional[str] = None,
+                     timings: Optional[Dict[str, float]] = None) -> np.ndarray:
     """
-    Extract text using EasyOCR.
+    Preprocess image for better OCR accuracy.
     
     Args:
-        image_path: Path to the image file
+        image: Path to the image file, encoded image bytes, or decoded image
+        mode: Preset from PREPROCESS_MODES (default: settings.OCR_PREPROCESS_MODE)
+        timings: Optional dict that receives per-stage durations in ms
         
     Returns:
-        List of detected text strings, or None if EasyOCR fails
+        Preprocessed image as numpy array
+    """
+    return binarize(prepare_grayscale(image, mode, timings), mode, timings)
+
+
+def detect_text_regions(image: np.ndarray, min_height: int = 8, pad: int = 4) -> List[Box]:
+    """
+    Find label text regions so recognition can skip background, foil glare and hands.
+    
+    Runs on the grayscale image (see prepare_grayscale), where glyph edges
+    stand well above background noise. Morphology-based: a morphological
+    gradient highlights glyph edges, a
+    horizontal closing (sized from the estimated text height) joins
+    characters into words/lines, and the resulting contours are filtered
+    by size and edge density.
+    
+    Args:
+        image: Grayscale or BGR image
+        min_height: Smallest region height kept, in px
+        pad: Margin added around each region, in px
+        
+    Returns:
+        Boxes (x, y, w, h) sorted in reading order (top-to-bottom, left-to-right)
+    """
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    img_h, img_w = gray.shape[:2]
+    
+    gradient = cv2.morphologyEx(gray, cv2.MORPH_GRADIENT,
+                                cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3)))
+    _, edges = cv2.threshold(gradient, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    
+    text_height = estimate_text_height(gray) or max(min_height, img_h / 40)
+    close_kernel = cv2.getStructuringElement(
+        cv2.MORPH_RECT, (max(3, int(text_height * 0.8)), max(1, int(text_height * 0.2)))
+    )
+    connected = cv2.morphologyEx(edges, cv2.MORPH_CLOSE, close_kernel)
+    contours, _ = cv2.findContours(connected, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    
+    boxes = []
+    for contour in contours:
+        x, y, w, h = cv2.boundingRect(contour)
+        if h < min_height or h > img_h * 0.5 or w < h * 0.5:
+            continue
+        # Text has dense edges; glare and smooth gradients do not
+        if cv2.countNonZero(edges[y:y + h, x:x + w]) < 0.1 * w * h:
+            continue
+        x0, y0 = max(0, x - pad), max(0, y - pad)
+        x1, y1 = min(img_w, x + w + pad), min(img_h, y + h + pad)
+        boxes.append((x0, y0, x1 - x0, y1 - y0))
+    
+    # Reading order: rows bucketed by text height, then left to right
+    row = max(1, int(text_height))
+    boxes.sort(key=lambda b: (b[1] // row, b[0]))
+    return boxes
+
+
+def _text_regions(gray: np.ndarray) -> Optional[List[Box]]:
+    """
+    Regions to recognise, or None to recognise the whole frame.
+    
+    Falls back to the full frame when nothing is detected or when the
+    regions cover most of the image anyway.
+    """
+    boxes = detect_text_regions(gray)
+    total = gray.shape[0] * gray.shape[1]
+    covered = sum(w * h for (_, _, w, h) in boxes)
+    if not boxes or covered > 0.8 * total:
+        return None
+    metrics.observe("ocr.regions.count", len(boxes))
+    metrics.observe("ocr.regions.pixel_fraction", covered / total)
+    return boxes
+
+
+def _get_region_executor() -> ThreadPoolExecutor:
+    global _region_executor
+    if _region_executor is None:
+        _region_executor = ThreadPoolExecutor(
+            max_workers=settings.OCR_REGION_WORKERS, thread_name_prefix="ocr-region"
+        )
+    return _region_executor
+
+
+def _quad_to_box(points) -> Box:
+    """EasyOCR 4-point polygon -> axis-aligned (x, y, w, h)."""
+    xs = [int(p[0]) for p in points]
+    ys = [int(p[1]) for p in points]
+    return (min(xs), min(ys), max(xs) - min(xs), max(ys) - min(ys))
+
+
+def _segments_easyocr(processed_img: np.ndarray,
+                      regions: Optional[List[Box]] = None) -> Optional[List[OCRSegment]]:
+    """
+    Run EasyOCR on an already preprocessed image (optionally only on `regions`).
+    
+    Returns:
+        Segments with EasyOCR's confidence and box, or None if EasyOCR fails
     """
     reader = _get_easyocr_reader()
     if reader is None:
         return None
     
     try:
-        # Preprocess image
-        processed_img = preprocess_image(image_path)
-        
         # Run EasyOCR
-        results = reader.readtext(processed_img)
+        with _easyocr_lock:
+            if regions:
+                # Skip the CRAFT detector and recognise all crops in one batch
+                results = reader.recognize(
+                    processed_img,
+                    horizontal_list=[[x, x + w, y, y + h] for (x, y, w, h) in regions],
+                    free_list=[],
+                    batch_size=len(regions),
+                )
+            else:
+                results = reader.readtext(processed_img)
         
-        # Extract text from results (format: [(bbox, text, confidence), ...])
-        texts = [text.strip() for (bbox, text, conf) in results if text.strip()]
+        # Results format: [(bbox, text, confidence), ...]
+        segments = [
+            OCRSegment(text.strip(), float(conf), _quad_to_box(bbox))
+            for (bbox, text, conf) in results if text.strip()
+        ]
         
-        logger.info(f"EasyOCR extracted {len(texts)} text segments")
-        return texts
+        logger.info(f"EasyOCR extracted {len(segments)} text segments")
+        return segments
     
     except Exception as e:
         logger.error(f"EasyOCR failed: {e}")
         return None
 
 
-def extract_text_tesseract(image_path: str) -> List[str]:
+def _segments_onnx(processed_img: np.ndarray,
+                   regions: Optional[List[Box]] = None) -> Optional[List[OCRSegment]]:
     """
-    Extract text using Tesseract OCR (fallback).
+    Run the ONNX Runtime engine on an already preprocessed image.
     
-    Args:
-        image_path: Path to the image file
-        
     Returns:
-        List of detected text strings
+        Segments with recognizer confidence and box, or None if the engine fails
     """
+    engine = _get_onnx_engine()
+    if engine is None:
+        return None
+    
     try:
-        # Preprocess image
-        processed_img = preprocess_image(image_path)
-        
-        # Convert to PIL Image for Tesseract
-        pil_img = Image.fromarray(processed_img)
+        segments = engine.readtext(processed_img, regions)
+        logger.info(f"ONNX OCR extracted {len(segments)} text segments")
+        return segments
+    
+    except Exception as e:
+        logger.error(f"ONNX OCR failed: {e}")
+        return None
+
+
+def _segments_primary(processed_img: np.ndarray,
+                      regions: Optional[List[Box]] = None) -> Optional[List[OCRSegment]]:
+    """Run the configured primary engine (PSL_OCR_ENGINE); None if it fails."""
+    if settings.OCR_ENGINE == "onnx":
+        return _segments_onnx(processed_img, regions)
+    return _segments_easyocr(processed_img, regions)
+
+
+def _readtext_easyocr(processed_img: np.ndarray,
+                      regions: Optional[List[Box]] = None) -> Optional[List[str]]:
+    """Run EasyOCR on an already preprocessed image (optionally only on `regions`)."""
+    segments = _segments_easyocr(processed_img, regions)
+    return None if segments is None else [seg.text for seg in segments]
+
+
+def _tesseract_lines(img: np.ndarray, origin: Tuple[int, int] = (0, 0),
+                     cancel: Optional[threading.Event] = None) -> List[OCRSegment]:
+    """
+    Run Tesseract on one image and group its words into line segments.
+    
+    Confidence is the mean word confidence of the line (Tesseract reports 0-100).
+    """
+    if cancel is not None and cancel.is_set():
+        return []
+    
+    data = pytesseract.image_to_data(Image.fromarray(img), output_type=pytesseract.Output.DICT)
+    lines: Dict[Tuple[int, int, int], List[int]] = {}
+    for i, word in enumerate(data["text"]):
+        if word.strip():
+            key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+            lines.setdefault(key, []).append(i)
+    
+    segments = []
+    ox, oy = origin
+    for key in sorted(lines):
+        idx = lines[key]
+        confs = [float(data["conf"][i]) for i in idx if float(data["conf"][i]) >= 0]
+        x0 = min(data["left"][i] for i in idx)
+        y0 = min(data["top"][i] for i in idx)
+        x1 = max(data["left"][i] + data["width"][i] for i in idx)
+        y1 = max(data["top"][i] + data["height"][i] for i in idx)
+        segments.append(OCRSegment(
+            " ".join(data["text"][i].strip() for i in idx),
+            (sum(confs) / len(confs) / 100.0) if confs else 0.0,
+            (x0 + ox, y0 + oy, x1 - x0, y1 - y0),
+        ))
+    return segments
+
+
+def _segments_tesseract(processed_img: np.ndarray,
+                        regions: Optional[List[Box]] = None,
+                        cancel: Optional[threading.Event] = None) -> List[OCRSegment]:
+    """
+    Run Tesseract on an already preprocessed image (optionally only on `regions`).
+    
+    Args:
+        processed_img: Preprocessed image
+        regions: Optional text regions to recognise instead of the full frame
+        cancel: When set, crops that have not started yet are skipped
+    """
+    try:
+        if regions:
+            # Recognise label crops in parallel, keep reading order
+            crops = [processed_img[y:y + h, x:x + w] for (x, y, w, h) in regions]
+            origins = [(x, y) for (x, y, _, _) in regions]
+            per_crop = _get_region_executor().map(
+                lambda crop, origin: _tesseract_lines(crop, origin, cancel), crops, origins
+            )
+            segments = [seg for segs in per_crop for seg in segs]
+        else:
+            segments = _tesseract_lines(processed_img, cancel=cancel)
         
-        # Run Tesseract
-        text = pytesseract.image_to_string(pil_img)
+        logger.info(f"Tesseract extracted {len(segments)} text segments")
+        return segments
+    
+    except Exception as e:
+        logger.error(f"Tesseract failed: {e}")
+        return []
+
+
+def _readtext_tesseract(processed_img: np.ndarray,
+                        regions: Optional[List[Box]] = None) -> List[str]:
+    """Run Tesseract on an already preprocessed image (optionally only on `regions`)."""
+    return [seg.text for seg in _segments_tesseract(processed_img, regions)]
+
+
+def _has_known_drug(segments: List[OCRSegment]) -> bool:
+    """Default race acceptance test: the segments name at least one known drug."""
+    from backend.app.dependencies import get_drug_db
+    return bool(get_drug_db().normalize([seg.text for seg in segments]))
+
+
+def _get_race_executor() -> ThreadPoolExecutor:
+    global _race_executor
+    if _race_executor is None:
+        _race_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="ocr-race")
+    return _race_executor
+
+
+def _race_engines(processed_img: np.ndarray,
+                  regions: Optional[List[Box]] = None,
+                  accept: Optional[Callable[[List[OCRSegment]], bool]] = None,
+                  min_confidence: Optional[float] = None,
+                  tiled: bool = False) -> List[OCRSegment]:
+    """
+    Run EasyOCR and Tesseract concurrently and take the first acceptable result.
+    
+    A result is acceptable when its segments at or above `min_confidence`
+    pass `accept` (default: they contain a known drug name). The other engine
+    is then cancelled: pending work is dropped and Tesseract skips crops and
+    tiles it has not started; a call already inside an engine finishes in
+    the background and its result is discarded. If neither result is
+    acceptable, the primary engine's is preferred.
+    
+    With `tiled`, each engine reads the image tile by tile (see
+    _segments_tiled), so large photos keep bounded engine memory when racing.
+    """
+    accept = accept or _has_known_drug
+    min_confidence = settings.OCR_RACE_MIN_CONFIDENCE if min_confidence is None else min_confidence
+    cancel = threading.Event()
+    executor = _get_race_executor()
+    
+    if tiled:
+        futures = {
+            executor.submit(_segments_tiled, processed_img, recognize=_segments_primary): settings.OCR_ENGINE,
+            executor.submit(_segments_tiled, processed_img,
+                            recognize=lambda tile: _segments_tesseract(tile, cancel=cancel)): "tesseract",
+        }
+    else:
+        futures = {
+            executor.submit(_segments_primary, processed_img, regions): settings.OCR_ENGINE,
+            executor.submit(_segments_tesseract, processed_img, regions, cancel): "tesseract",
+        }
+    
+    fallback: Dict[str, List[OCRSegment]] = {}
+    for future in as_completed(futures):
+        engine = futures[future]
+        segments = future.result()
+        if segments is None:
+            continue
+        confident = [seg for seg in segments if seg.confidence >= min_confidence]
+        if confident and accept(confident):
+            cancel.set()
+            for other in futures:
+                other.cancel()
+            metrics.incr(f"ocr.race.winner.{engine}")
+            logger.info(f"OCR race won by {engine} ({len(segments)} segments)")
+            return segments
+        fallback[engine] = segments
+    
+    metrics.incr("ocr.race.no_accept")
+    return fallback.get(settings.OCR_ENGINE) or fallback.get("tesseract") or []
+
+
+def tile_boxes(height: int, width: int, tile_size: int, overlap: int) -> List[Box]:
+    """
+    Cover an image with overlapping square-ish tiles.
+    
+    Tiles are at most `tile_size` px per side and neighbours share `overlap`
+    px, so any text line shorter than the overlap lies whole in some tile.
+    The last row / column is shifted back to end at the image border
+    instead of producing a thin sliver.
+    
+    Returns:
+        Tiles (x, y, w, h) in row-major order
+    """
+    step = max(1, tile_size - overlap)
+    
+    def starts(length: int) -> List[int]:
+        if length <= tile_size:
+            return [0]
+        positions = list(range(0, length - tile_size, step))
+        positions.append(length - tile_size)
+        return positions
+    
+    return [(x, y, min(tile_size, width - x), min(tile_size, height - y))
+            for y in starts(height) for x in starts(width)]
+
+
+def box_iou(a: Box, b: Box) -> Tuple[float, float]:
+    """
+    Overlap of two (x, y, w, h) boxes.
+    
+    Returns:
+        (intersection over union, intersection over the smaller box)
+    """
+    ix = max(0, min(a[0] + a[2], b[0] + b[2]) - max(a[0], b[0]))
+    iy = max(0, min(a[1] + a[3], b[1] + b[3]) - max(a[1], b[1]))
+    inter = ix * iy
+    if inter == 0:
+        return 0.0, 0.0
+    area_a, area_b = a[2] * a[3], b[2] * b[3]
+    return inter / float(area_a + area_b - inter), inter / float(min(area_a, area_b))
+
+
+def dedupe_segments(segments: List[OCRSegment], iou_threshold: float = 0.5,
+                    containment_threshold: float = 0.8) -> List[OCRSegment]:
+    """
+    Merge text read twice in overlapping tiles.
+    
+    Larger boxes are kept first, so a word cut at a tile edge (a fragment
+    inside the full word's box) is dropped in favour of the complete read;
+    between near-identical boxes (IoU >= 0.8) the more confident read wins.
+    
+    Args:
+        segments: Segments in full-image coordinates
+        iou_threshold: Boxes overlapping at least this much (IoU) are duplicates
+        containment_threshold: A box this much inside a kept box is a fragment
         
-        # Split into lines and filter empty
-        texts = [line.strip() for line in text.split('\n') if line.strip()]
+    Returns:
+        Deduplicated segments in reading order
+    """
+    boxed = [seg for seg in segments if seg.bbox is not None]
+    boxed.sort(key=lambda seg: (-seg.bbox[2] * seg.bbox[3], -seg.confidence))
+    
+    kept: List[OCRSegment] = []
+    for seg in boxed:
+        duplicate = False
+        for i, other in enumerate(kept):
+            iou, contained = box_iou(seg.bbox, other.bbox)
+            if iou >= iou_threshold or contained >= containment_threshold:
+                # Same box read twice: keep the more confident read
+                if iou >= 0.8 and seg.confidence > other.confidence:
+                    kept[i] = seg
+                duplicate = True
+                break
+        if not duplicate:
+            kept.append(seg)
+    
+    kept.sort(key=lambda seg: (seg.bbox[1], seg.bbox[0]))
+    return kept + [seg for seg in segments if seg.bbox is None]
+
+
+def _segments_primary_or_tesseract(tile: np.ndarray) -> List[OCRSegment]:
+    """Primary engine, Tesseract on failure."""
+    segments = _segments_primary(tile)
+    return _segments_tesseract(tile) if segments is None else segments
+
+
+def _segments_tile(tile: np.ndarray, origin: Tuple[int, int],
+                   recognize: Callable[[np.ndarray], Optional[List[OCRSegment]]]) -> List[OCRSegment]:
+    """OCR one tile with `recognize`, boxes moved to image coordinates (no result = no segments)."""
+    segments = recognize(tile) or []
+    ox, oy = origin
+    return [
+        OCRSegment(seg.text, seg.confidence,
+                   (seg.bbox[0] + ox, seg.bbox[1] + oy, seg.bbox[2], seg.bbox[3]) if seg.bbox else None)
+        for seg in segments
+    ]
+
+
+def _segments_tiled(processed_img: np.ndarray, tile_size: Optional[int] = None,
+                    overlap: Optional[int] = None,
+                    recognize: Optional[Callable[[np.ndarray], Optional[List[OCRSegment]]]] = None
+                    ) -> List[OCRSegment]:
+    """
+    OCR a large image tile by tile.
+    
+    Detector and recognizer memory scale with the tile, not the photo, so
+    peak engine memory is bounded for any upload resolution. Tiles are
+    recognised concurrently (EasyOCR serialises on its lock; ONNX Runtime
+    and Tesseract tiles run in parallel) and merged with dedupe_segments().
+    
+    Args:
+        processed_img: Preprocessed image
+        tile_size: Largest tile side (default PSL_OCR_TILE_SIZE)
+        overlap: Overlap between neighbouring tiles (default PSL_OCR_TILE_OVERLAP)
+        recognize: OCR for one tile (default: primary engine, Tesseract on failure)
+    """
+    tile_size = tile_size or settings.OCR_TILE_SIZE
+    overlap = settings.OCR_TILE_OVERLAP if overlap is None else overlap
+    recognize = recognize or _segments_primary_or_tesseract
+    height, width = processed_img.shape[:2]
+    tiles = tile_boxes(height, width, tile_size, overlap)
+    
+    per_tile = _get_region_executor().map(
+        lambda t: _segments_tile(processed_img[t[1]:t[1] + t[3], t[0]:t[0] + t[2]], (t[0], t[1]), recognize),
+        tiles
+    )
+    raw = [seg for segs in per_tile for seg in segs]
+    segments = dedupe_segments(raw)
+    
+    metrics.observe("ocr.tiles.count", len(tiles))
+    logger.info(f"Tiled OCR: {len(tiles)} tiles, {len(raw)} raw -> {len(segments)} segments")
+    return segments
+
+
+def _use_tiles(processed_img: np.ndarray) -> bool:
+    return (settings.OCR_TILE_SIZE > 0
+            and max(processed_img.shape[:2]) > settings.OCR_TILE_SIZE + settings.OCR_TILE_OVERLAP)
+
+
+def extract_text_easyocr(image: ImageSource) -> Optional[List[str]]:
+    """
+    Extract text using EasyOCR.
+    
+    Args:
+        image: Path to the image file, encoded image bytes, or decoded image
         
-        logger.info(f"Tesseract extracted {len(texts)} text segments")
-        return texts
+    Returns:
+        List of detected text strings, or None if EasyOCR fails
+    """
+    if _get_easyocr_reader() is None:
+        return None
+    
+    try:
+        processed_img = preprocess_image(image)
+    except Exception as e:
+        logger.error(f"EasyOCR failed: {e}")
+        return None
+    
+    return _readtext_easyocr(processed_img)
+
+
+def extract_text_tesseract(image: ImageSource) -> List[str]:
+    """
+    Extract text using Tesseract OCR (fallback).
     
+    Args:
+        image: Path to the image file, encoded image bytes, or decoded image
+        
+    Returns:
+        List of detected text strings
+    """
+    try:
+        processed_img = preprocess_image(image)
     except Exception as e:
         logger.error(f"Tesseract failed: {e}")
         return []
+    
+    return _readtext_tesseract(processed_img)
+
+
+def extract_segments(image: ImageSource, preprocess_mode: Optional[str] = None) -> List[OCRSegment]:
+    """
+    Extract text segments, with engine confidence and box, from a pill strip image.
+    
+    Tries the primary engine (EasyOCR, or its ONNX Runtime port with
+    PSL_OCR_ENGINE=onnx) first, falls back to Tesseract if needed (or, with
+    PSL_OCR_STRATEGY=race, runs both and keeps the first confident result).
+    The image is decoded and preprocessed once, in memory.
+    
+    Args:
+        image: Path to the image file, encoded image bytes (e.g. an upload
+            body), or a decoded numpy image
+        preprocess_mode: Preprocessing preset (see PREPROCESS_MODES)
+        
+    Returns:
+        List of OCRSegment(text, confidence, bbox); boxes are in the
+        coordinates of the preprocessed image
+
+    Raises:
+        ImageDecodeError: if encoded image data is empty, too large or undecodable
+    """
+    if isinstance(image, str):
+        logger.info(f"Extracting text from: {image}")
+    else:
+        logger.info("Extracting text from in-memory image")
+    
+    try:
+        gray = prepare_grayscale(image, mode=preprocess_mode)
+        processed_img = binarize(gray, mode=preprocess_mode)
+    except ImageDecodeError:
+        raise
+    except ValueError as e:
+        logger.error(f"Preprocessing failed: {e}")
+        return []
+    
+    segments = _segments_for(gray, processed_img)
+    logger.info(f"Total extracted text segments: {len(segments)}")
+    return segments
+
+
+def _segments_for(gray: np.ndarray, processed_img: np.ndarray) -> List[OCRSegment]:
+    """
+    Recognise one preprocessed image with the configured strategy
+    (text regions, race, tiling, primary engine with Tesseract fallback).
+    """
+    # Optionally restrict recognition to detected label regions
+    regions = _text_regions(gray) if settings.OCR_TEXT_REGIONS else None
+    
+    if settings.OCR_STRATEGY == "race":
+        # Both engines in parallel, first confident result with a known drug wins
+        # (large photos are tiled inside each engine's run)
+        return _race_engines(processed_img, regions, tiled=regions is None and _use_tiles(processed_img))
+    if regions is None and _use_tiles(processed_img):
+        # Very large / panoramic photo: overlapping tiles, merged by box IoU
+        return _segments_tiled(processed_img)
+    
+    # Try the primary engine (EasyOCR or its ONNX port) first
+    segments = _segments_primary(processed_img, regions)
+    
+    # Fallback to Tesseract if it fails
+    if segments is None:
+        logger.info("Falling back to Tesseract OCR")
+        segments = _segments_tesseract(processed_img, regions)
+    return segments
 
 
-def extract_text(image_path: str) -> List[str]:
+def extract_text(image: ImageSource, preprocess_mode: Optional[str] = None) -> List[str]:
     """
     Extract raw text from a pill strip image.
     
-    Tries EasyOCR first, falls back to Tesseract if needed.
+    Text-only view of extract_segments().
     
     Args:
-        image_path: Path to the image file
+        image: Path to the image file, encoded image bytes (e.g. an upload
+            body), or a decoded numpy image
+        preprocess_mode: Preprocessing preset (see PREPROCESS_MODES)
         
     Returns:
         List of detected text strings (unprocessed)
@@ -176,15 +944,124 @@ def extract_text(image_path: str) -> List[str]:
         >>> print(texts)
         ['ASPIRIN 100MG', 'MFG: 2024', 'EXP: 2026']
     """
-    logger.info(f"Extracting text from: {image_path}")
+    return [seg.text for seg in extract_segments(image, preprocess_mode)]
+
+
+def _segments_easyocr_batch(processed_imgs: List[np.ndarray]) -> Optional[List[List[OCRSegment]]]:
+    """Run EasyOCR detection + recognition over several preprocessed images in batches."""
+    reader = _get_easyocr_reader()
+    if reader is None:
+        return None
     
-    # Try EasyOCR first
-    texts = extract_text_easyocr(image_path)
+    try:
+        # readtext_batched needs equal sizes: pad with background (white)
+        # instead of resizing, so text scale and box coordinates are preserved
+        max_h = max(img.shape[0] for img in processed_imgs)
+        max_w = max(img.shape[1] for img in processed_imgs)
+        padded = [
+            cv2.copyMakeBorder(img, 0, max_h - img.shape[0], 0, max_w - img.shape[1],
+                               cv2.BORDER_CONSTANT, value=255)
+            for img in processed_imgs
+        ]
+        
+        with _easyocr_lock:
+            batch_results = reader.readtext_batched(padded, batch_size=len(padded))
+        
+        segments = [
+            [OCRSegment(text.strip(), float(conf), _quad_to_box(bbox))
+             for (bbox, text, conf) in results if text.strip()]
+            for results in batch_results
+        ]
+        logger.info(f"EasyOCR batch extracted {sum(len(s) for s in segments)} text segments "
+                    f"from {len(segments)} images")
+        return segments
     
-    # Fallback to Tesseract if EasyOCR fails
-    if texts is None:
-        logger.info("Falling back to Tesseract OCR")
-        texts = extract_text_tesseract(image_path)
+    except Exception as e:
+        logger.error(f"EasyOCR batch failed: {e}")
+        return None
+
+
+def extract_segments_batch(images: List[ImageSource],
+                           preprocess_mode: Optional[str] = None) -> List[List[OCRSegment]]:
+    """
+    Extract text segments from several images in one call.
+    
+    All images are decoded and preprocessed first, then recognised together
+    through EasyOCR's batch interface, so model overhead is paid once
+    (front and back of a strip, a whole pill organiser, ...). Each image
+    gets the same segments as from extract_segments(): with text regions
+    or the race strategy, and for photos large enough to tile, images are
+    recognised one by one with that strategy instead.
+    
+    Args:
+        images: Image sources (paths, encoded bytes, or numpy images)
+        preprocess_mode: Preprocessing preset (see PREPROCESS_MODES)
+        
+    Returns:
+        One list of OCRSegments per input image, in input order
+        (empty for images that fail to decode)
+    """
+    logger.info(f"Extracting text from {len(images)} images (batch)")
+    
+    grays: List[Optional[np.ndarray]] = []
+    processed: List[Optional[np.ndarray]] = []
+    for image in images:
+        try:
+            gray = prepare_grayscale(image, mode=preprocess_mode)
+            grays.append(gray)
+            processed.append(binarize(gray, mode=preprocess_mode))
+        except ValueError as e:
+            logger.error(f"Preprocessing failed: {e}")
+            grays.append(None)
+            processed.append(None)
+    
+    valid = [i for i, img in enumerate(processed) if img is not None]
+    results: List[List[OCRSegment]] = [[] for _ in images]
+    if not valid:
+        return results
+    
+    if settings.OCR_TEXT_REGIONS or settings.OCR_STRATEGY == "race":
+        # Region crops and races are per image; nothing to batch
+        for i in valid:
+            results[i] = _segments_for(grays[i], processed[i])
+        return results
+    
+    # Oversized photos would set the padded batch size; tile them on their own
+    tiled = [i for i in valid if _use_tiles(processed[i])]
+    for i in tiled:
+        results[i] = _segments_for(grays[i], processed[i])
+    valid = [i for i in valid if i not in tiled]
+    if not valid:
+        return results
+    
+    if settings.OCR_ENGINE == "onnx":
+        batch = [_segments_onnx(processed[i]) for i in valid]
+        if any(segments is None for segments in batch):
+            batch = None
+    else:
+        batch = _segments_easyocr_batch([processed[i] for i in valid])
+    if batch is None:
+        logger.info("Falling back to Tesseract OCR (batch)")
+        batch = list(_get_region_executor().map(_segments_tesseract, [processed[i] for i in valid]))
     
-    logger.info(f"Total extracted text segments: {len(texts)}")
-    return texts
+    for i, segments in zip(valid, batch):
+        results[i] = segments
+    return results
+
+
+def extract_text_batch(images: List[ImageSource],
+                       preprocess_mode: Optional[str] = None) -> List[List[str]]:
+    """
+    Extract raw text from several images in one call.
+    
+    Text-only view of extract_segments_batch().
+    
+    Args:
+        images: Image sources (paths, encoded bytes, or numpy images)
+        preprocess_mode: Preprocessing preset (see PREPROCESS_MODES)
+        
+    Returns:
+        One list of detected text strings per input image, in input order
+    """
+    return [[seg.text for seg in segments]
+            for segments in extract_segments_batch(images, preprocess_mode)]
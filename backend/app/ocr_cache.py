@@ -0,0 +1,390 @@
+"""
+Perceptual OCR Cache - reuse OCR results for near-duplicate photos.
+
+The same product gets photographed by many users and re-shot by the same
+user, so byte-identical coalescing (coalesce.py) misses most repeats. This
+cache keys OCR results by a 64-bit difference hash (dHash) of the decoded,
+normalised image and looks them up by Hamming distance, so a re-compressed,
+slightly resized or re-exposed copy of a known image skips OCR entirely.
+
+A 64-bit hash of a 9x8 thumbnail cannot see label text: two strips with
+the same layout but different drug names differ by only a bit or two. So
+every entry also keeps a text signature (the dark strokes of a 160x120
+thumbnail) and a near match is only reused when the signatures correlate
+above `min_text_similarity`; otherwise the upload is OCR'd. The check
+tells different words apart, not a single changed character, so the cache
+is off unless PSL_OCR_CACHE_SIZE is set.
+
+Lookup uses multi-index hashing: the hash is split into BANDS bands, and by
+the pigeonhole principle any hash within `max_distance < BANDS` bits of a
+stored one shares at least one band exactly. Only entries sharing a band
+are compared. The in-memory tier is an LRU; the optional disk tier is a
+sqlite file (indexed band columns, same lookup), shared by all processes.
+
+Metrics: `ocr_cache.hits`, `ocr_cache.disk_hits`, `ocr_cache.misses`,
+`ocr_cache.text_mismatches` (hash matched, text did not), `ocr_cache.saved_ms`
+(timing) and the `ocr_cache.hit_rate` gauge.
+"""
+
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from collections import OrderedDict
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+from backend.app.lazy import lazy_import
+from backend.app.metrics import metrics
+from backend.app.schemas import OCRSegment
+
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
+
+logger = logging.getLogger(__name__)
+
+HASH_BITS = 64
+BANDS = 8
+BAND_BITS = HASH_BITS // BANDS
+_BAND_MASK = (1 << BAND_BITS) - 1
+
+# Text signature: thumbnail size, stroke kernel and the blackhat response
+# below which a pixel counts as background texture rather than print
+SIGNATURE_SIZE = (160, 120)
+_STROKE_KERNEL = 7
+_STROKE_FLOOR = 60
+
+
+def _gray(image, reduce_flag: int):
+    """Grayscale numpy image from bytes (decoded at reduced scale) or an array; None if undecodable."""
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        if not len(image):
+            return None
+        try:
+            return cv2.imdecode(np.frombuffer(image, dtype=np.uint8), reduce_flag)
+        except cv2.error:
+            return None
+    if image.ndim == 3:
+        return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    return image
+
+
+def dhash(image, hash_size: int = 8) -> Optional[int]:
+    """
+    Compute the 64-bit difference hash of an image.
+
+    The image is reduced to grayscale, equalised (so exposure changes do not
+    flip bits) and shrunk to (hash_size + 1) x hash_size; each bit records
+    whether a pixel is brighter than its right-hand neighbour.
+
+    Args:
+        image: Encoded image bytes or a decoded numpy image
+        hash_size: Hash side length (8 -> 64 bits)
+
+    Returns:
+        Hash as an int, or None if the bytes cannot be decoded
+    """
+    # 1/8-scale decode: the hash only needs a 9x8 thumbnail
+    gray = _gray(image, cv2.IMREAD_REDUCED_GRAYSCALE_8)
+    if gray is None:
+        return None
+
+    gray = cv2.equalizeHist(gray)
+    small = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+
+    value = 0
+    for bit in bits:
+        value = (value << 1) | int(bit)
+    return value
+
+
+def text_signature(image) -> Optional[bytes]:
+    """
+    Compute the text signature of an image.
+
+    Printed text is thin and darker than its surroundings, so a blackhat
+    filter of the equalised thumbnail keeps the strokes and drops smooth
+    background and lighting; weak responses (paper texture) are floored.
+
+    Args:
+        image: Encoded image bytes or a decoded numpy image
+
+    Returns:
+        SIGNATURE_SIZE uint8 stroke map as bytes, or None if the bytes cannot be decoded
+    """
+    # Full decode: reduced JPEG decodes blur strokes unevenly across sizes
+    gray = _gray(image, cv2.IMREAD_GRAYSCALE)
+    if gray is None:
+        return None
+
+    small = cv2.equalizeHist(cv2.resize(gray, SIGNATURE_SIZE, interpolation=cv2.INTER_AREA))
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (_STROKE_KERNEL, _STROKE_KERNEL))
+    strokes = cv2.morphologyEx(small, cv2.MORPH_BLACKHAT, kernel)
+    return cv2.subtract(strokes, _STROKE_FLOOR).tobytes()
+
+
+def text_similarity(a: bytes, b: bytes) -> float:
+    """Normalised cross-correlation of two text signatures (1.0 = same strokes)."""
+    x = np.frombuffer(a, dtype=np.uint8).astype(np.float32)
+    y = np.frombuffer(b, dtype=np.uint8).astype(np.float32)
+    if x.shape != y.shape:
+        return 0.0
+    x -= x.mean()
+    y -= y.mean()
+    norm = float(np.sqrt((x * x).sum() * (y * y).sum()))
+    if norm == 0.0:
+        # Neither image has print (or exactly one has none)
+        return 1.0 if not x.any() and not y.any() else 0.0
+    return float((x * y).sum()) / norm
+
+
+def hamming(a: int, b: int) -> int:
+    """Number of differing bits between two hashes."""
+    return bin(a ^ b).count("1")
+
+
+def _bands(value: int) -> List[int]:
+    return [(value >> (i * BAND_BITS)) & _BAND_MASK for i in range(BANDS)]
+
+
+class _DiskTier:
+    """sqlite store of hash -> segments, looked up by exact band match."""
+
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        band_cols = ", ".join(f"b{i} INTEGER" for i in range(BANDS))
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS ocr_cache ("
+                f"hash TEXT PRIMARY KEY, {band_cols}, "
+                f"segments TEXT NOT NULL, cost_ms REAL NOT NULL, created REAL NOT NULL, "
+                f"signature BLOB)"
+            )
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(ocr_cache)")}
+            if "signature" not in columns:
+                # Files written before text signatures: old rows never verify
+                self._conn.execute("ALTER TABLE ocr_cache ADD COLUMN signature BLOB")
+            for i in range(BANDS):
+                self._conn.execute(f"CREATE INDEX IF NOT EXISTS ocr_cache_b{i} ON ocr_cache (b{i})")
+
+    def lookup(self, value: int, max_distance: int,
+               accept: Callable[[Optional[bytes]], bool]) -> Optional[Tuple[int, List[OCRSegment], float, Optional[bytes]]]:
+        where = " OR ".join(f"b{i} = ?" for i in range(BANDS))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT hash, segments, cost_ms, signature FROM ocr_cache WHERE {where}", _bands(value)
+            ).fetchall()
+
+        best = None
+        for hex_hash, segments_json, cost_ms, signature in rows:
+            stored = int(hex_hash, 16)
+            distance = hamming(value, stored)
+            if distance <= max_distance and (best is None or distance < best[0]) and accept(signature):
+                best = (distance, stored, segments_json, cost_ms, signature)
+        if best is None:
+            return None
+
+        _, stored, segments_json, cost_ms, signature = best
+        segments = [
+            OCRSegment(text, conf, tuple(bbox) if bbox is not None else None)
+            for text, conf, bbox in json.loads(segments_json)
+        ]
+        return stored, segments, cost_ms, signature
+
+    def store(self, value: int, segments: List[OCRSegment], cost_ms: float, signature: Optional[bytes]):
+        placeholders = ", ".join("?" for _ in range(BANDS + 5))
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO ocr_cache VALUES ({placeholders})",
+                [f"{value:016x}", *_bands(value),
+                 json.dumps([list(seg) for seg in segments]), cost_ms, time.time(), signature]
+            )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class PerceptualOCRCache:
+    """
+    Near-duplicate OCR result cache (in-memory LRU + optional sqlite tier).
+
+    Example:
+        >>> cache = PerceptualOCRCache(max_entries=1024, max_distance=6)
+        >>> segments = cache.get_or_compute(upload_bytes, lambda: extract_segments(upload_bytes))
+    """
+
+    def __init__(self, max_entries: int = 1024, max_distance: int = 6,
+                 disk_path: Optional[str] = None, min_text_similarity: float = 0.9):
+        """
+        Args:
+            max_entries: In-memory LRU capacity
+            max_distance: Largest Hamming distance still treated as the same image
+                (must be below BANDS for the band index to find every match)
+            disk_path: sqlite file for the persistent tier, or None for memory only
+            min_text_similarity: Smallest text_similarity() at which a near match
+                is reused
+        """
+        if not 0 <= max_distance < BANDS:
+            raise ValueError(f"max_distance must be in [0, {BANDS - 1}]")
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self.min_text_similarity = min_text_similarity
+        self._lock = threading.Lock()
+        # hash -> (segments, cost_ms, text signature), in LRU order
+        self._entries: "OrderedDict[int, Tuple[List[OCRSegment], float, Optional[bytes]]]" = OrderedDict()
+        self._index: List[Dict[int, Set[int]]] = [{} for _ in range(BANDS)]
+        self._disk = _DiskTier(disk_path) if disk_path else None
+        self._hits = 0
+        self._lookups = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _same_text(self, signature: Optional[bytes], stored: Optional[bytes]) -> bool:
+        """
+        Whether a stored entry may be reused for a query signature.
+
+        Raw hashes (no signatures on either side) match on distance alone;
+        an entry that cannot be verified against a signed query never matches.
+        """
+        if signature is None or stored is None:
+            return signature is None and stored is None
+        if text_similarity(signature, stored) >= self.min_text_similarity:
+            return True
+        metrics.incr("ocr_cache.text_mismatches")
+        return False
+
+    def _insert(self, value: int, segments: List[OCRSegment], cost_ms: float, signature: Optional[bytes]):
+        """Add to the memory tier, evicting the least recently used entries (lock held)."""
+        if value not in self._entries:
+            for band, key in zip(self._index, _bands(value)):
+                band.setdefault(key, set()).add(value)
+        self._entries[value] = (segments, cost_ms, signature)
+        self._entries.move_to_end(value)
+
+        while len(self._entries) > self.max_entries:
+            evicted, _ = self._entries.popitem(last=False)
+            for band, key in zip(self._index, _bands(evicted)):
+                bucket = band.get(key)
+                if bucket is not None:
+                    bucket.discard(evicted)
+                    if not bucket:
+                        del band[key]
+
+    def _lookup_memory(self, value: int, signature: Optional[bytes]) -> Optional[int]:
+        """Closest stored hash within max_distance whose text matches (lock held)."""
+        candidates: Set[int] = set()
+        for band, key in zip(self._index, _bands(value)):
+            candidates |= band.get(key, set())
+
+        near = sorted((hamming(value, stored), stored) for stored in candidates)
+        for distance, stored in near:
+            if distance > self.max_distance:
+                break
+            if self._same_text(signature, self._entries[stored][2]):
+                return stored
+        return None
+
+    def _record(self, hit: bool, saved_ms: float = 0.0):
+        self._lookups += 1
+        if hit:
+            self._hits += 1
+            metrics.observe("ocr_cache.saved_ms", saved_ms)
+        else:
+            metrics.incr("ocr_cache.misses")
+        metrics.set_gauge("ocr_cache.hit_rate", self._hits / self._lookups)
+
+    def get(self, value: int, signature: Optional[bytes] = None) -> Optional[List[OCRSegment]]:
+        """
+        Look up OCR segments for an image hash (memory first, then disk).
+
+        Args:
+            value: dhash() of the image
+            signature: text_signature() of the image; near matches must agree with it
+
+        Returns:
+            Segments stored for a near-identical image, or None
+        """
+        with self._lock:
+            stored = self._lookup_memory(value, signature)
+            if stored is not None:
+                self._entries.move_to_end(stored)
+                segments, cost_ms, _ = self._entries[stored]
+                metrics.incr("ocr_cache.hits")
+                self._record(True, cost_ms)
+                return segments
+
+        if self._disk is not None:
+            found = self._disk.lookup(value, self.max_distance,
+                                      lambda stored: self._same_text(signature, stored))
+            if found is not None:
+                stored, segments, cost_ms, stored_signature = found
+                with self._lock:
+                    self._insert(stored, segments, cost_ms, stored_signature)
+                    metrics.incr("ocr_cache.hits")
+                    metrics.incr("ocr_cache.disk_hits")
+                    self._record(True, cost_ms)
+                return segments
+
+        with self._lock:
+            self._record(False)
+        return None
+
+    def put(self, value: int, segments: List[OCRSegment], cost_ms: float,
+            signature: Optional[bytes] = None):
+        """
+        Store OCR segments for an image hash in both tiers.
+
+        Args:
+            value: dhash() of the image
+            segments: OCR result
+            cost_ms: How long the OCR took (reported as saved on later hits)
+            signature: text_signature() of the image
+        """
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._insert(value, segments, cost_ms, signature)
+        if self._disk is not None:
+            self._disk.store(value, segments, cost_ms, signature)
+
+    def get_or_compute(self, image, compute: Callable[[], List[OCRSegment]]) -> List[OCRSegment]:
+        """
+        Return cached segments for a near-identical image, or run `compute`.
+
+        Args:
+            image: Encoded image bytes or decoded numpy image (used for hashing)
+            compute: OCR call for this image, run on a miss
+
+        Returns:
+            OCR segments
+        """
+        value = dhash(image)
+        if value is None:
+            # Undecodable - let the OCR path report it
+            return compute()
+        signature = text_signature(image)
+
+        segments = self.get(value, signature)
+        if segments is not None:
+            return segments
+
+        started = time.perf_counter()
+        segments = compute()
+        if segments:
+            # Empty results may be an engine failure; don't pin them
+            self.put(value, segments, (time.perf_counter() - started) * 1000, signature)
+        return segments
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._index = [{} for _ in range(BANDS)]
+
+    def close(self):
+        if self._disk is not None:
+            self._disk.close()
@@ -0,0 +1,306 @@
+"""
+ONNX OCR Engine - EasyOCR's CRAFT detector and CRNN recognizer on ONNX Runtime.
+
+On CPU-only nodes EasyOCR runs both networks through PyTorch, which costs a
+large import (torch) and leaves graph-level optimisations on the table.
+This engine loads ONNX exports of the same two networks (see
+backend/scripts/export_ocr_onnx.py) and runs them with ONNX Runtime,
+with full graph optimisation and a fixed intra-op thread budget. Pre- and
+post-processing mirror EasyOCR's defaults (canvas 2560, text/link/low-text
+thresholds 0.7/0.4/0.4, 64 px recognizer height, greedy CTC decoding), so
+results are interchangeable with the EasyOCR path.
+
+Selected with PSL_OCR_ENGINE=onnx; model files are read from
+PSL_OCR_ONNX_MODEL_DIR (detector.onnx, recognizer.onnx).
+"""
+
+from typing import List, Optional, Sequence, Tuple
+from pathlib import Path
+import logging
+import math
+
+import cv2
+import numpy as np
+
+from backend.app.schemas import OCRSegment
+
+logger = logging.getLogger(__name__)
+
+Box = Tuple[int, int, int, int]
+
+# EasyOCR english_g2 character set; CTC blank is index 0
+ENGLISH_G2_CHARACTERS = (
+    "0123456789!\"#$%&'()*+,-./:;<=>?@[\\]^_`{|}~ €"
+    "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+)
+
+DETECTOR_FILE = "detector.onnx"
+RECOGNIZER_FILE = "recognizer.onnx"
+
+# CRAFT input normalisation (ImageNet mean / std, RGB)
+_MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32) * 255.0
+_STD = np.array([0.229, 0.224, 0.225], dtype=np.float32) * 255.0
+
+
+def create_session(path: str, threads: int = 0):
+    """
+    Open an ONNX Runtime CPU session with full graph optimisation.
+
+    Args:
+        path: .onnx model file
+        threads: Intra-op threads (0 = ONNX Runtime default, one per core)
+    """
+    import onnxruntime as ort
+
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+    options.inter_op_num_threads = 1
+    if threads > 0:
+        options.intra_op_num_threads = threads
+    return ort.InferenceSession(path, sess_options=options, providers=["CPUExecutionProvider"])
+
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    exp = np.exp(logits - logits.max(axis=-1, keepdims=True))
+    return exp / exp.sum(axis=-1, keepdims=True)
+
+
+def ctc_greedy_decode(probs: np.ndarray, characters: str) -> List[Tuple[str, float]]:
+    """
+    Greedy CTC decoding of recognizer output.
+
+    Args:
+        probs: Per-step class probabilities, shape (batch, steps, classes)
+        characters: Character set (class i + 1 -> characters[i]; 0 is blank)
+
+    Returns:
+        (text, confidence) per batch item; confidence follows EasyOCR
+        (product of non-blank step maxima ** (2 / sqrt(n)))
+    """
+    results = []
+    indices = probs.argmax(axis=2)
+    maxima = probs.max(axis=2)
+    for idx, best in zip(indices, maxima):
+        chars = []
+        previous = 0
+        for i in idx:
+            if i != 0 and i != previous:
+                chars.append(characters[i - 1])
+            previous = i
+        kept = best[idx != 0]
+        confidence = float(kept.prod() ** (2.0 / math.sqrt(len(kept)))) if len(kept) else 0.0
+        results.append(("".join(chars), confidence))
+    return results
+
+
+def detection_boxes(text_map: np.ndarray, link_map: np.ndarray,
+                    text_threshold: float = 0.7, link_threshold: float = 0.4,
+                    low_text: float = 0.4) -> List[Box]:
+    """
+    Turn CRAFT score maps into word boxes (axis-aligned, in score-map pixels).
+
+    Same labelling as EasyOCR's getDetBoxes_core: threshold text and link
+    scores, connected components, drop small / weak components, dilate
+    proportionally to the component's thickness.
+    """
+    img_h, img_w = text_map.shape
+    text_score = (text_map > low_text).astype(np.uint8)
+    link_score = (link_map > link_threshold).astype(np.uint8)
+    combined = np.clip(text_score + link_score, 0, 1)
+
+    n_labels, labels, stats, _ = cv2.connectedComponentsWithStats(combined, connectivity=4)
+    boxes = []
+    for k in range(1, n_labels):
+        x, y, w, h, size = stats[k]
+        if size < 10:
+            continue
+        component = labels[y:y + h, x:x + w] == k
+        if text_map[y:y + h, x:x + w][component].max() < text_threshold:
+            continue
+        niter = int(math.sqrt(size * min(w, h) / (w * h)) * 2)
+        x0, y0 = max(0, x - niter), max(0, y - niter)
+        x1, y1 = min(img_w, x + w + niter + 1), min(img_h, y + h + niter + 1)
+        boxes.append((int(x0), int(y0), int(x1 - x0), int(y1 - y0)))
+    return boxes
+
+
+def merge_line_boxes(boxes: Sequence[Box], ycenter_ths: float = 0.5, height_ths: float = 0.5,
+                     width_ths: float = 0.5, margin: float = 0.1) -> List[Box]:
+    """
+    Join word boxes on the same text line (EasyOCR group_text_box, horizontal case).
+
+    Boxes are on one line when their vertical centres and heights are within
+    `ycenter_ths` / `height_ths` of the line height, and are merged when the
+    horizontal gap is below `width_ths` x height. Each merged box gets a
+    `margin` x height border.
+    """
+    lines: List[List[Box]] = []
+    for box in sorted(boxes, key=lambda b: b[1] + b[3] / 2):
+        x, y, w, h = box
+        for line in lines:
+            lx, ly, lw, lh = line[-1]
+            mean_h = sum(b[3] for b in line) / len(line)
+            if (abs((ly + lh / 2) - (y + h / 2)) < ycenter_ths * mean_h
+                    and abs(lh - h) < height_ths * mean_h):
+                line.append(box)
+                break
+        else:
+            lines.append([box])
+
+    merged = []
+    for line in lines:
+        line.sort(key=lambda b: b[0])
+        group = [line[0]]
+        for box in line[1:]:
+            gx = max(b[0] + b[2] for b in group)
+            height = max(b[3] for b in group)
+            if box[0] - gx < width_ths * height:
+                group.append(box)
+            else:
+                merged.append(_union(group, margin))
+                group = [box]
+        merged.append(_union(group, margin))
+
+    merged.sort(key=lambda b: (b[1], b[0]))
+    return merged
+
+
+def _union(group: Sequence[Box], margin: float) -> Box:
+    x0 = min(b[0] for b in group)
+    y0 = min(b[1] for b in group)
+    x1 = max(b[0] + b[2] for b in group)
+    y1 = max(b[1] + b[3] for b in group)
+    pad = int(margin * (y1 - y0))
+    return (max(0, x0 - pad), max(0, y0 - pad), x1 - x0 + 2 * pad, y1 - y0 + 2 * pad)
+
+
+class ONNXOCREngine:
+    """
+    CRAFT detection + CRNN recognition on ONNX Runtime.
+
+    Example:
+        >>> engine = ONNXOCREngine.load("models/onnx", threads=4)
+        >>> segments = engine.readtext(gray_image)
+    """
+
+    CANVAS_SIZE = 2560
+    REC_HEIGHT = 64
+
+    def __init__(self, detector, recognizer, characters: str = ENGLISH_G2_CHARACTERS,
+                 batch_size: int = 16):
+        """
+        Args:
+            detector: ONNX Runtime session (or compatible) for the CRAFT detector
+            recognizer: ONNX Runtime session (or compatible) for the CRNN recognizer
+            characters: Recognizer character set, excluding the CTC blank
+            batch_size: Crops per recognizer call
+        """
+        self.detector = detector
+        self.recognizer = recognizer
+        self.characters = characters
+        self.batch_size = batch_size
+        self._det_input = detector.get_inputs()[0].name
+        self._rec_input = recognizer.get_inputs()[0].name
+
+    @classmethod
+    def load(cls, model_dir: str, threads: int = 0) -> "ONNXOCREngine":
+        """
+        Load detector.onnx and recognizer.onnx from `model_dir`.
+
+        Raises:
+            FileNotFoundError: If either model file is missing
+        """
+        directory = Path(model_dir)
+        paths = [directory / DETECTOR_FILE, directory / RECOGNIZER_FILE]
+        missing = [str(p) for p in paths if not p.exists()]
+        if missing:
+            raise FileNotFoundError(f"ONNX OCR models not found: {', '.join(missing)}")
+        return cls(create_session(str(paths[0]), threads), create_session(str(paths[1]), threads))
+
+    def detect(self, gray: np.ndarray) -> List[Box]:
+        """
+        Find text line boxes in a grayscale image.
+
+        Returns:
+            Boxes (x, y, w, h) in image coordinates, in reading order
+        """
+        img_h, img_w = gray.shape[:2]
+        ratio = min(1.0, self.CANVAS_SIZE / max(img_h, img_w))
+        target_h, target_w = int(img_h * ratio), int(img_w * ratio)
+        resized = cv2.resize(gray, (target_w, target_h), interpolation=cv2.INTER_LINEAR)
+
+        # Pad to a multiple of 32 (CRAFT's stride), normalise, NCHW
+        canvas = np.zeros((math.ceil(target_h / 32) * 32, math.ceil(target_w / 32) * 32, 3), np.float32)
+        canvas[:target_h, :target_w] = cv2.cvtColor(resized, cv2.COLOR_GRAY2RGB)
+        x = ((canvas - _MEAN) / _STD).transpose(2, 0, 1)[np.newaxis]
+
+        score = self.detector.run(None, {self._det_input: x})[0][0]
+        words = detection_boxes(score[:, :, 0], score[:, :, 1])
+
+        # Score maps are half the canvas resolution
+        scale = 2.0 / ratio
+        boxes = []
+        for (x0, y0, w, h) in merge_line_boxes(words):
+            bx, by = int(x0 * scale), int(y0 * scale)
+            bw = min(img_w - bx, int(math.ceil(w * scale)))
+            bh = min(img_h - by, int(math.ceil(h * scale)))
+            if bw > 0 and bh > 0:
+                boxes.append((bx, by, bw, bh))
+        return boxes
+
+    def _prepare_crops(self, crops: List[np.ndarray]) -> np.ndarray:
+        """Resize crops to the recognizer height and right-pad with the edge column."""
+        resized = []
+        for crop in crops:
+            h, w = crop.shape[:2]
+            new_w = max(1, math.ceil(self.REC_HEIGHT * w / max(1, h)))
+            resized.append(cv2.resize(crop, (new_w, self.REC_HEIGHT), interpolation=cv2.INTER_CUBIC))
+
+        max_w = max(self.REC_HEIGHT, max(r.shape[1] for r in resized))
+        batch = np.empty((len(resized), 1, self.REC_HEIGHT, max_w), np.float32)
+        for i, r in enumerate(resized):
+            padded = cv2.copyMakeBorder(r, 0, 0, 0, max_w - r.shape[1], cv2.BORDER_REPLICATE)
+            batch[i, 0] = (padded.astype(np.float32) / 255.0 - 0.5) / 0.5
+        return batch
+
+    def recognize(self, gray: np.ndarray, boxes: Sequence[Box]) -> List[OCRSegment]:
+        """
+        Recognise the given boxes of a grayscale image.
+
+        Crops of similar width are batched together to limit padding.
+        """
+        crops = [(box, gray[box[1]:box[1] + box[3], box[0]:box[0] + box[2]]) for box in boxes]
+        crops = [(box, crop) for box, crop in crops if crop.size]
+        order = sorted(range(len(crops)), key=lambda i: crops[i][1].shape[1] / max(1, crops[i][1].shape[0]))
+
+        decoded: List[Optional[Tuple[str, float]]] = [None] * len(crops)
+        for start in range(0, len(order), self.batch_size):
+            chunk = order[start:start + self.batch_size]
+            batch = self._prepare_crops([crops[i][1] for i in chunk])
+            logits = self.recognizer.run(None, {self._rec_input: batch})[0]
+            for i, result in zip(chunk, ctc_greedy_decode(_softmax(logits), self.characters)):
+                decoded[i] = result
+
+        segments = []
+        for (box, _), (text, confidence) in zip(crops, decoded):
+            if text.strip():
+                segments.append(OCRSegment(text.strip(), confidence, box))
+        return segments
+
+    def readtext(self, image: np.ndarray, regions: Optional[Sequence[Box]] = None) -> List[OCRSegment]:
+        """
+        Detect and recognise text.
+
+        Args:
+            image: Grayscale or BGR image (typically the preprocessed OCR input)
+            regions: Known text regions; when given, the detector is skipped
+
+        Returns:
+            OCRSegments in reading order
+        """
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+        boxes = list(regions) if regions else self.detect(gray)
+        if not boxes:
+            return []
+        return self.recognize(gray, boxes)
@@ -0,0 +1,179 @@
+"""
+OCR Worker Pool - run extract_text in a farm of worker processes.
+
+On CPU nodes OCR is the bottleneck and the shared EasyOCR reader cannot be
+used from several threads at once. The pool starts N processes, each with
+its own preloaded reader and a fixed thread budget for torch (or ONNX
+Runtime) / OpenCV / BLAS (so N workers don't oversubscribe the cores),
+and bounds the number of queued jobs: when the queue is full, submit()
+fails fast with OCRPoolBusy instead of letting latency grow without limit.
+
+This module must stay light at import time: worker processes are spawned
+and import it before their thread limits are applied.
+"""
+
+from typing import List, Optional
+from concurrent.futures import Future, ProcessPoolExecutor
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+import time
+
+from backend.app.metrics import metrics
+from backend.app.schemas import OCRSegment
+
+logger = logging.getLogger(__name__)
+
+
+class OCRPoolBusy(RuntimeError):
+    """Raised when the OCR queue is full (backpressure)."""
+
+
+def _init_worker(threads_per_worker: int, preload: bool):
+    """Per-process setup: thread limits first, then heavy imports."""
+    n = str(threads_per_worker)
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = n
+
+    from backend.app.config import settings
+
+    import cv2
+    cv2.setNumThreads(threads_per_worker)
+    if settings.OCR_ENGINE == "onnx":
+        # ONNX Runtime sessions take their thread count from settings; torch is never imported
+        settings.OCR_ONNX_THREADS = threads_per_worker
+    else:
+        try:
+            import torch
+            torch.set_num_threads(threads_per_worker)
+            torch.set_num_interop_threads(1)
+        except (ImportError, RuntimeError):
+            pass
+
+    if preload:
+        from backend.app.ocr import _get_easyocr_reader, _get_onnx_engine
+        if settings.OCR_ENGINE == "onnx":
+            _get_onnx_engine()
+        else:
+            _get_easyocr_reader()
+
+
+def _worker_extract(image, preprocess_mode: Optional[str]) -> List[OCRSegment]:
+    from backend.app.ocr import extract_segments
+    return extract_segments(image, preprocess_mode=preprocess_mode)
+
+
+def _worker_ping() -> int:
+    return os.getpid()
+
+
+class OCRWorkerPool:
+    """
+    Bounded pool of OCR worker processes.
+
+    Example:
+        >>> pool = OCRWorkerPool(workers=4, max_pending=16)
+        >>> texts = pool.extract_text(upload_bytes)
+    """
+
+    def __init__(self, workers: int, max_pending: int,
+                 threads_per_worker: int = 1,
+                 preload: bool = True,
+                 submit_timeout: float = 0.0):
+        """
+        Args:
+            workers: Number of worker processes
+            max_pending: Maximum queued + running jobs before rejecting
+            threads_per_worker: torch / OpenCV / BLAS threads per worker
+            preload: Load the OCR engine (EasyOCR or ONNX) when each worker starts
+            submit_timeout: Seconds to wait for a free slot before OCRPoolBusy
+        """
+        self.workers = workers
+        self.max_pending = max_pending
+        self.submit_timeout = submit_timeout
+        self._slots = threading.BoundedSemaphore(max_pending)
+        # spawn: torch / CUDA state is not fork-safe
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(threads_per_worker, preload),
+        )
+
+    def _submit(self, fn, *args) -> Future:
+        if self.submit_timeout > 0:
+            acquired = self._slots.acquire(timeout=self.submit_timeout)
+        else:
+            acquired = self._slots.acquire(blocking=False)
+        if not acquired:
+            metrics.incr("ocr_pool.rejected")
+            raise OCRPoolBusy(f"OCR queue full ({self.max_pending} pending)")
+
+        metrics.incr("ocr_pool.submitted")
+        queued_at = time.perf_counter()
+        try:
+            future = self._executor.submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+
+        def _done(_):
+            self._slots.release()
+            metrics.observe("ocr_pool.job_ms", (time.perf_counter() - queued_at) * 1000)
+
+        future.add_done_callback(_done)
+        return future
+
+    def submit(self, image, preprocess_mode: Optional[str] = None) -> Future:
+        """
+        Queue an OCR job.
+
+        Args:
+            image: Encoded image bytes, numpy image, or file path
+            preprocess_mode: Preprocessing preset (see ocr.PREPROCESS_MODES)
+
+        Returns:
+            Future resolving to the list of OCRSegments
+
+        Raises:
+            OCRPoolBusy: If max_pending jobs are already queued
+        """
+        return self._submit(_worker_extract, image, preprocess_mode)
+
+    def extract_segments(self, image, preprocess_mode: Optional[str] = None) -> List[OCRSegment]:
+        """Blocking drop-in replacement for ocr.extract_segments."""
+        return self.submit(image, preprocess_mode).result()
+
+    def extract_segments_batch(self, images: List,
+                               preprocess_mode: Optional[str] = None) -> List[List[OCRSegment]]:
+        """Spread several images over the workers; results in input order."""
+        futures = [self.submit(image, preprocess_mode) for image in images]
+        return [f.result() for f in futures]
+
+    def extract_text(self, image, preprocess_mode: Optional[str] = None) -> List[str]:
+        """Blocking drop-in replacement for ocr.extract_text."""
+        return [seg.text for seg in self.extract_segments(image, preprocess_mode)]
+
+    def extract_text_batch(self, images: List, preprocess_mode: Optional[str] = None) -> List[List[str]]:
+        """Text-only view of extract_segments_batch."""
+        return [[seg.text for seg in segments]
+                for segments in self.extract_segments_batch(images, preprocess_mode)]
+
+    async def extract_segments_async(self, image, preprocess_mode: Optional[str] = None) -> List[OCRSegment]:
+        """Awaitable variant for use inside request handlers."""
+        return await asyncio.wrap_future(self.submit(image, preprocess_mode))
+
+    async def extract_text_async(self, image, preprocess_mode: Optional[str] = None) -> List[str]:
+        """Awaitable text-only variant."""
+        return [seg.text for seg in await self.extract_segments_async(image, preprocess_mode)]
+
+    def warmup(self):
+        """Start all workers (and preload their readers) before the first request."""
+        futures = [self._executor.submit(_worker_ping) for _ in range(self.workers)]
+        pids = {f.result() for f in futures}
+        logger.info(f"OCR worker pool ready: {len(pids)} process(es)")
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
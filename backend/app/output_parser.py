@@ -0,0 +1,263 @@
+"""
+Output Parser - turn TxGemma's markdown reply into the structured explanation.
+
+The model answers with five numbered sections (MECHANISM, SYMPTOMS, RISK
+FACTORS, MONITORING, ALTERNATIVES), usually as markdown bullets. The parser
+reads the reply once, line by line: a small state machine tracks the
+current section, each line is cleaned of markdown as it arrives, and a
+section's points are built when the next header (or the end) closes it.
+All patterns are compiled once at import.
+
+Text can be parsed in one call or fed incrementally while it is decoded:
+
+    parser = ExplanationParser(("warfarin", "aspirin"))
+    for chunk in stream:
+        parser.feed(chunk)
+    explanation = parser.close()
+"""
+
+from typing import Dict, List, Optional, Sequence
+import re
+
+SECTIONS = [
+    "mechanism_of_interaction",
+    "clinical_manifestations",
+    "risk_factors",
+    "monitoring_recommendations",
+    "alternative_suggestions",
+]
+
+MAX_POINTS = 7
+MIN_POINT_CHARS = 10        # shorter plain lines are dropped as noise
+MIN_FALLBACK_CHARS = 15     # ... and without any headers, a little stricter
+RAW_RESPONSE_CHARS = 1500
+
+# "**1. MECHANISM:**", "### 3. Risk Factors", "4. Monitor:", "* **3. RISK FACTORS:**"
+# (a header inside the previous section's list) ... The keyword must end the
+# header ("1. Monitor INR weekly" is a numbered point, not a header).
+_HEADER = re.compile(
+    r"^\s*(?:#{1,6}\s*)?(?:[-•*]\s+)?\*{0,2}\s*\d+\.\s*"
+    r"(MECHANISMS?|SYMPTOMS?|CLINICAL(?:\s+MANIFESTATIONS)?|RISK\s*FACTORS?|"
+    r"MONITORING|MONITOR|ALTERNATIVES?)"
+    r"\s*(?=[:.\-–*]|$)[:.\-–*\s]*",
+    re.IGNORECASE
+)
+_HEADER_KEYS = {
+    "MECHANISM": "mechanism_of_interaction",
+    "SYMPTOM": "clinical_manifestations",
+    "CLINICAL": "clinical_manifestations",
+    "RISK": "risk_factors",
+    "MONITOR": "monitoring_recommendations",
+    "ALTERNATIVE": "alternative_suggestions",
+}
+
+_HEADING = re.compile(r"^\s*#{1,6}\s*")
+_BOLD = re.compile(r"\*\*(.+?)\*\*")
+_EMPHASIS = re.compile(r"(?<![\w*])([*_])(?![\s*_])(.+?)(?<![\s*_])\1(?![\w*])")
+_SPACES = re.compile(r"[ \t]{2,}")
+_BULLET = re.compile(r"^(?:[-•*]|\d+[.)])\s+")
+_CONSULT = re.compile(r"\s*Consult your healthcare provider\.?$", re.IGNORECASE)
+_TITLE = re.compile(r"^Drug Interaction Analysis", re.IGNORECASE)
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def clean_line(line: str) -> str:
+    """Strip markdown (headings, bold, italics, extra spaces) from one line."""
+    line = _HEADING.sub("", line)
+    line = _BOLD.sub(r"\1", line).replace("**", "")
+    line = _EMPHASIS.sub(r"\2", line)
+    return _SPACES.sub(" ", line).strip()
+
+
+def _section_key(keyword: str) -> str:
+    keyword = keyword.upper()
+    return next(key for prefix, key in _HEADER_KEYS.items() if keyword.startswith(prefix))
+
+
+def _points(lines: List[str]) -> List[str]:
+    """
+    Points of one section from its cleaned lines.
+
+    Bullets / numbered items are points (continuation lines are appended);
+    otherwise each line is a point; a single paragraph is split into groups
+    of sentences.
+    """
+    points: List[str] = []
+    bulleted = False
+    current: Optional[List[str]] = None
+    for line in lines:
+        bullet = _BULLET.match(line)
+        if bullet:
+            if current:
+                points.append(" ".join(current))
+            current = [line[bullet.end():]]
+            bulleted = True
+        elif current is not None:
+            current.append(line)
+        else:
+            points.append(line)
+    if current:
+        points.append(" ".join(current))
+
+    if bulleted:
+        return [p for p in points if p][:MAX_POINTS]
+    if len(points) >= 2:
+        return [p for p in points if len(p) > MIN_POINT_CHARS][:MAX_POINTS]
+
+    # One paragraph: group sentences into points of ~60+ characters
+    grouped, current_text = [], ""
+    for sentence in _SENTENCE_END.split(points[0] if points else ""):
+        current_text += sentence.strip() + " "
+        if len(current_text) > 60:
+            grouped.append(current_text.strip())
+            current_text = ""
+    if current_text.strip():
+        grouped.append(current_text.strip())
+    return grouped[:MAX_POINTS]
+
+
+def default_points(drug_pair: Sequence[str]) -> Dict[str, str]:
+    """Generic point per section, used where the model left a section out."""
+    drug1 = drug_pair[0].title() if len(drug_pair) > 0 else "Drug"
+    drug2 = drug_pair[1].title() if len(drug_pair) > 1 else "Drug"
+    return {
+        "mechanism_of_interaction": f"The interaction between {drug1} and {drug2} involves pharmacological pathways that may alter drug efficacy or safety.",
+        "clinical_manifestations": f"The {drug1}-{drug2} combination may produce adverse clinical effects. Monitor for unusual symptoms.",
+        "risk_factors": "Elderly patients, those with renal or hepatic impairment, and patients on multiple medications are at higher risk.",
+        "monitoring_recommendations": "Regular monitoring of relevant lab values and clinical symptoms is recommended.",
+        "alternative_suggestions": "Discuss potential alternative medications or dosing strategies with your healthcare provider."
+    }
+
+
+class ExplanationParser:
+    """
+    Incremental parser for one model reply.
+
+    feed() accepts text in arbitrary chunks (e.g. decoded tokens); only
+    complete lines are processed, so the result does not depend on how
+    the text was split. close() returns the structured explanation.
+    """
+
+    def __init__(self, drug_pair: Optional[Sequence[str]] = None):
+        self.drug_pair = tuple(drug_pair) if isinstance(drug_pair, (list, tuple)) else ("Drug A", "Drug B")
+        self.sections: Dict[str, List[str]] = {key: [] for key in SECTIONS}
+        self._buffer = ""
+        self._raw: List[str] = []
+        self._raw_chars = 0
+        self._preamble: List[str] = []  # cleaned lines outside any section
+        self._section: Optional[str] = None
+        self._lines: List[str] = []
+        self._found = 0
+
+    def feed(self, chunk: str) -> List[str]:
+        """
+        Consume more text.
+
+        Args:
+            chunk: Next piece of the reply
+
+        Returns:
+            Sections completed by this chunk (their points are final)
+        """
+        if self._raw_chars < RAW_RESPONSE_CHARS * 2:
+            self._raw.append(chunk)
+            self._raw_chars += len(chunk)
+        self._buffer += chunk
+        if "\n" not in chunk:
+            return []
+        *lines, self._buffer = self._buffer.split("\n")
+        completed: List[str] = []
+        for line in lines:
+            self._line(line, completed)
+        return completed
+
+    def _line(self, line: str, completed: List[str]):
+        header = _HEADER.match(line)
+        if header:
+            self._close_section(completed)
+            self._section = _section_key(header.group(1))
+            line = line[header.end():]
+
+        cleaned = clean_line(line)
+        if not cleaned:
+            return
+        if self._section is None:
+            self._preamble.append(cleaned)
+        elif not _CONSULT.fullmatch(cleaned):
+            self._lines.append(cleaned)
+
+    def _close_section(self, completed: List[str]):
+        if self._section is None:
+            return
+        lines = self._lines
+        if lines:
+            # "... Consult your healthcare provider." closing the section's last line
+            lines[-1] = _CONSULT.sub("", lines[-1])
+            if not lines[-1]:
+                lines.pop()
+        points = _points(lines)
+        if points:
+            self.sections[self._section] = points
+            self._found += 1
+            completed.append(self._section)
+        self._section, self._lines = None, []
+
+    def _fallback(self):
+        """No headers at all: spread content lines over the sections in order."""
+        content = []
+        for line in self._preamble:
+            if _TITLE.match(line) or _CONSULT.fullmatch(line):
+                continue
+            line = _BULLET.sub("", line)
+            if len(line) > MIN_FALLBACK_CHARS:
+                content.append(line)
+        if not content:
+            return
+        n, prev = len(content), 0
+        for key, frac in zip(SECTIONS, [0.30, 0.50, 0.65, 0.80, 1.0]):
+            end = max(prev + 1, int(n * frac))
+            self.sections[key] = content[prev:end]
+            prev = end
+
+    def close(self) -> Dict:
+        """
+        Finish parsing.
+
+        Returns:
+            Structured explanation: one list of points per section (defaults
+            for sections the model left out) plus `_raw_response`
+        """
+        completed: List[str] = []
+        if self._buffer:
+            self._line(self._buffer, completed)
+            self._buffer = ""
+        self._close_section(completed)
+        if self._found == 0:
+            self._fallback()
+
+        result: Dict = {}
+        defaults = default_points(self.drug_pair)
+        for key in SECTIONS:
+            result[key] = self.sections[key] or [defaults[key]]
+        result["_raw_response"] = "".join(self._raw).strip()[:RAW_RESPONSE_CHARS]
+        return result
+
+    @property
+    def found_sections(self) -> int:
+        return self._found
+
+
+def parse_explanation(text: str, drug_pair: Optional[Sequence[str]] = None) -> Dict:
+    """
+    Parse a complete model reply.
+
+    Args:
+        text: Raw TxGemma output
+        drug_pair: (drug1, drug2), used for default points
+
+    Returns:
+        Structured explanation dict (see ExplanationParser.close)
+    """
+    parser = ExplanationParser(drug_pair)
+    parser.feed(text)
+    return parser.close()
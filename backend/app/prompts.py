@@ -25,7 +25,7 @@ Risk: {risk_level}
 Mechanism: {reason}
 Effect: {effect}
 
-Provide brief analysis in these sections (2-3 key points each):
+Provide brief analysis in these sections ({points} key points each):
 
 1. MECHANISM: How these drugs interact pharmacologically
 2. SYMPTOMS: What clinical effects may occur
@@ -35,6 +35,25 @@ Provide brief analysis in these sections (2-3 key points each):
 
 Keep responses focused and clinically relevant. End with: Consult your healthcare provider."""
 
+    # Structured variant: the reply is JSON (see structured_output.explanation_schema)
+    JSON_EXPLANATION_PROMPT = """Analyze this drug interaction concisely:
+
+Drug A: {drug_a}
+Drug B: {drug_b}
+Risk: {risk_level}
+Mechanism: {reason}
+Effect: {effect}
+
+Reply with JSON only, in exactly this shape, with 1-{max_points} short points (one sentence each) per list:
+{{"mechanism_of_interaction": [...], "clinical_manifestations": [...], "risk_factors": [...], "monitoring_recommendations": [...], "alternative_suggestions": [...]}}
+
+mechanism_of_interaction: how these drugs interact pharmacologically
+clinical_manifestations: what clinical effects may occur
+risk_factors: who is most at risk
+monitoring_recommendations: what to watch for
+alternative_suggestions: general safer options
+No dosages, no medical advice."""
+
     TRANSLATION_PROMPT = """System: You are a medical translator. Translate the text preserving safety warnings exactly.
 
 Original ({source_lang}): {original_text}
@@ -42,13 +61,25 @@ Target Language: {target_lang}
 
 Translation:"""
 
+    # One job for many segments: numbered in, numbered out
+    BATCH_TRANSLATION_PROMPT = """System: You are a medical translator. Translate every numbered line from {source_lang} to {target_lang}, preserving safety warnings exactly.
+Answer with the same numbers, one line per number, in the same order, and nothing else.
+
+{numbered_text}
+
+Translation ({target_lang}):"""
+
     SAFETY_DISCLAIMER = """\n\n⚠️ **IMPORTANT**: This information is for educational purposes only and does not constitute medical advice. Always consult your doctor or pharmacist before changing your medication regimen."""
 
     @staticmethod
-    def format_explanation_prompt(interaction_data: dict) -> str:
+    def format_explanation_prompt(interaction_data: dict, points: str = "2-3") -> str:
         """
         Format the explanation prompt using the interaction verification data.
         OPTIMIZED: Shorter prompt for faster generation.
+
+        Args:
+            interaction_data (dict): Interaction from InteractionChecker
+            points (str): Points per section, matched to the generation profile's token budget
         """
         # Extract drugs from the pair tuple or string
         drugs = interaction_data.get('drug_pair')
@@ -65,7 +96,48 @@ Translation:"""
             drug_b=drug_b.title(),
             risk_level=interaction_data.get('risk_level', 'Unknown').upper(),
             reason=interaction_data.get('mechanism', 'Unknown mechanism'),
-            effect=interaction_data.get('clinical_effect', 'Unknown effect')
+            effect=interaction_data.get('clinical_effect', 'Unknown effect'),
+            points=points
+        )
+
+    @staticmethod
+    def format_batch_translation_prompt(texts: list, target_language: str) -> str:
+        """
+        Format one translation prompt for many text segments.
+
+        Args:
+            texts (list): Segments to translate; line breaks inside a segment are flattened
+            target_language (str): The target language (e.g., "Hindi", "Telugu")
+        """
+        numbered_text = "\n".join(
+            f"[{i}] {' '.join(text.split())}" for i, text in enumerate(texts, start=1)
+        )
+        return PromptTemplates.BATCH_TRANSLATION_PROMPT.format(
+            source_lang="English",
+            target_lang=target_language,
+            numbered_text=numbered_text
+        )
+
+    @staticmethod
+    def format_json_explanation_prompt(interaction_data: dict, max_points: int = 3) -> str:
+        """
+        Format the explanation prompt for JSON output (PSL_EXPLANATION_FORMAT=json).
+        """
+        drugs = interaction_data.get('drug_pair')
+        if isinstance(drugs, tuple) or isinstance(drugs, list):
+            drug_a, drug_b = drugs[0], drugs[1]
+        else:
+            parts = str(drugs).split('+')
+            drug_a = parts[0] if len(parts) > 0 else "Unknown"
+            drug_b = parts[1] if len(parts) > 1 else "Unknown"
+
+        return PromptTemplates.JSON_EXPLANATION_PROMPT.format(
+            drug_a=drug_a.title(),
+            drug_b=drug_b.title(),
+            risk_level=interaction_data.get('risk_level', 'Unknown').upper(),
+            reason=interaction_data.get('mechanism', 'Unknown mechanism'),
+            effect=interaction_data.get('clinical_effect', 'Unknown effect'),
+            max_points=max_points
         )
 
     @staticmethod
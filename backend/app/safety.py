@@ -1,46 +1,300 @@
 import re
-from typing import Tuple
+import logging
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+from backend.app.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+BLOCKED_MESSAGE = "⚠️ SAFETY ALERT: The AI output contained potential medical advice or dosage instructions, which has been blocked for your safety. Please consult a doctor."
+
+
+class SafetyRule(NamedTuple):
+    """One blocked pattern."""
+    rule_id: str
+    pattern: str  # regex, matched case-insensitively
+    # Words (matched as word prefixes) at least one of which must occur for the
+    # pattern to match; empty = always evaluated
+    triggers: Tuple[str, ...] = ()
+
+
+class SafetyViolation(NamedTuple):
+    """Which rule blocked a text, and where."""
+    rule_id: str
+    match: str
+    span: Tuple[int, int]
+
+
+class SectionVerdict(NamedTuple):
+    """Safety result for one section of a structured explanation."""
+    section: str
+    is_safe: bool
+    violation: Optional[SafetyViolation] = None
+    point: Optional[int] = None  # index of the point that fired (list sections)
+
+
+class ExplanationVerdict(NamedTuple):
+    """Safety result for a whole structured explanation."""
+    is_safe: bool
+    # Sections in scan order; when short-circuiting, sections after the
+    # first violation are not scanned and therefore absent
+    sections: Dict[str, SectionVerdict]
+
+    @property
+    def violation(self) -> Optional[SectionVerdict]:
+        """The (first) section that failed, if any."""
+        return next((v for v in self.sections.values() if not v.is_safe), None)
+
+
+_WORD = re.compile(r"\w+")
+# Group references that the fused alternation would break: numbered
+# backreferences (\1), conditionals on a group number, and named groups or
+# backreferences (names could collide between rules)
+_GROUP_REFERENCE = re.compile(r"(?<!\\)(?:\\\\)*(?:\\[1-9]|\(\?\(\d|\(\?P[<=])")
+
+
+class RuleSet:
+    """
+    Safety rules compiled for a single pass over the text.
+
+    A trie of trigger words maps each word of the text to the rules it can
+    start, so cost grows with text length rather than rule count. The
+    candidate rules are then fused into one precompiled alternation with a
+    named group per rule (cached per candidate set), and the text is
+    scanned once; the group that matched identifies the rule.
+
+    Wrapping a rule in the alternation renumbers its groups, so rules that
+    refer to groups (\\1, (?P=name), ...) are compiled and searched on
+    their own instead.
+
+    Raises:
+        re.error: if a rule's pattern does not compile
+    """
+
+    def __init__(self, rules: Sequence[SafetyRule]):
+        self.rules = list(rules)
+        self._separate: Dict[int, "re.Pattern"] = {}
+        for i, rule in enumerate(self.rules):
+            compiled = re.compile(rule.pattern, re.IGNORECASE)
+            if _GROUP_REFERENCE.search(rule.pattern):
+                self._separate[i] = compiled
+        self._trie: Dict = {}
+        self._always = frozenset(i for i, rule in enumerate(self.rules) if not rule.triggers)
+        for i, rule in enumerate(self.rules):
+            for trigger in rule.triggers:
+                node = self._trie
+                for ch in trigger.casefold():
+                    node = node.setdefault(ch, {})
+                node.setdefault(None, set()).add(i)
+        self._compile = lru_cache(maxsize=256)(self._fused)
+
+    def _fused(self, indices: Tuple[int, ...]) -> "re.Pattern":
+        return re.compile(
+            "|".join(f"(?P<r{i}>{self.rules[i].pattern})" for i in indices),
+            re.IGNORECASE
+        )
+
+    def candidates(self, text: str) -> Tuple[int, ...]:
+        """Indices of rules whose trigger words (as prefixes) occur in `text`."""
+        found = set(self._always)
+        for word in _WORD.findall(text.casefold()):
+            node = self._trie
+            for ch in word:
+                node = node.get(ch)
+                if node is None:
+                    break
+                found.update(node.get(None, ()))
+        return tuple(sorted(found))
+
+    def search(self, text: str) -> Optional[SafetyViolation]:
+        """First violation in `text` (leftmost match; rule order breaks ties), or None."""
+        indices = self.candidates(text)
+        if not indices:
+            return None
+        best: Optional[Tuple[int, int, "re.Match"]] = None  # (start, rule index, match)
+        fused = tuple(i for i in indices if i not in self._separate)
+        if fused:
+            match = self._compile(fused).search(text)
+            if match is not None:
+                best = (match.start(), int(match.lastgroup[1:]), match)
+        for i in indices:
+            if i in self._separate:
+                match = self._separate[i].search(text)
+                if match is not None and (best is None or (match.start(), i) < best[:2]):
+                    best = (match.start(), i, match)
+        if best is None:
+            return None
+        _, i, match = best
+        return SafetyViolation(self.rules[i].rule_id, match.group(0), match.span())
+
+
+class StreamingSafetyGuard:
+    """
+    Incremental SafetyGuard for text that arrives in pieces (decoded tokens).
+
+    Each chunk is scanned together with the last `overlap` characters seen
+    before it, so a pattern split across chunk boundaries is still caught;
+    the kept tail always starts at a word boundary so `\\b` cannot match in
+    the middle of a word. The overlap must exceed the longest match a rule
+    can produce. After the first violation, further input is ignored.
+    """
+
+    def __init__(self, rule_set: Optional[RuleSet] = None, overlap: int = 64):
+        self.rule_set = rule_set
+        self.overlap = overlap
+        self.violation: Optional[SafetyViolation] = None
+        self._tail = ""
+        self._offset = 0  # position of _tail[0] in the whole stream
+
+    @property
+    def blocked(self) -> bool:
+        return self.violation is not None
+
+    def feed(self, chunk: str) -> Optional[SafetyViolation]:
+        """
+        Scan the next piece of text.
+
+        Args:
+            chunk: Newly decoded text
+
+        Returns:
+            The violation (span relative to the whole stream) once one is found, else None
+        """
+        if self.violation is not None or not chunk:
+            return self.violation
+
+        rule_set = self.rule_set or SafetyGuard._rule_set
+        window = self._tail + chunk
+        violation = rule_set.search(window)
+        if violation is not None:
+            start, end = violation.span
+            self.violation = violation._replace(span=(start + self._offset, end + self._offset))
+            return self.violation
+
+        start = max(0, len(window) - self.overlap)
+        while 0 < start < len(window) and _WORD.match(window[start - 1]) and _WORD.match(window[start]):
+            start += 1
+        self._offset += start
+        self._tail = window[start:]
+        return None
+
 
 class SafetyGuard:
     """
     Safety Guardrails for MedGemma output.
     Blocks hallucinated medical advice, dosages, and prescriptions.
     """
-    
+
     # Strict patterns that should NEVER appear in the output
-    DANGEROUS_PATTERNS = [
-        r"\b(take|use|consume)\s+\d+(mg|g|ml|tablets|pills)",  # e.g., "take 500mg"
-        r"\b(prescribe|prescription)",                        # e.g., "I prescribe"
-        r"\b(diagnose|diagnosis)",                            # e.g., "I diagnose you"
-        r"\b(stop|discontinue)\s+(taking|using)\s+immediately",# Dangerous advice
-        r"\b(increase|decrease)\s+(the\s+)?dose",            # Dosage change
-        r"\b(treatment\s+plan)",                              # Medical planning
+    RULES = [
+        SafetyRule("dosage_instruction", r"\b(take|use|consume)\s+\d+(mg|g|ml|tablets|pills)",  # e.g., "take 500mg"
+                   ("take", "use", "consume")),
+        SafetyRule("prescription", r"\b(prescribe|prescription)",                         # e.g., "I prescribe"
+                   ("prescri",)),
+        SafetyRule("diagnosis", r"\b(diagnose|diagnosis)",                                 # e.g., "I diagnose you"
+                   ("diagnos",)),
+        SafetyRule("discontinue_immediately", r"\b(stop|discontinue)\s+(taking|using)\s+immediately",  # Dangerous advice
+                   ("stop", "discontinue")),
+        SafetyRule("dose_change", r"\b(increase|decrease)\s+(the\s+)?dose",               # Dosage change
+                   ("increase", "decrease")),
+        SafetyRule("treatment_plan", r"\b(treatment\s+plan)",                              # Medical planning
+                   ("treatment",)),
     ]
+    DANGEROUS_PATTERNS = [rule.pattern for rule in RULES]
+
+    _rule_set = RuleSet(RULES)
+
+    @staticmethod
+    def find_violation(text: str) -> Optional[SafetyViolation]:
+        """
+        Find the first dangerous pattern in the text.
+
+        Args:
+            text (str): The AI-generated text.
+
+        Returns:
+            SafetyViolation naming the rule that fired, or None if the text is clean
+        """
+        return SafetyGuard._rule_set.search(text)
 
     @staticmethod
     def validate_output(text: str) -> Tuple[bool, str]:
         """
         Check if the text contains any dangerous patterns.
-        
+
         Args:
             text (str): The AI-generated text.
-            
+
         Returns:
             (bool, str): (is_safe, sanitized_text_or_warning)
         """
         if not text:
             return False, "Error: Empty output."
 
-        # Check for dangerous patterns
-        for pattern in SafetyGuard.DANGEROUS_PATTERNS:
-            if re.search(pattern, text, re.IGNORECASE):
-                # For debugging, we can log which pattern matched
-                # match = re.search(pattern, text, re.IGNORECASE)
-                # print(f"DEBUG: Blocked by pattern: {pattern} -> {match.group(0)}")
-                return False, "⚠️ SAFETY ALERT: The AI output contained potential medical advice or dosage instructions, which has been blocked for your safety. Please consult a doctor."
+        # Check for dangerous patterns (one pass over the text)
+        violation = SafetyGuard.find_violation(text)
+        if violation is not None:
+            metrics.incr(f"safety.blocked.{violation.rule_id}")
+            logger.info(f"Blocked by rule '{violation.rule_id}': {violation.match!r}")
+            return False, BLOCKED_MESSAGE
 
         # Check for mandatory disclaimer (soft check, or enforce injection)
         # We don't block if missing, but we append it if missing in the final app.
         # Here we just validate safety.
-        
+
         return True, text
+
+    @staticmethod
+    def _points(value: Any) -> Iterator[str]:
+        """Text points of one explanation section (a string or a list of strings)."""
+        if isinstance(value, str):
+            yield value
+        elif isinstance(value, (list, tuple)):
+            for point in value:
+                if isinstance(point, str):
+                    yield point
+
+    @staticmethod
+    def validate_explanation(explanation: Mapping[str, Any],
+                             short_circuit: bool = True) -> ExplanationVerdict:
+        """
+        Check every point of every section of a structured explanation.
+
+        Points are scanned one by one where they are, without building a
+        joined string. Non-text values are ignored.
+
+        Args:
+            explanation: Structured explanation (section -> list of points or text)
+            short_circuit: Stop at the first violation (otherwise scan all sections)
+
+        Returns:
+            ExplanationVerdict with a SectionVerdict per scanned section
+        """
+        sections: Dict[str, SectionVerdict] = {}
+        has_text = False
+        for section, value in explanation.items():
+            verdict = SectionVerdict(section, True)
+            for index, point in enumerate(SafetyGuard._points(value)):
+                has_text = has_text or bool(point.strip())
+                violation = SafetyGuard.find_violation(point)
+                if violation is not None:
+                    verdict = SectionVerdict(section, False, violation,
+                                             index if not isinstance(value, str) else None)
+                    metrics.incr(f"safety.blocked.{violation.rule_id}")
+                    logger.info(f"Blocked by rule '{violation.rule_id}' in '{section}': {violation.match!r}")
+                    break
+            sections[section] = verdict
+            if short_circuit and not verdict.is_safe:
+                break
+
+        # Like validate_output, an explanation without any text is not safe
+        is_safe = has_text and all(v.is_safe for v in sections.values())
+        return ExplanationVerdict(is_safe, sections)
+
+    @staticmethod
+    def load_rules(rules: List[SafetyRule]):
+        """Replace the active rules (e.g. with locale-specific sets) and recompile."""
+        SafetyGuard.RULES = list(rules)
+        SafetyGuard.DANGEROUS_PATTERNS = [rule.pattern for rule in rules]
+        SafetyGuard._rule_set = RuleSet(rules)
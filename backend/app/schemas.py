@@ -3,10 +3,23 @@ Data schemas and contracts for the application.
 Defines input/output structures for all modules.
 """
 
-from typing import List, Dict, Optional
+from typing import List, Dict, NamedTuple, Optional, Tuple
 from pydantic import BaseModel
 
 
+class OCRSegment(NamedTuple):
+    """One piece of recognised text from an OCR engine."""
+    text: str
+    confidence: float  # 0-1, as reported by the engine
+    bbox: Optional[Tuple[int, int, int, int]] = None  # (x, y, w, h) in the OCR input image
+
+
+class TextAnalysisRequest(BaseModel):
+    """Medication names already available as text (EHR exports, typed lists)."""
+    texts: List[str]
+    languages: List[str] = []  # language codes for language_versions, e.g. ["hi", "te"]
+
+
 class DrugInfo(BaseModel):
     """Information about a detected drug."""
     generic_name: str
@@ -0,0 +1,124 @@
+"""
+Speculative Decoding - assisted generation with a small draft model.
+
+TxGemma 9B decoding is memory-bandwidth bound: each new token reads all
+weights once. With a draft model of the same family (shared tokenizer)
+passed to generate() as `assistant_model`, the draft proposes a few
+tokens and the main model verifies them in a single forward pass. Greedy
+verification keeps exactly the tokens the main model would have chosen,
+so replies (and parsed explanations) are unchanged; only the number of
+main-model passes drops.
+
+transformers does not report how many draft tokens were accepted, so
+AcceptanceCounter estimates it from forward passes of both models: every
+verification pass is assumed to yield its accepted draft tokens plus one
+token of the main model's own, and every draft pass to propose one token.
+Passes that do not fit this model (prefill, a step cut short by a stopping
+criterion, re-tokenisation of the reply changing its token count) skew the
+count, so the metrics are named `*_estimate`. Generations stopped by the
+safety guard are only counted (`speculative.safety_stops`), not estimated.
+"""
+
+from typing import Optional, Tuple
+import logging
+
+from backend.app.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def load_draft_model(model_name: str, token: Optional[str] = None, num_tokens: int = 5):
+    """
+    Load the draft model for assisted generation.
+
+    Args:
+        model_name: HuggingFace model id (must share the main model's tokenizer)
+        token: HuggingFace token
+        num_tokens: Tokens the draft proposes per verification step
+
+    Returns:
+        The model, ready to pass as `assistant_model`
+    """
+    import torch
+    from transformers import AutoModelForCausalLM
+
+    model = AutoModelForCausalLM.from_pretrained(
+        model_name,
+        token=token,
+        torch_dtype=torch.float16,
+        device_map="auto",
+    )
+    model.generation_config.num_assistant_tokens = num_tokens
+    # Keep the draft length fixed so acceptance rates are comparable over time
+    model.generation_config.num_assistant_tokens_schedule = "constant"
+    model.eval()
+    return model
+
+
+def acceptance(new_tokens: int, target_steps: int, draft_steps: int) -> Tuple[int, int]:
+    """
+    Estimated accepted and proposed draft tokens of one assisted generation.
+
+    Assumes each main-model pass yields exactly one token of its own; the
+    estimate is clamped to [0, draft_steps].
+
+    Args:
+        new_tokens: Tokens in the reply
+        target_steps: Forward passes of the main model (each yields one token of its own)
+        draft_steps: Forward passes of the draft model (one proposed token each)
+
+    Returns:
+        (accepted, proposed)
+    """
+    accepted = max(0, min(new_tokens - target_steps, draft_steps))
+    return accepted, draft_steps
+
+
+class AcceptanceCounter:
+    """
+    Count forward passes of the main and draft model during one generation.
+
+    Usage:
+        with AcceptanceCounter(pipe.model, draft_model) as counter:
+            pipe(messages, assistant_model=draft_model)
+        counter.record(new_tokens)
+    """
+
+    def __init__(self, target, draft):
+        self.models = (target, draft)
+        self.steps = [0, 0]
+        self._handles = []
+
+    def _hook(self, index: int):
+        def count(module, inputs, output):
+            self.steps[index] += 1
+        return count
+
+    def __enter__(self) -> "AcceptanceCounter":
+        self._handles = [model.register_forward_hook(self._hook(i)) for i, model in enumerate(self.models)]
+        return self
+
+    def __exit__(self, *exc):
+        for handle in self._handles:
+            handle.remove()
+        self._handles = []
+
+    def record(self, new_tokens: int) -> float:
+        """
+        Add this generation to the speculative.* metrics.
+
+        Returns:
+            Estimated acceptance rate of this generation (0.0 if the draft proposed nothing)
+        """
+        accepted, proposed = acceptance(new_tokens, *self.steps)
+        metrics.incr("speculative.generations")
+        metrics.incr("speculative.target_steps", self.steps[0])
+        metrics.incr("speculative.draft_tokens", proposed)
+        metrics.incr("speculative.accepted_tokens_estimate", accepted)
+        total = metrics.get("speculative.draft_tokens")
+        if total:
+            metrics.set_gauge("speculative.acceptance_rate_estimate",
+                              metrics.get("speculative.accepted_tokens_estimate") / total)
+        rate = accepted / proposed if proposed else 0.0
+        logger.debug(f"Assisted generation: ~{accepted}/{proposed} draft tokens accepted")
+        return rate
@@ -0,0 +1,119 @@
+"""
+Structured Output - JSON-constrained explanation generation.
+
+With PSL_EXPLANATION_FORMAT=json the model is asked for the explanation as
+JSON (five string arrays, capped in items and length) instead of numbered
+prose. When lm-format-enforcer is installed, decoding is constrained to the
+schema token by token, so the reply always parses, needs no heuristics
+and never triggers a retry; its length is bounded by the schema caps
+(json_max_new_tokens). Without it the reply is still parsed as JSON, and
+anything unparseable falls back to the prose parser.
+"""
+
+from typing import Dict, Optional, Sequence
+import json
+import logging
+import weakref
+
+from backend.app.config import settings
+from backend.app.output_parser import RAW_RESPONSE_CHARS, SECTIONS, default_points
+
+logger = logging.getLogger(__name__)
+
+
+def explanation_schema(max_points: Optional[int] = None, max_chars: Optional[int] = None) -> Dict:
+    """JSON schema of a structured explanation (all five sections required)."""
+    max_points = max_points or settings.JSON_MAX_POINTS
+    max_chars = max_chars or settings.JSON_MAX_POINT_CHARS
+    item = {"type": "string", "minLength": 1, "maxLength": max_chars}
+    return {
+        "type": "object",
+        "properties": {
+            key: {"type": "array", "items": item, "minItems": 1, "maxItems": max_points}
+            for key in SECTIONS
+        },
+        "required": list(SECTIONS),
+        "additionalProperties": False,
+    }
+
+
+def json_max_new_tokens(max_points: Optional[int] = None, max_chars: Optional[int] = None) -> int:
+    """Upper bound on reply tokens for the schema (~4 characters per token, plus JSON syntax)."""
+    max_points = max_points or settings.JSON_MAX_POINTS
+    max_chars = max_chars or settings.JSON_MAX_POINT_CHARS
+    return 16 + len(SECTIONS) * (12 + max_points * (max_chars // 4 + 4))
+
+
+# Tokenizer vocabulary data for lm-format-enforcer, per tokenizer (costly to build)
+_tokenizer_data: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def json_prefix_allowed_tokens_fn(tokenizer):
+    """
+    `prefix_allowed_tokens_fn` for transformers.generate that only allows
+    tokens keeping the reply valid under explanation_schema().
+
+    The enforcer keeps parser state per generated prefix, so every generate
+    call needs its own function; only the tokenizer data is cached.
+
+    Returns:
+        A new function, or None without a tokenizer or if lm-format-enforcer
+        is not installed
+    """
+    if tokenizer is None:
+        return None
+    try:
+        from lmformatenforcer import JsonSchemaParser
+        from lmformatenforcer.integrations.transformers import (
+            build_token_enforcer_tokenizer_data, build_transformers_prefix_allowed_tokens_fn
+        )
+    except ImportError:
+        logger.warning("lm-format-enforcer not installed; JSON explanations are unconstrained")
+        return None
+    data = _tokenizer_data.get(tokenizer)
+    if data is None:
+        data = _tokenizer_data[tokenizer] = build_token_enforcer_tokenizer_data(tokenizer)
+    return build_transformers_prefix_allowed_tokens_fn(data, JsonSchemaParser(explanation_schema()))
+
+
+def parse_json_explanation(text: str, drug_pair: Optional[Sequence[str]] = None) -> Optional[Dict]:
+    """
+    Read a JSON reply into the structured explanation format.
+
+    Sections are capped to the schema limits; missing ones get default
+    points. Tolerates text around the JSON object (unconstrained replies).
+
+    Args:
+        text: Model reply
+        drug_pair: (drug1, drug2), used for default points
+
+    Returns:
+        Structured explanation, or None if the reply holds no usable JSON
+    """
+    start, end = text.find("{"), text.rfind("}")
+    if start < 0 or end <= start:
+        return None
+    try:
+        data = json.loads(text[start:end + 1])
+    except ValueError:
+        return None
+    if not isinstance(data, dict):
+        return None
+
+    max_points, max_chars = settings.JSON_MAX_POINTS, settings.JSON_MAX_POINT_CHARS
+    defaults = default_points(tuple(drug_pair) if isinstance(drug_pair, (list, tuple)) else ("Drug A", "Drug B"))
+    result: Dict = {}
+    found = 0
+    for key in SECTIONS:
+        value = data.get(key)
+        if isinstance(value, str):
+            value = [value]
+        points = [p.strip()[:max_chars] for p in value if isinstance(p, str) and p.strip()] \
+            if isinstance(value, list) else []
+        if points:
+            found += 1
+        result[key] = points[:max_points] or [defaults[key]]
+    if not found:
+        return None
+    result["_raw_response"] = text.strip()[:RAW_RESPONSE_CHARS]
+    return result
@@ -0,0 +1,165 @@
+"""
+Translation stage - explanations in the patient's language.
+
+Translating point by point would cost one model call per section per
+interaction per language. Instead, every text point of every interaction
+in a response is collected per target language, already-translated points
+come from a cache keyed by (source text hash, language), and the rest go
+to the model as one numbered batch job (split only if very large).
+language_versions are filled only for the languages a client asked for.
+"""
+
+from typing import Dict, List, Optional, Sequence
+import hashlib
+import logging
+import re
+
+from backend.app.coalesce import TTLCache
+from backend.app.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# ISO 639-1 code -> language name used in the prompt
+LANGUAGE_NAMES = {
+    "hi": "Hindi",
+    "te": "Telugu",
+    "ta": "Tamil",
+    "kn": "Kannada",
+    "ml": "Malayalam",
+    "mr": "Marathi",
+    "bn": "Bengali",
+    "gu": "Gujarati",
+    "pa": "Punjabi",
+    "ur": "Urdu",
+    "es": "Spanish",
+    "fr": "French",
+}
+
+# [ \t]* after the number: an empty "[2]" line must not take the next line's text
+_NUMBERED = re.compile(r"^\s*\[?(\d+)[\].)][ \t]*(\S.*?)\s*$", re.MULTILINE)
+
+
+def parse_numbered(reply: str, count: int) -> List[Optional[str]]:
+    """
+    Split a numbered batch reply ("[1] ...", "2. ...") back into segments.
+
+    Returns:
+        `count` entries; None where the model skipped a number
+    """
+    segments: List[Optional[str]] = [None] * count
+    for match in _NUMBERED.finditer(reply):
+        index = int(match.group(1)) - 1
+        if 0 <= index < count and segments[index] is None:
+            segments[index] = match.group(2)
+    return segments
+
+
+def _text_key(text: str, language: str) -> tuple:
+    return hashlib.sha256(text.encode()).hexdigest(), language
+
+
+class Translator:
+    """
+    Batched, cached translation of structured explanations.
+
+    Args:
+        cache: TTLCache for (source text hash, language) -> translation
+        max_segments: Largest number of segments sent in one generation job
+    """
+
+    def __init__(self, cache: Optional[TTLCache] = None, max_segments: int = 64):
+        self.cache = cache if cache is not None else TTLCache(ttl=24 * 3600, max_entries=4096)
+        self.max_segments = max_segments
+
+    def translate_texts(self, texts: Sequence[str], language: str, backend) -> List[str]:
+        """
+        Translate text segments, using the cache and one batch job per max_segments.
+
+        Args:
+            texts: Source (English) segments
+            language: Target language code (see LANGUAGE_NAMES)
+            backend: Object with translate_batch(texts, language_name) -> reply text
+
+        Returns:
+            Translations in the same order; a segment the model did not return
+            stays in English (and is not cached)
+        """
+        return [text if result is None else result
+                for text, result in zip(texts, self._translate(texts, language, backend))]
+
+    def _translate(self, texts: Sequence[str], language: str, backend) -> List[Optional[str]]:
+        """translate_texts without the fallback: None where the model skipped a segment."""
+        translated: Dict[str, Optional[str]] = {}
+        missing: List[str] = []
+        for text in dict.fromkeys(texts):
+            cached = self.cache.get(_text_key(text, language))
+            if cached is not None:
+                translated[text] = cached
+            else:
+                missing.append(text)
+        metrics.incr("translation.cache_hits", len(translated))
+
+        name = LANGUAGE_NAMES.get(language, language)
+        for start in range(0, len(missing), self.max_segments):
+            job = missing[start:start + self.max_segments]
+            metrics.incr("translation.jobs")
+            metrics.incr("translation.segments", len(job))
+            reply = backend.translate_batch(job, name)
+            for text, result in zip(job, parse_numbered(reply, len(job))):
+                if result is None:
+                    metrics.incr("translation.missing_segments")
+                else:
+                    self.cache.set(_text_key(text, language), result)
+                translated[text] = result
+        return [translated[text] for text in texts]
+
+    def translate_explanations(self, explanations: Sequence[Dict], language: str, backend) -> List[Dict]:
+        """
+        Translate the text sections of several structured explanations in one job.
+
+        Args:
+            explanations: Structured explanations (section -> list of points)
+            language: Target language code
+            backend: See translate_texts
+
+        Returns:
+            One dict per explanation with the same list sections, translated
+            (internal keys such as `_raw_response` are left out). Points the
+            model skipped stay in English, and their sections are listed
+            under `untranslated_sections`.
+        """
+        sections = [
+            {key: [p for p in value if isinstance(p, str)]
+             for key, value in explanation.items()
+             if isinstance(value, list) and not key.startswith("_")}
+            for explanation in explanations
+        ]
+        texts = [point for explanation in sections for points in explanation.values() for point in points]
+        translations = iter(self._translate(texts, language, backend))
+        versions = []
+        for explanation in sections:
+            version: Dict = {}
+            untranslated = []
+            for key, points in explanation.items():
+                results = [next(translations) for _ in points]
+                if None in results:
+                    untranslated.append(key)
+                version[key] = [point if result is None else result for point, result in zip(points, results)]
+            if untranslated:
+                version["untranslated_sections"] = untranslated
+            versions.append(version)
+        return versions
+
+
+def parse_languages(languages: Optional[str]) -> List[str]:
+    """
+    Parse a `languages` parameter ("hi,te") into known language codes.
+
+    Raises:
+        ValueError: for codes not in LANGUAGE_NAMES
+    """
+    codes = [code.strip().lower() for code in (languages or "").split(",") if code.strip()]
+    unknown = [code for code in codes if code not in LANGUAGE_NAMES]
+    if unknown:
+        raise ValueError(f"Unsupported language(s): {', '.join(unknown)}")
+    return list(dict.fromkeys(codes))
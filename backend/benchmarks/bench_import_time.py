@@ -0,0 +1,69 @@
+"""
+Benchmark: import time per backend module (API cold start).
+
+Imports each module in a fresh interpreter with ``python -X importtime``
+and reports its own and cumulative import time, plus which heavy
+libraries (torch, cv2, numpy, PIL, pytesseract, transformers) it pulled in.
+
+Usage:
+    python backend/benchmarks/bench_import_time.py [--modules backend.app.main ...]
+"""
+
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+
+DEFAULT_MODULES = [
+    "backend.app.config",
+    "backend.app.schemas",
+    "backend.app.drug_db",
+    "backend.app.interaction_logic",
+    "backend.app.safety",
+    "backend.app.inference",
+    "backend.app.ocr",
+    "backend.app.ocr_cache",
+    "backend.app.api.endpoints",
+    "backend.app.main",
+]
+HEAVY = ["torch", "transformers", "cv2", "numpy", "PIL", "pytesseract", "easyocr", "onnxruntime"]
+
+
+def measure(module: str):
+    """Import `module` in a fresh interpreter; return (self_us, cumulative_us, heavy modules loaded)."""
+    code = (
+        f"import sys, {module}\n"
+        f"print(','.join(m for m in {HEAVY!r} if m in sys.modules))"
+    )
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                          cwd=ROOT, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{proc.stderr[-2000:]}")
+
+    self_us = cumulative_us = 0
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = [p.strip() for p in line[len("import time:"):].split("|")]
+        if parts[2] == module:
+            self_us, cumulative_us = int(parts[0]), int(parts[1])
+    heavy = [m for m in proc.stdout.strip().split(",") if m]
+    return self_us, cumulative_us, heavy
+
+
+def run(modules):
+    print(f"📊 Import time, fresh interpreter per module ({sys.executable})")
+    print(f"   {'module':<32} {'self ms':>8} {'cumul. ms':>10}  heavy libraries")
+    for module in modules:
+        self_us, cumulative_us, heavy = measure(module)
+        print(f"   {module:<32} {self_us / 1000:8.1f} {cumulative_us / 1000:10.1f}  "
+              f"{', '.join(heavy) or '-'}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--modules", nargs="+", default=DEFAULT_MODULES)
+    args = parser.parse_args()
+    run(args.modules)
@@ -0,0 +1,67 @@
+"""
+Benchmark: EasyOCR (PyTorch) vs. the ONNX Runtime engine on CPU.
+
+Runs both primary engines over the same preprocessed synthetic strips and
+reports latency per image, import + load time, and how many of the
+printed drug names each engine recovered.
+
+Usage:
+    python backend/benchmarks/bench_ocr_engines.py [--images 8] [--threads 4]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from backend.app import ocr
+from backend.app.config import settings
+from backend.app.ocr import preprocess_image
+from backend.benchmarks.synthetic import make_dataset
+
+
+def _recall(segments, drugs) -> int:
+    text = " ".join(seg.text.upper() for seg in segments)
+    return sum(1 for drug in drugs if drug.upper() in text)
+
+
+def run(images: int, threads: int, mode: str):
+    dataset = [(preprocess_image(img, mode=mode), drugs)
+               for img, drugs in make_dataset(count=images, size=(1500, 2000))]
+    total_drugs = sum(len(drugs) for _, drugs in dataset)
+    print(f"📊 {images} synthetic strips, preprocess mode={mode}, threads={threads}")
+
+    settings.OCR_ONNX_THREADS = threads
+    engines = [("easyocr", ocr._get_easyocr_reader, ocr._segments_easyocr),
+               ("onnx", ocr._get_onnx_engine, ocr._segments_onnx)]
+
+    baseline = None
+    for name, load, run_engine in engines:
+        start = time.perf_counter()
+        if load() is None:
+            print(f"   {name:<8} unavailable, skipped")
+            continue
+        load_s = time.perf_counter() - start
+
+        run_engine(dataset[0][0])  # warm-up
+        found = 0
+        start = time.perf_counter()
+        for processed, drugs in dataset:
+            found += _recall(run_engine(processed) or [], drugs)
+        per_image = (time.perf_counter() - start) * 1000 / images
+
+        baseline = baseline or per_image
+        print(f"   {name:<8} load {load_s:6.1f}s  {per_image:8.1f} ms/img  "
+              f"(x{baseline / per_image:.2f})  drugs {found}/{total_drugs}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--images", type=int, default=8)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--mode", default="fast")
+    args = parser.parse_args()
+    run(args.images, args.threads, args.mode)
@@ -0,0 +1,59 @@
+"""
+Benchmark: OCR worker pool throughput vs. number of worker processes.
+
+Submits a batch of synthetic pill-strip uploads concurrently to pools of
+increasing size and reports images/second. Throughput should scale close
+to linearly until workers * threads_per_worker reaches the core count.
+
+Usage:
+    python backend/benchmarks/bench_ocr_pool.py [--images 16] [--mode fast]
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+import cv2
+
+from backend.app.ocr_pool import OCRWorkerPool
+from backend.benchmarks.synthetic import make_dataset
+
+
+def run(images: int, mode: str):
+    uploads = []
+    for img, _ in make_dataset(count=images, size=(1500, 2000)):
+        ok, encoded = cv2.imencode(".jpg", img)
+        uploads.append(encoded.tobytes())
+
+    cores = os.cpu_count() or 1
+    print(f"📊 {images} uploads, preprocess mode={mode}, {cores} cores")
+
+    baseline = None
+    workers = 1
+    while workers <= cores:
+        pool = OCRWorkerPool(workers=workers, max_pending=images)
+        pool.warmup()
+        start = time.perf_counter()
+        futures = [pool.submit(data, preprocess_mode=mode) for data in uploads]
+        for f in futures:
+            f.result()
+        elapsed = time.perf_counter() - start
+        pool.shutdown()
+
+        rate = images / elapsed
+        baseline = baseline or rate
+        print(f"   workers={workers:<3} {rate:7.2f} img/s  (x{rate / baseline:.2f})")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--images", type=int, default=16)
+    parser.add_argument("--mode", default="fast")
+    args = parser.parse_args()
+    run(args.images, args.mode)
@@ -0,0 +1,72 @@
+"""
+Benchmark: OCR preprocessing modes - latency vs. accuracy.
+
+Runs every preset in PREPROCESS_MODES over a synthetic pill-strip set and
+reports per-stage preprocessing time, end-to-end OCR time and drug recall
+(after DrugDatabase.normalize). With --regions, recognition is restricted
+to detected text regions and the recognised pixel fraction is reported.
+
+Usage:
+    python backend/benchmarks/bench_ocr_preprocess.py [--count 6] [--size 3000x4000] [--regions]
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from backend.app.config import settings
+from backend.app.drug_db import DrugDatabase
+from backend.app.metrics import metrics
+from backend.app.ocr import PREPROCESS_MODES, extract_text, preprocess_image
+from backend.benchmarks.synthetic import make_dataset
+
+
+def run(count: int, size, regions: bool = False):
+    settings.OCR_TEXT_REGIONS = regions
+    dataset = make_dataset(count=count, size=size)
+    db = DrugDatabase()
+
+    print(f"📊 {count} synthetic strips at {size[1]}x{size[0]}")
+    for mode in PREPROCESS_MODES:
+        stage_totals = {}
+        pre_ms, ocr_ms, recalls = [], [], []
+        metrics.reset()
+
+        for img, expected in dataset:
+            timings = {}
+            start = time.perf_counter()
+            preprocess_image(img, mode=mode, timings=timings)
+            pre_ms.append((time.perf_counter() - start) * 1000)
+            for stage, ms in timings.items():
+                stage_totals.setdefault(stage, []).append(ms)
+
+            start = time.perf_counter()
+            texts = extract_text(img, preprocess_mode=mode)
+            ocr_ms.append((time.perf_counter() - start) * 1000)
+            found = set(db.normalize(texts))
+            recalls.append(len(found & set(expected)) / len(expected))
+
+        print(f"\n🔧 mode={mode}")
+        for stage, values in stage_totals.items():
+            print(f"   {stage:<10} {statistics.median(values):8.1f} ms (median)")
+        print(f"   {'preprocess':<10} {statistics.median(pre_ms):8.1f} ms (median)")
+        print(f"   {'ocr total':<10} {statistics.median(ocr_ms):8.1f} ms (median)")
+        print(f"   drug recall: {statistics.mean(recalls):.0%}")
+        fraction = metrics.snapshot()["timings"].get("ocr.regions.pixel_fraction")
+        if fraction:
+            print(f"   recognised pixels: {fraction['mean']:.0%} of frame")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--count", type=int, default=6)
+    parser.add_argument("--size", default="3000x4000", help="HEIGHTxWIDTH")
+    parser.add_argument("--regions", action="store_true", help="OCR detected text regions only")
+    args = parser.parse_args()
+    height, width = (int(v) for v in args.size.lower().split("x"))
+    run(args.count, (height, width), regions=args.regions)
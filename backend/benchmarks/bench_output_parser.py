@@ -0,0 +1,51 @@
+"""
+Benchmark: parsing TxGemma replies into structured explanations.
+
+Parses the stored raw model outputs (backend/tests/golden/parser) in one
+call and incrementally in token-sized chunks, as during streamed decoding.
+
+Usage:
+    python backend/benchmarks/bench_output_parser.py [--repeat 500] [--chunk 4]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from backend.app.output_parser import ExplanationParser, parse_explanation
+
+GOLDEN = Path(__file__).resolve().parents[1] / "tests" / "golden" / "parser"
+
+
+def _incremental(text: str, chunk: int):
+    parser = ExplanationParser(("warfarin", "aspirin"))
+    for i in range(0, len(text), chunk):
+        parser.feed(text[i:i + chunk])
+    return parser.close()
+
+
+def run(repeat: int, chunk: int):
+    texts = [path.read_text() for path in sorted(GOLDEN.glob("*.txt"))]
+    chars = sum(len(text) for text in texts)
+    print(f"📊 {len(texts)} stored replies ({chars} chars), {repeat} repeats")
+
+    for name, parse in [("one call", lambda t: parse_explanation(t, ("warfarin", "aspirin"))),
+                        (f"chunks of {chunk}", lambda t: _incremental(t, chunk))]:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for text in texts:
+                parse(text)
+        per_reply = (time.perf_counter() - start) * 1e6 / (repeat * len(texts))
+        print(f"   {name:<14} {per_reply:8.1f} µs/reply")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=500)
+    parser.add_argument("--chunk", type=int, default=4)
+    args = parser.parse_args()
+    run(args.repeat, args.chunk)
@@ -0,0 +1,72 @@
+"""
+Benchmark: SafetyGuard per-pattern re.search loop vs. the compiled RuleSet.
+
+Times both over typical explanation texts as the number of rules grows
+(synthetic locale-style rules are added to the built-in ones).
+
+Usage:
+    python backend/benchmarks/bench_safety.py [--rules 6 100 500] [--repeat 2000]
+"""
+
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from backend.app.safety import RuleSet, SafetyGuard, SafetyRule
+
+TEXTS = [
+    "Mechanism: Aspirin inhibits platelet aggregation while warfarin reduces clotting "
+    "factor synthesis.\nClinical: Increased risk of bleeding, bruising and GI haemorrhage.",
+    "Mechanism: Both drugs prolong the QT interval.\nClinical: Palpitations, dizziness; "
+    "monitor ECG and electrolytes. Patients should not stop taking medication without advice.",
+    "Your doctor may decrease the dose of one of these medicines.",
+]
+
+
+def _rules(count: int):
+    rules = list(SafetyGuard.RULES)
+    for i in range(len(rules), count):
+        rules.append(SafetyRule(f"locale_{i}", rf"\bphrase{i}x\s+(now|today)", (f"phrase{i}x",)))
+    return rules
+
+
+def _time(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in TEXTS:
+            fn(text)
+    return (time.perf_counter() - start) * 1e6 / (repeat * len(TEXTS))
+
+
+def run(rule_counts, repeat: int):
+    print(f"📊 SafetyGuard matching, {len(TEXTS)} texts x {repeat} repeats (µs per text)")
+    print(f"   {'rules':>6} {'loop':>10} {'compiled':>10} {'speedup':>8}")
+    for count in rule_counts:
+        rules = _rules(count)
+        patterns = [rule.pattern for rule in rules]
+        rule_set = RuleSet(rules)
+
+        def loop(text):
+            for pattern in patterns:
+                if re.search(pattern, text, re.IGNORECASE):
+                    return pattern
+            return None
+
+        for text in TEXTS:
+            assert (loop(text) is None) == (rule_set.search(text) is None)
+        loop_us = _time(loop, repeat)
+        compiled_us = _time(rule_set.search, repeat)
+        print(f"   {count:>6} {loop_us:10.1f} {compiled_us:10.1f} {loop_us / compiled_us:7.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rules", type=int, nargs="+", default=[6, 100, 500])
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+    run(args.rules, args.repeat)
@@ -0,0 +1,87 @@
+"""
+Benchmark: speculative (assisted) decoding vs the plain pipeline path.
+
+Generates explanations for knowledge-base interactions with the main model
+alone and with a draft model, reports tokens/sec and the draft acceptance
+rate (an estimate from forward-pass counts, see speculative.py), and checks
+that the parsed explanations are identical. Needs a GPU and both models.
+
+Usage:
+    python backend/benchmarks/bench_speculative.py --draft google/gemma-2-2b-it [--pairs 8] [--draft-tokens 5]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from backend.app.config import settings
+from backend.app.inference import RealMedGemmaInference
+from backend.app.interaction_logic import InteractionChecker
+from backend.app.metrics import metrics
+from backend.app.output_parser import parse_explanation
+from backend.app.prompts import PromptTemplates
+from backend.app.speculative import load_draft_model
+
+
+def _interactions(count: int):
+    checker = InteractionChecker()
+    pairs = [key.split("+") for key in checker.interactions]
+    interactions = [checker.check_interaction(a, b) for a, b in pairs]
+    return [i for i in interactions if i["risk_level"] != "none"][:count]
+
+
+def _generate_all(inference, interactions, max_new_tokens):
+    replies, tokens = [], 0
+    start = time.perf_counter()
+    for interaction in interactions:
+        prompt = PromptTemplates.format_explanation_prompt(interaction)
+        text = inference._generate([{"role": "user", "content": prompt}], max_new_tokens)
+        replies.append(text)
+        tokens += inference._count_tokens(text) or 0
+    return replies, tokens, time.perf_counter() - start
+
+
+def run(model: str, draft: str, pairs: int, draft_tokens: int, max_new_tokens: int):
+    inference = RealMedGemmaInference()
+    if not inference.load_model(model):
+        sys.exit("❌ Could not load the main model")
+    inference.warmup()
+    draft_model = load_draft_model(draft, num_tokens=draft_tokens)
+    interactions = _interactions(pairs)
+    print(f"📊 {len(interactions)} interactions, max_new_tokens={max_new_tokens}, "
+          f"{draft_tokens} draft tokens per step")
+
+    results = {}
+    for name, assistant in [("pipe", None), ("assisted", draft_model)]:
+        inference.draft_model = assistant
+        metrics.reset()
+        replies, tokens, seconds = _generate_all(inference, interactions, max_new_tokens)
+        results[name] = replies
+        line = f"   {name:<9} {tokens:6d} tokens {seconds:7.1f}s {tokens / seconds:7.1f} tok/s"
+        if assistant is not None:
+            rate = metrics.snapshot()["gauges"].get("speculative.acceptance_rate_estimate", 0.0)
+            line += f"   acceptance ~{rate:.0%}"
+        print(line)
+
+    same = sum(
+        parse_explanation(a, i["drug_pair"]) == parse_explanation(b, i["drug_pair"])
+        for a, b, i in zip(results["pipe"], results["assisted"], interactions)
+    )
+    print(f"   identical parsed explanations: {same}/{len(interactions)}")
+    if same != len(interactions):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--model", default=settings.MODEL_NAME)
+    parser.add_argument("--draft", default=settings.DRAFT_MODEL or "google/gemma-2-2b-it")
+    parser.add_argument("--pairs", type=int, default=8)
+    parser.add_argument("--draft-tokens", type=int, default=settings.DRAFT_NUM_TOKENS)
+    parser.add_argument("--max-new-tokens", type=int, default=settings.GEN_TOKENS_HIGH)
+    args = parser.parse_args()
+    run(args.model, args.draft, args.pairs, args.draft_tokens, args.max_new_tokens)
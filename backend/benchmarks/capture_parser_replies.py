@@ -0,0 +1,70 @@
+"""
+Capture real TxGemma replies as golden files for the output parser.
+
+Generates explanations for knowledge-base interactions with the loaded
+model and stores each raw reply as backend/tests/golden/parser/<name>.txt,
+recording model, pair, token budget and date in SOURCES.json. A small
+--max-new-tokens captures truncated replies. Needs a GPU and the model;
+afterwards review the replies and regenerate the expected output with
+`python -m backend.tests.test_output_parser`.
+
+Usage:
+    python backend/benchmarks/capture_parser_replies.py aspirin+warfarin [--max-new-tokens 96] [--name truncated_real]
+"""
+
+import argparse
+import datetime
+import json
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from backend.app.config import settings
+from backend.app.generation_profiles import select_profile
+from backend.app.inference import RealMedGemmaInference
+from backend.app.interaction_logic import InteractionChecker
+from backend.app.prompts import PromptTemplates
+
+GOLDEN = Path(__file__).resolve().parents[1] / "tests" / "golden" / "parser"
+
+
+def run(pairs, model: str, max_new_tokens: int, name: str):
+    inference = RealMedGemmaInference()
+    if not inference.load_model(model):
+        sys.exit("❌ Could not load the model")
+    checker = InteractionChecker()
+    sources_path = GOLDEN / "SOURCES.json"
+    sources = json.loads(sources_path.read_text())
+
+    for pair in pairs:
+        drug_a, drug_b = pair.split("+")
+        interaction = checker.check_interaction(drug_a, drug_b)
+        profile = select_profile(interaction)
+        budget = max_new_tokens or profile.max_new_tokens
+        prompt = PromptTemplates.format_explanation_prompt(interaction, profile.points)
+        reply = inference._generate([{"role": "user", "content": prompt}], budget)
+        case = name if name and len(pairs) == 1 else f"real_{drug_a}_{drug_b}_{budget}"
+        (GOLDEN / f"{case}.txt").write_text(reply + "\n")
+        sources[case] = {
+            "source": "captured",
+            "model": inference.model_name,
+            "pair": pair,
+            "max_new_tokens": budget,
+            "date": datetime.date.today().isoformat(),
+            "behaviour_changes": [],
+        }
+        print(f"   💾 {case}.txt ({len(reply)} chars)")
+
+    sources_path.write_text(json.dumps(dict(sorted(sources.items())), indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("pairs", nargs="+", help="drug_a+drug_b, as in interactions.json")
+    parser.add_argument("--model", default=settings.MODEL_NAME)
+    parser.add_argument("--max-new-tokens", type=int, default=0, help="default: the pair's generation profile")
+    parser.add_argument("--name", default="", help="file name for a single capture")
+    args = parser.parse_args()
+    run(args.pairs, args.model, args.max_new_tokens, args.name)
@@ -0,0 +1,83 @@
+"""
+Export EasyOCR's English detector (CRAFT) and recognizer (CRNN, english_g2) to ONNX.
+
+Needs easyocr + torch once, on any machine; the API nodes then only need
+onnxruntime (PSL_OCR_ENGINE=onnx, PSL_OCR_ONNX_MODEL_DIR=<out>).
+
+Usage:
+    python backend/scripts/export_ocr_onnx.py [--out models/onnx] [--quantize]
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from backend.app.config import settings
+from backend.app.ocr_onnx import DETECTOR_FILE, RECOGNIZER_FILE
+
+
+def export(out_dir: str, quantize: bool, opset: int = 17):
+    import easyocr
+    import torch
+
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+
+    print("📦 Loading EasyOCR (en) on CPU...")
+    reader = easyocr.Reader(["en"], gpu=False,
+                            model_storage_directory=settings.EASYOCR_MODEL_DIR or None)
+    detector = getattr(reader.detector, "module", reader.detector).eval()
+    recognizer = getattr(reader.recognizer, "module", reader.recognizer).eval()
+
+    class Recognizer(torch.nn.Module):
+        """CRNN forward without the (unused for CTC) text argument."""
+
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, image):
+            return self.model(image, None)
+
+    detector_path = out / DETECTOR_FILE
+    print(f"🔤 Exporting detector -> {detector_path}")
+    torch.onnx.export(
+        detector, torch.randn(1, 3, 640, 960), str(detector_path),
+        input_names=["image"], output_names=["scores", "feature"],
+        dynamic_axes={"image": {2: "height", 3: "width"},
+                      "scores": {1: "height", 2: "width"},
+                      "feature": {2: "height", 3: "width"}},
+        opset_version=opset,
+    )
+
+    recognizer_path = out / RECOGNIZER_FILE
+    print(f"🔤 Exporting recognizer -> {recognizer_path}")
+    torch.onnx.export(
+        Recognizer(recognizer), torch.randn(4, 1, 64, 256), str(recognizer_path),
+        input_names=["image"], output_names=["logits"],
+        dynamic_axes={"image": {0: "batch", 3: "width"}, "logits": {0: "batch", 1: "steps"}},
+        opset_version=opset,
+    )
+
+    if quantize:
+        # int8 weights for the LSTM / linear layers; the conv-heavy detector stays fp32
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        quantized = out / "recognizer.int8.onnx"
+        quantize_dynamic(str(recognizer_path), str(quantized), weight_type=QuantType.QInt8)
+        quantized.replace(recognizer_path)
+        print("   recognizer quantized (dynamic int8)")
+
+    print("✅ Done")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--out", default=settings.OCR_ONNX_MODEL_DIR)
+    parser.add_argument("--quantize", action="store_true",
+                        help="Dynamic int8 quantization of the recognizer")
+    parser.add_argument("--opset", type=int, default=17)
+    args = parser.parse_args()
+    export(args.out, args.quantize, args.opset)
@@ -0,0 +1,179 @@
+"""
+Reference copy of the reply parser that output_parser.py replaced
+(RealMedGemmaInference._parse_output_to_structure and its helpers, as they
+were before the single-pass parser). Kept unchanged so the golden replies
+can be checked against both implementations; do not fix bugs here.
+"""
+
+import re
+
+
+def _clean_markdown(text: str) -> str:
+    """Strip all markdown formatting so the frontend receives clean plain text."""
+    # Remove bold markers:  **text** → text
+    text = re.sub(r'\*\*(.+?)\*\*', r'\1', text)
+    # Remove remaining stray ** pairs
+    text = text.replace('**', '')
+    # Remove italic markers:  *text* → text  (but not bullet "* ")
+    text = re.sub(r'(?<!\s)\*([^\*\s][^\*]*?)\*', r'\1', text)
+    # Remove heading markers  ## text → text
+    text = re.sub(r'^#{1,4}\s*', '', text, flags=re.MULTILINE)
+    # Collapse multiple spaces / tabs
+    text = re.sub(r'[ \t]{2,}', ' ', text)
+    return text.strip()
+
+
+def _split_to_points(content: str) -> list:
+    """
+    Split a cleaned section into individual bullet points / paragraphs.
+    Returns at most 7 points per section.
+    """
+    content = content.strip()
+    if not content:
+        return []
+
+    points = []
+
+    # Strategy 1: split on bullet lines  (* item  or  - item)
+    bullet_parts = re.split(r'\n\s*[*\-•]\s+', '\n' + content)
+    for part in bullet_parts:
+        part = part.strip()
+        # Clean leftover markdown
+        part = re.sub(r'\*\*(.+?)\*\*', r'\1', part)
+        part = part.replace('**', '')
+        part = re.sub(r'^[-•*]\s*', '', part)
+        if part and len(part) > 10:
+            points.append(part)
+
+    if len(points) >= 2:
+        return points[:7]
+
+    # Strategy 2: split on newlines
+    lines = [l.strip() for l in content.split('\n') if l.strip()]
+    points = []
+    for line in lines:
+        line = re.sub(r'^[\d]+[.\)]\s*', '', line)
+        line = re.sub(r'^[-•*]\s*', '', line)
+        if line and len(line) > 10:
+            points.append(line)
+
+    if len(points) >= 2:
+        return points[:7]
+
+    # Strategy 3: split long block by sentences, group ~2 sentences per point
+    sentences = re.split(r'(?<=[.!?])\s+', content)
+    points = []
+    current = ""
+    for sent in sentences:
+        current += sent.strip() + " "
+        if len(current) > 60:
+            points.append(current.strip())
+            current = ""
+    if current.strip():
+        points.append(current.strip())
+
+    return points[:7]
+
+
+def legacy_parse(text: str, drug_pair) -> dict:
+    """Structured explanation from a raw reply, as the old parser built it."""
+    drug1 = drug_pair[0].title() if isinstance(drug_pair, (list, tuple)) else "Drug"
+    drug2 = drug_pair[1].title() if isinstance(drug_pair, (list, tuple)) and len(drug_pair) > 1 else "Drug"
+
+    text = text.strip()
+
+    result = {
+        "mechanism_of_interaction": [],
+        "clinical_manifestations": [],
+        "risk_factors": [],
+        "monitoring_recommendations": [],
+        "alternative_suggestions": []
+    }
+
+    header_re = re.compile(
+        r'\*{0,2}\s*\d+\.\s*'
+        r'(MECHANISM|SYMPTOMS|CLINICAL|RISK\s*FACTORS?|'
+        r'MONITORING|MONITOR|ALTERNATIVES?)\s*'
+        r'[:.\*]*\s*\*{0,2}\s*',
+        re.IGNORECASE
+    )
+    headers = list(header_re.finditer(text))
+
+    section_map = {
+        'MECHANISM':    'mechanism_of_interaction',
+        'SYMPTOMS':     'clinical_manifestations',
+        'CLINICAL':     'clinical_manifestations',
+        'RISK FACTORS': 'risk_factors',
+        'RISK FACTOR':  'risk_factors',
+        'RISK':         'risk_factors',
+        'MONITORING':   'monitoring_recommendations',
+        'MONITOR':      'monitoring_recommendations',
+        'ALTERNATIVES': 'alternative_suggestions',
+        'ALTERNATIVE':  'alternative_suggestions',
+    }
+
+    found_sections = 0
+    for i, hdr in enumerate(headers):
+        keyword = hdr.group(1).strip().upper()
+        key = section_map.get(keyword)
+        if not key:
+            for map_kw, map_key in section_map.items():
+                if keyword.startswith(map_kw[:4]):
+                    key = map_key
+                    break
+        if not key:
+            continue
+
+        start = hdr.end()
+        end = headers[i + 1].start() if i + 1 < len(headers) else len(text)
+        raw_section = text[start:end].strip()
+
+        raw_section = re.sub(
+            r'\*{0,2}\s*Consult your healthcare provider\.?\s*\*{0,2}\s*$',
+            '', raw_section, flags=re.IGNORECASE
+        ).strip()
+
+        raw_section = _clean_markdown(raw_section)
+
+        points = _split_to_points(raw_section)
+        if points:
+            result[key] = points
+            found_sections += 1
+
+    if found_sections == 0:
+        cleaned = _clean_markdown(text)
+        lines = [l.strip() for l in cleaned.split('\n') if l.strip()]
+        content_lines = []
+        for line in lines:
+            if re.match(r'^Drug Interaction Analysis', line, re.I):
+                continue
+            if re.match(r'^Consult your', line, re.I):
+                continue
+            line = re.sub(r'^[\d]+[.\)]\s*', '', line)
+            line = re.sub(r'^[-•*]\s*', '', line)
+            if len(line) > 15:
+                content_lines.append(line)
+
+        if content_lines:
+            n = len(content_lines)
+            slices = [0.30, 0.50, 0.65, 0.80, 1.0]
+            keys = list(result.keys())
+            prev = 0
+            for idx, frac in enumerate(slices):
+                end_i = max(prev + 1, int(n * frac))
+                result[keys[idx]] = content_lines[prev:end_i]
+                prev = end_i
+
+    defaults = {
+        "mechanism_of_interaction": f"The interaction between {drug1} and {drug2} involves pharmacological pathways that may alter drug efficacy or safety.",
+        "clinical_manifestations": f"The {drug1}-{drug2} combination may produce adverse clinical effects. Monitor for unusual symptoms.",
+        "risk_factors": "Elderly patients, those with renal or hepatic impairment, and patients on multiple medications are at higher risk.",
+        "monitoring_recommendations": "Regular monitoring of relevant lab values and clinical symptoms is recommended.",
+        "alternative_suggestions": "Discuss potential alternative medications or dosing strategies with your healthcare provider."
+    }
+    for key, default in defaults.items():
+        if not result[key]:
+            result[key] = [default]
+
+    result["_raw_response"] = text[:1500]
+    return result
@@ -0,0 +1,201 @@
+"""
+Unit tests for the text-only analysis endpoints (no OCR).
+"""
+
+import json
+import pytest
+from fastapi.testclient import TestClient
+from backend.app.api import endpoints
+from backend.app.main import app
+from backend.app.translation import Translator
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """API client with mock explanations and empty caches; OCR must never run."""
+    monkeypatch.setattr(endpoints, "real_inference", None)
+    monkeypatch.setattr(endpoints, "extract_segments",
+                        lambda *a: pytest.fail("OCR should not run"))
+    endpoints.analysis_flight.cache.clear()
+    endpoints.explanation_cache.clear()
+    yield TestClient(app)
+    endpoints.analysis_flight.cache.clear()
+    endpoints.explanation_cache.clear()
+
+
+class StubTranslator:
+    """Loaded-model stand-in: fixed explanations, prefixed (or fixed) translations."""
+
+    def __init__(self, reply=None):
+        self.reply = reply
+
+    def generate_explanation(self, interaction, prompt):
+        return {"mechanism_of_interaction": ["Additive bleeding risk."], "risk_factors": ["Older age."]}
+
+    def translate_batch(self, texts, target_lang):
+        return "\n".join(f"[{i}] {self.reply or f'{target_lang}: {text}'}"
+                         for i, text in enumerate(texts, start=1))
+
+
+def _events(body: str):
+    """Parse an SSE body into (event, data) pairs."""
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+class TestAnalyzeText:
+    """Test suite for /analyze-text and /analyze-text-stream."""
+
+    def test_interactions_from_text(self, client):
+        response = client.post("/api/v1/analyze-text",
+                               json={"texts": ["Warfarin 5mg", "ASPIRIN"]})
+        assert response.status_code == 200
+        result = response.json()
+        assert result["status"] == "success"
+        assert sorted(result["detected_drugs"]) == ["aspirin", "warfarin"]
+        assert result["interaction_count"] == 1
+        interaction = result["interactions"][0]
+        assert interaction["risk_level"] == "high"
+        assert interaction["ai_explanation"]
+        assert all(d["confidence"] > 0 for d in result["drug_details"])
+
+    def test_blank_input(self, client):
+        result = client.post("/api/v1/analyze-text", json={"texts": ["", "  "]}).json()
+        assert result["status"] == "warning"
+        assert result["interactions"] == []
+
+    def test_too_many_items(self, client, monkeypatch):
+        monkeypatch.setattr(endpoints.settings, "MAX_TEXT_ITEMS", 2)
+        response = client.post("/api/v1/analyze-text", json={"texts": ["a", "b", "c"]})
+        assert response.status_code == 413
+
+    def test_explanations_cached_per_pair(self, client, monkeypatch):
+        calls = []
+        original = endpoints.AIInference.generate_explanation
+
+        def counting(interaction):
+            calls.append(interaction["drug_pair"])
+            return original(interaction)
+
+        monkeypatch.setattr(endpoints.AIInference, "generate_explanation", counting)
+        client.post("/api/v1/analyze-text", json={"texts": ["warfarin", "aspirin"]})
+        # Different request (extra drug), same pair -> explanation reused
+        client.post("/api/v1/analyze-text", json={"texts": ["warfarin", "aspirin", "metformin"]})
+        assert calls.count(calls[0]) == 1
+
+    def test_stream_events(self, client):
+        response = client.post("/api/v1/analyze-text-stream",
+                               json={"texts": ["warfarin", "aspirin"]})
+        assert response.status_code == 200
+        events = _events(response.text)
+        assert [name for name, _ in events] == ["init", "interaction", "done"]
+        init = events[0][1]
+        assert init["interaction_count"] == 1
+        assert init["interactions_basic"][0]["ai_explanation"] is None
+        assert events[1][1]["interaction"]["ai_explanation"]
+
+    def test_stream_replays_finished_analysis(self, client):
+        body = {"texts": ["aspirin", "warfarin"]}
+        result = client.post("/api/v1/analyze-text", json=body).json()
+        # Same drugs, different order and case -> same cache entry
+        events = _events(client.post("/api/v1/analyze-text-stream",
+                                     json={"texts": ["WARFARIN", "aspirin"]}).text)
+        assert events[1][1]["interaction"] == result["interactions"][0]
+
+    def test_stream_sends_explanations_in_completion_order(self, client, monkeypatch):
+        import time
+        original = endpoints._explain
+        slow_pair = ["aspirin", "warfarin"]
+
+        def slow(interaction):
+            if sorted(interaction["drug_pair"]) == slow_pair:
+                time.sleep(0.3)
+            return original(interaction)
+
+        monkeypatch.setattr(endpoints, "_explain", slow)
+
+        events = _events(client.post("/api/v1/analyze-text-stream",
+                                     json={"texts": ["aspirin", "warfarin", "ibuprofen"]}).text)
+        basic = events[0][1]["interactions_basic"]
+        sent = [data for name, data in events if name == "interaction"]
+        assert sorted(data["index"] for data in sent) == [0, 1, 2]
+        # The slow pair arrives last, and its index still points at its init entry
+        assert sorted(sent[-1]["interaction"]["drug_pair"]) == slow_pair
+        assert basic[sent[-1]["index"]]["drug_pair"] == sent[-1]["interaction"]["drug_pair"]
+        assert sorted(basic[sent[0]["index"]]["drug_pair"]) != slow_pair
+
+    def test_whole_explanation_is_validated(self, client, monkeypatch):
+        def explanation(interaction):
+            return {"mechanism_of_interaction": ["Additive bleeding risk."],
+                    "alternative_suggestions": ["Safe point.", "Your doctor may decrease the dose."]}
+
+        monkeypatch.setattr(endpoints, "_explain", explanation)
+        result = client.post("/api/v1/analyze-text", json={"texts": ["warfarin", "aspirin"]}).json()
+        assert result["interactions"][0]["safety_alert"] is True
+
+    def test_language_versions_only_for_requested_languages(self, client, monkeypatch):
+        monkeypatch.setattr(endpoints, "real_inference", StubTranslator())
+        monkeypatch.setattr(endpoints, "translator", Translator())
+        plain = client.post("/api/v1/analyze-text", json={"texts": ["warfarin", "aspirin"]}).json()
+        assert "language_versions" not in plain["interactions"][0]
+
+        result = client.post("/api/v1/analyze-text",
+                             json={"texts": ["warfarin", "aspirin"], "languages": ["hi", "te"]}).json()
+        versions = result["interactions"][0]["language_versions"]
+        assert set(versions) == {"hi", "te"}
+        assert versions["hi"]["mechanism_of_interaction"] == ["Hindi: Additive bleeding risk."]
+        assert "translations_unavailable" not in result
+
+    def test_no_mock_translations_without_model(self, client, monkeypatch):
+        translator = Translator()
+        monkeypatch.setattr(endpoints, "translator", translator)
+        result = client.post("/api/v1/analyze-text",
+                             json={"texts": ["warfarin", "aspirin"], "languages": ["hi"]}).json()
+        assert "language_versions" not in result["interactions"][0]
+        assert result["translations_unavailable"] == ["hi"]
+        assert "MOCK" not in json.dumps(result)
+        assert len(translator.cache) == 0
+
+    def test_unsafe_translation_is_dropped(self, client, monkeypatch):
+        monkeypatch.setattr(endpoints, "real_inference",
+                            StubTranslator(reply="Your doctor may decrease the dose."))
+        monkeypatch.setattr(endpoints, "translator", Translator())
+        result = client.post("/api/v1/analyze-text",
+                             json={"texts": ["warfarin", "aspirin"], "languages": ["hi"]}).json()
+        interaction = result["interactions"][0]
+        assert interaction["safety_alert"] is False
+        assert interaction["language_versions"] == {}
+
+    def test_partial_translation_is_marked(self, client, monkeypatch):
+        stub = StubTranslator()
+        stub.translate_batch = lambda texts, target_lang: f"[1] {target_lang}: {texts[0]}\n[2]"
+        monkeypatch.setattr(endpoints, "real_inference", stub)
+        monkeypatch.setattr(endpoints, "translator", Translator())
+        result = client.post("/api/v1/analyze-text",
+                             json={"texts": ["warfarin", "aspirin"], "languages": ["hi"]}).json()
+        version = result["interactions"][0]["language_versions"]["hi"]
+        assert version["mechanism_of_interaction"] == ["Hindi: Additive bleeding risk."]
+        assert version["risk_factors"] == ["Older age."]
+        assert version["untranslated_sections"] == ["risk_factors"]
+
+    def test_unknown_language_rejected(self, client):
+        response = client.post("/api/v1/analyze-text", json={"texts": ["warfarin"], "languages": ["xx"]})
+        assert response.status_code == 400
+
+    def test_stream_translation_events(self, client, monkeypatch):
+        monkeypatch.setattr(endpoints, "real_inference", StubTranslator())
+        monkeypatch.setattr(endpoints, "translator", Translator())
+        events = _events(client.post("/api/v1/analyze-text-stream",
+                                     json={"texts": ["warfarin", "aspirin"], "languages": ["te"]}).text)
+        assert [name for name, _ in events] == ["init", "interaction", "translation", "done"]
+        translation = events[2][1]
+        assert translation["language"] == "te"
+        assert translation["explanations"][0]["risk_factors"] == ["Telugu: Older age."]
+
+    def test_stream_translation_unavailable_without_model(self, client):
+        events = _events(client.post("/api/v1/analyze-text-stream",
+                                     json={"texts": ["warfarin", "aspirin"], "languages": ["te"]}).text)
+        assert events[2] == ("translation", {"language": "te", "explanations": None, "unavailable": True})
@@ -0,0 +1,111 @@
+"""
+Unit tests for request coalescing (single-flight + TTL cache).
+"""
+
+import asyncio
+import threading
+import time
+import pytest
+from backend.app.coalesce import SingleFlight, TTLCache
+from backend.app.metrics import metrics
+
+
+class TestTTLCache:
+    """Test suite for the TTL result cache."""
+
+    def test_get_set(self):
+        cache = TTLCache(ttl=60)
+        cache.set("a", [1])
+        assert cache.get("a") == [1]
+        assert cache.get("missing") is None
+
+    def test_expiry(self):
+        cache = TTLCache(ttl=0.01)
+        cache.set("a", 1)
+        time.sleep(0.02)
+        assert cache.get("a") is None
+
+    def test_lru_eviction(self):
+        cache = TTLCache(ttl=60, max_entries=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")  # "b" is now least recently used
+        cache.set("c", 3)
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert len(cache) == 2
+
+
+class TestSingleFlight:
+    """Test suite for single-flight execution."""
+
+    @pytest.fixture(autouse=True)
+    def reset_metrics(self):
+        metrics.reset()
+
+    def test_concurrent_identical_requests_run_once(self):
+        calls = []
+        gate = threading.Event()
+
+        def work():
+            calls.append(1)
+            gate.wait(1)
+            return ["ASPIRIN"]
+
+        async def scenario():
+            flight = SingleFlight("test")
+            tasks = [asyncio.ensure_future(flight.run("same-hash", work)) for _ in range(5)]
+            await asyncio.sleep(0.05)
+            gate.set()
+            return await asyncio.gather(*tasks)
+
+        results = asyncio.run(scenario())
+        assert results == [["ASPIRIN"]] * 5
+        assert len(calls) == 1
+        assert metrics.get("test.executions") == 1
+        assert metrics.get("test.coalesced") == 4
+
+    def test_different_keys_run_separately(self):
+        async def scenario():
+            flight = SingleFlight("test")
+            return await asyncio.gather(
+                flight.run("a", lambda: "A"),
+                flight.run("b", lambda: "B"),
+            )
+
+        assert asyncio.run(scenario()) == ["A", "B"]
+        assert metrics.get("test.executions") == 2
+
+    def test_cache_serves_repeats(self):
+        calls = []
+
+        async def scenario():
+            flight = SingleFlight("test", TTLCache(ttl=60))
+            first = await flight.run("h", lambda: calls.append(1) or "result")
+            second = await flight.run("h", lambda: calls.append(1) or "result")
+            return first, second
+
+        assert asyncio.run(scenario()) == ("result", "result")
+        assert len(calls) == 1
+        assert metrics.get("test.cache_hits") == 1
+
+    def test_coroutine_functions_supported(self):
+        async def work():
+            return "async result"
+
+        async def scenario():
+            return await SingleFlight("test").run("h", work)
+
+        assert asyncio.run(scenario()) == "async result"
+
+    def test_errors_propagate_and_are_not_cached(self):
+        def broken():
+            raise ValueError("OCR failed")
+
+        async def scenario():
+            flight = SingleFlight("test", TTLCache(ttl=60))
+            with pytest.raises(ValueError, match="OCR failed"):
+                await flight.run("h", broken)
+            return await flight.run("h", lambda: "recovered")
+
+        assert asyncio.run(scenario()) == "recovered"
@@ -5,6 +5,7 @@ Tests drug name normalization and fuzzy matching.
 
 import pytest
 from backend.app.drug_db import DrugDatabase
+from backend.app.schemas import OCRSegment
 
 
 class TestDrugDatabase:
@@ -121,3 +122,39 @@ class TestDrugDatabase:
         # Very different strings
         score = drug_db._calculate_similarity('aspirin', 'xyz')
         assert score < 50.0
+    
+    def test_match_returns_score(self, drug_db):
+        """Test that match reports exact and fuzzy similarity."""
+        assert drug_db.match('aspirin') == ('aspirin', 100.0)
+        name, score = drug_db.match('asprin')
+        assert name == 'aspirin'
+        assert 80.0 <= score < 100.0
+        assert drug_db.match('xyz') is None
+    
+    def test_detect_confidence_from_segments(self, drug_db):
+        """Test that drug confidence combines OCR confidence and similarity."""
+        segments = [
+            OCRSegment('ASPIRIN 100MG', 0.9, (10, 10, 200, 30)),
+            OCRSegment('WARFARIN', 0.6, (10, 50, 200, 30)),
+        ]
+        drugs = {d.generic_name: d for d in drug_db.detect(segments)}
+        
+        assert set(drugs) == {'aspirin', 'warfarin'}
+        assert drugs['aspirin'].confidence == pytest.approx(0.9)
+        assert drugs['warfarin'].confidence == pytest.approx(0.6)
+        assert 'ecosprin' in [b.lower() for b in drugs['aspirin'].brand_names]
+    
+    def test_detect_skips_unusable_segments(self, drug_db):
+        """Test that low-confidence, tiny and letterless segments are not matched."""
+        segments = [
+            OCRSegment('WARFARIN', 0.1, (10, 10, 200, 30)),  # low confidence
+            OCRSegment('ASPIRIN', 0.9, (10, 10, 200, 4)),     # speck-sized box
+            OCRSegment('2024 10', 0.99),                      # no letters
+        ]
+        assert drug_db.detect(segments) == []
+    
+    def test_normalize_accepts_segments(self, drug_db):
+        """Test that normalize gives the same names for strings and segments."""
+        texts = ['ASPIRIN 100MG', 'WARFARIN 5MG']
+        segments = [OCRSegment(t, 0.95) for t in texts]
+        assert drug_db.normalize(segments) == drug_db.normalize(texts)
@@ -0,0 +1,105 @@
+"""
+Unit tests for the deterministic explanation templates.
+"""
+
+import pytest
+
+from backend.app.explanation_templates import (
+    MECHANISMS, TemplateEngine, compile_template, kb_point, match_mechanisms,
+    template_engine
+)
+from backend.app.inference import AIInference
+from backend.app.interaction_logic import InteractionChecker
+from backend.app.output_parser import SECTIONS
+from backend.app.safety import SafetyGuard
+
+
+@pytest.fixture(scope="module")
+def checker():
+    return InteractionChecker()
+
+
+class TestTemplates:
+    def test_compile_template(self):
+        render = compile_template("{drug1} and {drug2} ({drug1})")
+        assert render({"drug1": "Warfarin", "drug2": "Aspirin"}) == "Warfarin and Aspirin (Warfarin)"
+        assert compile_template("no fields")({}) == "no fields"
+
+    def test_match_mechanisms(self, checker):
+        assert match_mechanisms(checker.check_interaction("oxycodone", "alprazolam")) == ["cns_depression"]
+        assert match_mechanisms(checker.check_interaction("Tramadol", "Fluoxetine")) == ["serotonin", "metabolism"]
+        assert match_mechanisms(checker.check_interaction("metformin", "aspirin")) == []
+        assert match_mechanisms(checker.check_interaction("zolpidem", "aspirin")) == []
+
+    def test_every_kb_pair_has_mechanism_tags(self, checker):
+        for key, entry in checker.interactions.items():
+            tags = entry.get("mechanism_tags")
+            assert isinstance(tags, list), key
+            assert set(tags) <= set(MECHANISMS), key
+            # Only entries that record no relevant interaction may go without facts
+            if entry["risk_level"] in ("high", "moderate"):
+                assert tags, key
+
+    def test_kb_point_filters(self):
+        text = "Reduce digoxin dose by 30-50% if amiodarone is added. Monitor digoxin levels."
+        assert kb_point(text, skip_dosing=True) == ["Monitor digoxin levels."]
+        assert kb_point("Safe combination, commonly prescribed together") == []
+        assert kb_point("") == []
+
+
+class TestTemplateEngine:
+    """Explanations grounded in the knowledge base."""
+
+    def test_all_sections_from_kb(self, checker):
+        explanation = AIInference.generate_explanation(checker.check_interaction("warfarin", "aspirin"))
+        assert list(explanation) == SECTIONS
+        assert "HIGH risk" in explanation["mechanism_of_interaction"][0]
+        assert any("platelet aggregation" in p for p in explanation["mechanism_of_interaction"])
+        assert any("bruising" in p for p in explanation["clinical_manifestations"])
+        assert any("Coumadin" in p for p in explanation["risk_factors"])
+        assert all(1 <= len(points) <= 5 for points in explanation.values())
+
+    def test_every_kb_interaction_is_safe(self, checker):
+        for key in checker.interactions:
+            explanation = AIInference.generate_explanation(checker.check_interaction(*key.split("+")))
+            assert SafetyGuard.validate_explanation(explanation).is_safe, key
+            assert all(not any(ch in p for ch in "{}") for points in explanation.values() for p in points)
+
+    def test_unknown_pair(self, checker):
+        explanation = AIInference.generate_explanation(checker.check_interaction("zolpidem", "aspirin"))
+        assert explanation["mechanism_of_interaction"] == [
+            "No documented interaction between Zolpidem and Aspirin was found in the knowledge base."]
+
+    def test_memoized_per_pair(self, checker):
+        engine = TemplateEngine(brand_names={})
+        interaction = checker.check_interaction("fluoxetine", "tramadol")
+        first = engine.render(interaction)
+        first["risk_factors"].append("changed by a caller")
+        second = engine.render(interaction)
+        assert "changed by a caller" not in second["risk_factors"]
+        assert engine._render.cache_info().hits == 1
+
+    def test_deterministic(self, checker):
+        interaction = checker.check_interaction("lisinopril", "spironolactone")
+        assert template_engine.render(interaction) == TemplateEngine().render(interaction)
+
+    @pytest.mark.parametrize("drug_a, drug_b, absent", [
+        # Claims the KB free text only mentions in passing or negates
+        ("levothyroxine", "omeprazole", "irritate the stomach"),
+        ("metformin", "warfarin", "processes or carries"),
+        ("metformin", "warfarin", "blood clotting"),
+        ("aspirin", "warfarin", "irritate the stomach"),
+        ("ibuprofen", "warfarin", "irritate the stomach"),
+        ("ibuprofen", "lisinopril", "irritate the stomach"),
+    ])
+    def test_no_claims_beyond_the_pair(self, checker, drug_a, drug_b, absent):
+        explanation = TemplateEngine(brand_names={}).render(checker.check_interaction(drug_a, drug_b))
+        assert not any(absent in p for points in explanation.values() for p in points)
+
+    def test_no_interaction_pair_has_only_kb_points(self, checker):
+        explanation = TemplateEngine(brand_names={}).render(checker.check_interaction("metformin", "warfarin"))
+        assert explanation["mechanism_of_interaction"] == [
+            "The knowledge base rates the Metformin-Warfarin combination as LOW risk.",
+            "No direct interaction, but both require monitoring.",
+            "Source: Clinical practice (evidence: moderate).",
+        ]
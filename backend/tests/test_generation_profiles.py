@@ -0,0 +1,101 @@
+"""
+Unit tests for generation profiles (token budgets per interaction).
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.app.api import endpoints
+from backend.app.config import settings
+from backend.app.generation_profiles import record_utilisation, select_profile, templated_explanation
+from backend.app.inference import AIInference, RealMedGemmaInference
+from backend.app.interaction_logic import InteractionChecker
+from backend.app.main import app
+from backend.app.metrics import metrics
+from backend.app.output_parser import SECTIONS
+from backend.app.safety import SafetyGuard
+
+
+@pytest.fixture
+def checker():
+    return InteractionChecker()
+
+
+class TestSelectProfile:
+    """Profiles follow risk and evidence levels."""
+
+    def test_knowledge_base_pairs(self, checker):
+        assert select_profile(checker.check_interaction("warfarin", "aspirin")).name == "full"
+        assert select_profile(checker.check_interaction("zolpidem", "aspirin")).templated
+
+    def test_levels(self):
+        assert select_profile({"risk_level": "high", "evidence_level": "well-documented"}).max_new_tokens == settings.GEN_TOKENS_HIGH
+        assert select_profile({"risk_level": "moderate"}).name == "standard"
+        assert select_profile({"risk_level": "low", "evidence_level": "moderate"}).name == "short"
+        assert select_profile({"risk_level": "low", "evidence_level": "critical"}).name == "full"
+        assert select_profile({"risk_level": "unknown"}).templated
+        assert select_profile({"risk_level": "moderate", "evidence_level": "n/a"}).templated
+
+    def test_disabled(self, monkeypatch):
+        monkeypatch.setattr(settings, "GENERATION_PROFILES", False)
+        profile = select_profile({"risk_level": "unknown"})
+        assert profile.name == "full" and not profile.templated
+
+
+class TestTemplatedExplanation:
+    def test_unknown_pair(self, checker):
+        interaction = checker.check_interaction("zolpidem", "aspirin")
+        explanation = templated_explanation(interaction)
+        assert list(explanation) == SECTIONS
+        assert "Zolpidem" in explanation["mechanism_of_interaction"][0]
+        assert explanation["monitoring_recommendations"][0] == interaction["recommendation"] + "."
+        assert SafetyGuard.validate_explanation(explanation).is_safe
+
+
+class TestBudgets:
+    """Generation uses the profile budget and records its utilisation."""
+
+    def test_record_utilisation(self):
+        metrics.reset()
+        profile = select_profile({"risk_level": "low"})
+        record_utilisation(profile, profile.max_new_tokens // 2)
+        record_utilisation(profile, profile.max_new_tokens)
+        timings = metrics.snapshot()["timings"]
+        assert timings["generation.budget_utilisation.short"]["mean"] == pytest.approx(0.75)
+        assert metrics.get("generation.budget_exhausted.short") == 1
+
+    def test_generation_uses_profile_budget(self, monkeypatch):
+        metrics.reset()
+
+        class Pipe:
+            @staticmethod
+            def tokenizer(text, add_special_tokens=True):
+                return {"input_ids": text.split()}
+
+        inference = RealMedGemmaInference()
+        inference.pipe = Pipe()
+        budgets = []
+
+        def generate(messages, max_new_tokens=512):
+            budgets.append(max_new_tokens)
+            return "1. MECHANISM:\n- Both drugs lower blood pressure.", None
+
+        monkeypatch.setattr(inference, "_generate_checked", generate)
+        inference.generate_explanation({"drug_pair": ("a", "b"), "risk_level": "moderate"}, "prompt")
+        assert budgets == [settings.GEN_TOKENS_MODERATE]
+        assert metrics.snapshot()["timings"]["generation.tokens.standard"]["total"] == 8
+
+    def test_templated_pairs_skip_the_model(self, monkeypatch):
+        monkeypatch.setattr(endpoints, "real_inference", None)
+        monkeypatch.setattr(AIInference, "generate_explanation",
+                            staticmethod(lambda *a: pytest.fail("model should not run")))
+        endpoints.analysis_flight.cache.clear()
+        endpoints.explanation_cache.clear()
+
+        result = TestClient(app).post("/api/v1/analyze-text", json={"texts": ["zolpidem", "aspirin"]}).json()
+        endpoints.analysis_flight.cache.clear()
+        endpoints.explanation_cache.clear()
+        interaction = result["interactions"][0]
+        assert interaction["risk_level"] == "unknown"
+        assert interaction["ai_explanation"]["mechanism_of_interaction"]
+        assert not interaction["safety_alert"]
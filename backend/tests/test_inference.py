@@ -0,0 +1,301 @@
+"""
+Unit tests for batched explanation generation (pipeline replaced by a stub).
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from backend.app.inference import RealMedGemmaInference, SafetyStoppingCriteria, _GenerationJob
+from backend.app.safety import SafetyViolation
+
+
+class StubPipeline:
+    """Chat pipeline stand-in; the first call blocks until `release` is set."""
+
+    def __init__(self):
+        self.calls = []
+        self.budgets = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self, chats, **kwargs):
+        batched = isinstance(chats[0], list)
+        conversations = chats if batched else [chats]
+        self.calls.append(len(conversations))
+        self.budgets.append(kwargs.get("max_new_tokens"))
+        if len(self.calls) == 1:
+            self.started.set()
+            self.release.wait(5)
+        outputs = [[{"generated_text": chat + [{"role": "assistant", "content": "reply to " + chat[0]["content"]}]}]
+                   for chat in conversations]
+        return outputs if batched else outputs[0]
+
+
+class TestExplanationBatching:
+    """Concurrent generate calls share pipeline invocations."""
+
+    def test_single_call(self):
+        inference = RealMedGemmaInference()
+        inference.pipe = StubPipeline()
+        inference.pipe.release.set()
+        assert inference._generate([{"role": "user", "content": "a"}]) == "reply to a"
+        assert inference.pipe.calls == [1]
+
+    def test_queued_calls_are_batched(self):
+        inference = RealMedGemmaInference()
+        inference.batch_size = 8
+        pipe = inference.pipe = StubPipeline()
+
+        with ThreadPoolExecutor(5) as pool:
+            first = pool.submit(inference._generate, [{"role": "user", "content": "p0"}])
+            pipe.started.wait(5)
+            rest = [pool.submit(inference._generate, [{"role": "user", "content": f"p{i}"}])
+                    for i in range(1, 5)]
+            while len(inference._pending) < 4:
+                threading.Event().wait(0.01)
+            pipe.release.set()
+            replies = [first.result()] + [f.result() for f in rest]
+
+        assert replies == [f"reply to p{i}" for i in range(5)]
+        assert pipe.calls == [1, 4]
+
+    def test_batch_size_limit(self):
+        inference = RealMedGemmaInference()
+        inference.batch_size = 2
+        pipe = inference.pipe = StubPipeline()
+
+        with ThreadPoolExecutor(5) as pool:
+            first = pool.submit(inference._generate, [{"role": "user", "content": "p0"}])
+            pipe.started.wait(5)
+            rest = [pool.submit(inference._generate, [{"role": "user", "content": f"p{i}"}])
+                    for i in range(1, 5)]
+            while len(inference._pending) < 4:
+                threading.Event().wait(0.01)
+            pipe.release.set()
+            [f.result() for f in [first] + rest]
+
+        assert pipe.calls == [1, 2, 2]
+
+    def test_mixed_budgets_are_not_batched_together(self):
+        inference = RealMedGemmaInference()
+        inference.batch_size = 8
+        pipe = inference.pipe = StubPipeline()
+
+        with ThreadPoolExecutor(5) as pool:
+            first = pool.submit(inference._generate, [{"role": "user", "content": "p0"}], 512)
+            pipe.started.wait(5)
+            rest = [pool.submit(inference._generate, [{"role": "user", "content": f"p{i}"}], budget)
+                    for i, budget in enumerate([192, 512, 192, 512], start=1)]
+            while len(inference._pending) < 4:
+                threading.Event().wait(0.01)
+            pipe.release.set()
+            [f.result() for f in [first] + rest]
+
+        assert pipe.calls == [1, 2, 2]
+        assert pipe.budgets[0] == 512
+        assert sorted(pipe.budgets[1:]) == [192, 512]
+
+    def test_pipeline_error_reaches_every_caller(self):
+        inference = RealMedGemmaInference()
+
+        def failing(*args, **kwargs):
+            raise RuntimeError("CUDA out of memory")
+
+        inference.pipe = failing
+        explanation = inference.generate_explanation(
+            {"drug_pair": ("aspirin", "warfarin"), "risk_level": "high"}, "prompt")
+        # Falls back to the mock explanation
+        assert explanation["mechanism_of_interaction"]
+
+
+class CharTokenizer:
+    """One token per character (ids are code points)."""
+
+    def decode(self, ids, skip_special_tokens=True):
+        return "".join(chr(i) for i in ids if i)
+
+
+class TokenIds:
+    """Minimal stand-in for the input_ids tensor a stopping criterion receives."""
+
+    def __init__(self, rows):
+        self.rows = [list(row) for row in rows]
+        self.shape = (len(self.rows), len(self.rows[0]))
+
+    def __getitem__(self, index):
+        _, columns = index
+        return TokenIds([row[columns] for row in self.rows])
+
+    def tolist(self):
+        return self.rows
+
+    def new_tensor(self, flags):
+        return Flags(flags)
+
+
+class Flags(list):
+    def bool(self):
+        return list(self)
+
+
+class TestSafetyStopping:
+    """Generation stops as soon as a sequence turns unsafe."""
+
+    def test_stops_only_the_unsafe_row(self):
+        criteria = SafetyStoppingCriteria(CharTokenizer(), rows=2)
+        rows = ["Monitor bleeding.\nAvoid NSAIDs.", "Monitor.\nYou may increase the dose later"]
+        stops = []
+        for step in range(max(map(len, rows))):
+            stops.append(criteria.update([[ord(r[step])] if step < len(r) else [0] for r in rows]))
+
+        assert not any(flags[0] for flags in stops)
+        first_stop = next(step for step, flags in enumerate(stops) if flags[1])
+        assert rows[1][:first_stop + 1].endswith("increase the dose")
+        assert criteria.guards[1].violation.rule_id == "dose_change"
+
+    def test_several_tokens_per_step(self):
+        # Assisted decoding appends a variable number of accepted tokens per call
+        prompt = [ord(c) for c in "PROMPT: say it"]
+        reply = "Monitor.\nYou may increase the dose later"
+        criteria = SafetyStoppingCriteria(CharTokenizer(), rows=1, prompt_len=len(prompt))
+        ids, stopped_at = list(prompt), None
+        for start in range(0, len(reply), 5):
+            ids += [ord(c) for c in reply[start:start + 5]]
+            if criteria(TokenIds([ids]), None)[0]:
+                stopped_at = len(ids) - len(prompt)
+                break
+
+        violation = criteria.guards[0].violation
+        assert violation.rule_id == "dose_change"
+        assert "increase the dose" in reply[:stopped_at]
+        # Span is in reply coordinates: no prompt text and no token fed twice
+        assert violation.span[0] == reply.index("increase the dose")
+
+    def test_prompt_length_of_padded_batch(self):
+        class ChatTokenizer(CharTokenizer):
+            def apply_chat_template(self, messages, add_generation_prompt=False):
+                return [ord(c) for m in messages for c in m["content"]] + [0] * add_generation_prompt
+
+        inference = RealMedGemmaInference()
+        inference.pipe = type("Pipe", (), {"tokenizer": ChatTokenizer()})()
+        jobs = [_GenerationJob([{"role": "user", "content": text}], None, 32) for text in ("short", "longer one")]
+        assert inference._safety_criteria(jobs).prompt_len == len("longer one") + 1
+
+    def test_stopped_generation_is_flagged(self, monkeypatch):
+        inference = RealMedGemmaInference()
+        inference.pipe = object()
+        violation = SafetyViolation("dose_change", "increase the dose", (10, 27))
+        monkeypatch.setattr(inference, "_generate_checked",
+                            lambda messages, max_new_tokens=512: ("Mechanism: increase the dose", violation))
+
+        explanation = inference.generate_explanation(
+            {"drug_pair": ("aspirin", "warfarin"), "risk_level": "high"}, "prompt")
+        assert explanation["safety_violation"] == "dose_change"
+
+    def test_stopped_retry_is_flagged(self, monkeypatch):
+        inference = RealMedGemmaInference()
+        inference.pipe = object()
+        violation = SafetyViolation("dose_change", "increase the dose", (10, 27))
+        replies = iter([("", None), ("Mechanism: increase the dose", violation)])
+        monkeypatch.setattr(inference, "_generate_checked",
+                            lambda messages, max_new_tokens=512: next(replies))
+
+        explanation = inference.generate_explanation(
+            {"drug_pair": ("aspirin", "warfarin"), "risk_level": "high"}, "prompt")
+        assert explanation["safety_violation"] == "dose_change"
+
+
+class HookedModule:
+    """Module stand-in supporting forward hooks."""
+
+    def __init__(self):
+        self.hooks = {}
+
+    def register_forward_hook(self, hook):
+        key = object()
+        self.hooks[key] = hook
+        module = self
+
+        class Handle:
+            def remove(self):
+                del module.hooks[key]
+
+        return Handle()
+
+    def forward(self):
+        for hook in list(self.hooks.values()):
+            hook(self, (), None)
+
+
+class AssistedPipeline:
+    """
+    Pipeline stand-in for assisted generation: per reply, 3 verification
+    passes of the main model and 6 draft passes (so 5 of 6 draft tokens
+    are accepted for an 8-token reply).
+    """
+
+    def __init__(self):
+        self.model = HookedModule()
+        self.calls = []
+
+    @staticmethod
+    def tokenizer(text, add_special_tokens=True):
+        return {"input_ids": text.split()}
+
+    def __call__(self, chat, **kwargs):
+        self.calls.append(kwargs)
+        draft = kwargs["assistant_model"]
+        for _ in range(3):
+            for _ in range(2):
+                draft.forward()
+            self.model.forward()
+        reply = "one two three four five six seven eight"
+        return [{"generated_text": chat + [{"role": "assistant", "content": reply}]}]
+
+
+class TestSpeculativeDecoding:
+    """Assisted generation with a draft model."""
+
+    def test_acceptance(self):
+        from backend.app.speculative import acceptance
+        assert acceptance(new_tokens=8, target_steps=3, draft_steps=6) == (5, 6)
+        assert acceptance(new_tokens=3, target_steps=3, draft_steps=6) == (0, 6)
+        # Stopped after fewer tokens than passes: clamped, never negative
+        assert acceptance(new_tokens=2, target_steps=3, draft_steps=6) == (0, 6)
+
+    def test_safety_stop_is_not_estimated(self, monkeypatch):
+        from backend.app.config import settings
+        from backend.app.metrics import metrics
+        monkeypatch.setattr(settings, "SAFETY_STOP_GENERATION", False)  # needs transformers
+        metrics.reset()
+        inference = RealMedGemmaInference()
+        inference.pipe = AssistedPipeline()
+        inference.draft_model = HookedModule()
+        violation = SafetyViolation("dose_change", "increase the dose", (4, 21))
+
+        def stopped(jobs, kwargs):
+            # All passes ran, but the reply was cut short by the guard
+            inference.pipe(jobs[0].messages, **kwargs)
+            return [("one two", violation)]
+
+        monkeypatch.setattr(inference, "_decode", stopped)
+        assert inference._generate_checked([{"role": "user", "content": "a"}], 64) == ("one two", violation)
+        snapshot = metrics.snapshot()
+        assert snapshot["counters"]["speculative.safety_stops"] == 1
+        assert "speculative.generations" not in snapshot["counters"]
+        assert "speculative.acceptance_rate_estimate" not in snapshot["gauges"]
+
+    def test_draft_model_is_used_per_conversation(self, monkeypatch):
+        from backend.app.config import settings
+        from backend.app.metrics import metrics
+        monkeypatch.setattr(settings, "SAFETY_STOP_GENERATION", False)  # needs transformers
+        metrics.reset()
+        inference = RealMedGemmaInference()
+        inference.pipe = AssistedPipeline()
+        inference.draft_model = HookedModule()
+
+        reply = inference._generate([{"role": "user", "content": "a"}], 64)
+        assert reply == "one two three four five six seven eight"
+        assert inference.pipe.calls[0]["assistant_model"] is inference.draft_model
+        assert metrics.snapshot()["gauges"]["speculative.acceptance_rate_estimate"] == 5 / 6
+        # Hooks are removed after the generation
+        assert not inference.pipe.model.hooks and not inference.draft_model.hooks
@@ -0,0 +1,60 @@
+"""
+Unit tests for lazy imports (API cold start).
+"""
+
+import subprocess
+import sys
+from pathlib import Path
+import pytest
+from backend.app.lazy import LazyModule, ensure_loaded, is_loaded, lazy_import
+
+ROOT = Path(__file__).resolve().parents[2]
+
+
+@pytest.fixture
+def fake_module(tmp_path, monkeypatch):
+    """A throwaway module on sys.path that records when it is imported."""
+    (tmp_path / "psl_lazy_probe.py").write_text("VALUE = 42\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delitem(sys.modules, "psl_lazy_probe", raising=False)
+    yield "psl_lazy_probe"
+    sys.modules.pop("psl_lazy_probe", None)
+
+
+class TestLazyImports:
+    """Test suite for deferred heavy imports."""
+
+    def test_import_deferred_until_attribute_access(self, fake_module):
+        module = lazy_import(fake_module)
+        assert isinstance(module, LazyModule)
+        assert fake_module not in sys.modules
+        assert not is_loaded(module)
+
+        assert module.VALUE == 42
+        assert fake_module in sys.modules
+        assert is_loaded(module)
+
+    def test_already_imported_module_returned_as_is(self):
+        assert lazy_import("json") is sys.modules["json"]
+
+    def test_ensure_loaded(self, fake_module):
+        module = lazy_import(fake_module)
+        ensure_loaded(module)
+        assert fake_module in sys.modules
+
+    def test_missing_module_fails_on_use(self):
+        module = lazy_import("psl_no_such_module")
+        with pytest.raises(ImportError):
+            module.anything
+
+    def test_api_import_skips_heavy_libraries(self):
+        """Importing the app must not pull in torch / OpenCV / numpy / OCR engines."""
+        code = (
+            "import sys, backend.app.main\n"
+            "print(','.join(m for m in ('torch', 'cv2', 'numpy', 'PIL', 'pytesseract', 'easyocr')"
+            " if m in sys.modules))"
+        )
+        proc = subprocess.run([sys.executable, "-c", code], cwd=ROOT,
+                              capture_output=True, text=True, timeout=120)
+        assert proc.returncode == 0, proc.stderr
+        assert proc.stdout.strip() == ""
@@ -0,0 +1,179 @@
+"""
+Unit tests for the OpenAI-compatible LLM client (against a local fake server).
+"""
+
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from backend.app.config import settings
+from backend.app.llm_client import LLMServerError, OpenAICompatibleInference
+from backend.app.metrics import metrics
+
+REPLY = ("1. MECHANISM:\n- Both drugs impair hemostasis.\n"
+         "2. SYMPTOMS:\n- Bruising and bleeding gums.\n")
+INTERACTION = {"drug_pair": ("warfarin", "aspirin"), "risk_level": "high", "evidence_level": "well-documented"}
+
+
+class FakeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.0"
+
+    def log_message(self, *args):
+        pass
+
+    def _json(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == "/v1/models":
+            self._json(200, {"data": [{"id": "txgemma"}]})
+        else:
+            self._json(404, {"error": "not found"})
+
+    def do_POST(self):
+        server = self.server
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with server.lock:
+            server.requests.append(payload)
+            if server.failures > 0:
+                server.failures -= 1
+                self._json(503, {"error": "overloaded"})
+                return
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        try:
+            time.sleep(server.delay)
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.end_headers()
+            words = server.reply.split(" ")
+            for i, word in enumerate(words):
+                chunk = {"choices": [{"index": 0, "delta": {"content": word + (" " if i < len(words) - 1 else "")}}]}
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            usage = {"choices": [], "usage": {"completion_tokens": len(words)}}
+            self.wfile.write(f"data: {json.dumps(usage)}\n\ndata: [DONE]\n\n".encode())
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # client closed the stream early
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), FakeHandler)
+    httpd.lock = threading.Lock()
+    httpd.requests, httpd.failures, httpd.delay, httpd.reply = [], 0, 0.0, REPLY
+    httpd.in_flight = httpd.max_in_flight = 0
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _client(server, **kwargs):
+    options = {"retry_backoff": 0.01, **kwargs}
+    client = OpenAICompatibleInference(f"http://127.0.0.1:{server.server_address[1]}/v1", "txgemma", **options)
+    assert client.load_model()
+    return client
+
+
+class TestOpenAICompatibleInference:
+    """Explanations through a local OpenAI-compatible server."""
+
+    def test_explanation_is_streamed_and_parsed(self, server):
+        metrics.reset()
+        client = _client(server)
+        try:
+            explanation = client.generate_explanation(INTERACTION, "prompt")
+        finally:
+            client.close()
+        assert explanation["mechanism_of_interaction"] == ["Both drugs impair hemostasis."]
+        payload = server.requests[0]
+        assert payload["stream"] is True
+        assert payload["max_tokens"] == settings.GEN_TOKENS_HIGH
+        assert payload["messages"] == [{"role": "user", "content": "prompt"}]
+        assert metrics.get("llm.completion_tokens") > 0
+
+    def test_unreachable_server(self):
+        client = OpenAICompatibleInference("http://127.0.0.1:9/v1", "txgemma", connect_timeout=0.5)
+        try:
+            assert not client.load_model()
+        finally:
+            client.close()
+
+    def test_retries_overloaded_server(self, server):
+        metrics.reset()
+        server.failures = 2
+        client = _client(server, retries=2)
+        try:
+            assert client._generate([{"role": "user", "content": "a"}]) == REPLY.strip()
+        finally:
+            client.close()
+        assert metrics.get("llm.retries") == 2
+
+    def test_gives_up_after_retries(self, server):
+        server.failures = 5
+        client = _client(server, retries=1)
+        try:
+            with pytest.raises(LLMServerError):
+                client._generate([{"role": "user", "content": "a"}])
+            # generate_explanation falls back to the mock explanation
+            server.failures = 5
+            assert client.generate_explanation(INTERACTION, "prompt")["mechanism_of_interaction"]
+        finally:
+            client.close()
+
+    def test_timeout(self, server):
+        server.delay = 1.0
+        client = _client(server, timeout=0.2, retries=0)
+        try:
+            with pytest.raises(LLMServerError):
+                client._generate([{"role": "user", "content": "a"}])
+        finally:
+            client.close()
+
+    def test_concurrency_limit(self, server):
+        server.delay = 0.1
+        client = _client(server, max_concurrency=2)
+        try:
+            with ThreadPoolExecutor(6) as pool:
+                replies = list(pool.map(lambda i: client._generate([{"role": "user", "content": str(i)}]), range(6)))
+        finally:
+            client.close()
+        assert replies == [REPLY.strip()] * 6
+        assert server.max_in_flight == 2
+
+    def test_safety_stop_closes_stream(self, server, monkeypatch):
+        monkeypatch.setattr(settings, "SAFETY_STOP_GENERATION", True)
+        server.reply = "1. MECHANISM:\n- You may increase the dose of warfarin later on today."
+        client = _client(server)
+        try:
+            explanation = client.generate_explanation(INTERACTION, "prompt")
+            text, violation = client._generate_checked([{"role": "user", "content": "a"}])
+        finally:
+            client.close()
+        assert explanation["safety_violation"] == "dose_change"
+        assert violation.rule_id == "dose_change"
+        assert text.endswith("increase the dose")
+
+    def test_json_mode_requests_schema(self, server, monkeypatch):
+        monkeypatch.setattr(settings, "EXPLANATION_FORMAT", "json")
+        server.reply = json.dumps({"mechanism_of_interaction": ["Both drugs impair hemostasis."]})
+        client = _client(server)
+        try:
+            explanation = client.generate_explanation(INTERACTION, "prompt")
+        finally:
+            client.close()
+        assert explanation["mechanism_of_interaction"] == ["Both drugs impair hemostasis."]
+        assert server.requests[0]["response_format"]["type"] == "json_schema"
@@ -0,0 +1,179 @@
+"""
+Unit tests for the shared model server.
+Runs a server in a background thread with stub OCR / inference.
+"""
+
+import os
+import stat
+import threading
+import pytest
+from backend.app.model_server import ModelServer, ModelServerClient, is_local_address, parse_address
+from backend.app.ocr import ImageDecodeError, extract_segments
+from backend.app.schemas import OCRSegment
+
+
+AUTHKEY = b"test-key"
+
+
+class StubInference:
+    """Records calls instead of running a model."""
+
+    def __init__(self):
+        self.prompts = []
+
+    def generate_explanation(self, interaction_data, prompt):
+        self.prompts.append(prompt)
+        return {"mechanism_of_interaction": [f"stub for {interaction_data['drug_pair'][0]}"]}
+
+
+def _start(tmp_path, inference=None, ocr=None):
+    server = ModelServer(str(tmp_path / "psl.sock"), AUTHKEY,
+                         inference=inference,
+                         ocr=ocr or (lambda image: [OCRSegment("ASPIRIN 100MG", 0.9, (0, 0, 120, 20)),
+                                                    OCRSegment(repr(image), 0.5)]),
+                         ocr_batch=lambda images: [[OCRSegment("ASPIRIN 100MG", 0.9)] for _ in images])
+    server.start()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class TestModelServer:
+    """Test suite for model server IPC."""
+
+    def test_parse_address(self):
+        assert parse_address("/tmp/psl.sock") == "/tmp/psl.sock"
+        assert parse_address("127.0.0.1:7000") == ("127.0.0.1", 7000)
+        assert parse_address(":7000") == ("127.0.0.1", 7000)
+
+    def test_is_local_address(self):
+        assert is_local_address("/tmp/psl.sock")
+        assert is_local_address(("127.0.0.1", 7000))
+        assert is_local_address(("::1", 7000))
+        assert is_local_address(("localhost", 7000))
+        assert not is_local_address(("0.0.0.0", 7000))
+        assert not is_local_address(("10.0.0.5", 7000))
+        assert not is_local_address(("models.internal", 7000))
+
+    def test_requires_authkey(self, tmp_path):
+        with pytest.raises(ValueError, match="authkey"):
+            ModelServer(str(tmp_path / "psl.sock"), b"", ocr=len, ocr_batch=len)
+        with pytest.raises(ValueError, match="authkey"):
+            ModelServerClient(str(tmp_path / "psl.sock"), b"")
+
+    def test_refuses_remote_bind_without_opt_in(self):
+        with pytest.raises(ValueError, match="non-loopback"):
+            ModelServer(("0.0.0.0", 0), AUTHKEY, ocr=len, ocr_batch=len)
+        # Explicit opt-in is accepted (not started here)
+        ModelServer(("0.0.0.0", 0), AUTHKEY, ocr=len, ocr_batch=len, allow_remote=True)
+
+    def test_socket_is_owner_only(self, tmp_path):
+        server = _start(tmp_path)
+        try:
+            assert stat.S_IMODE(os.stat(server.address).st_mode) == 0o600
+        finally:
+            server.stop()
+
+    def test_wrong_authkey_rejected(self, tmp_path):
+        server = _start(tmp_path)
+        client = ModelServerClient(server.address, b"other-key")
+        try:
+            with pytest.raises(Exception):
+                client.ping()
+        finally:
+            client.close()
+            server.stop()
+
+    def test_ping_reports_model_state(self, tmp_path):
+        server = _start(tmp_path, inference=StubInference())
+        client = ModelServerClient(server.address, AUTHKEY)
+        try:
+            assert client.ping() == {"model_loaded": True}
+        finally:
+            client.close()
+            server.stop()
+
+    def test_extract_text_round_trip(self, tmp_path):
+        server = _start(tmp_path)
+        client = ModelServerClient(server.address, AUTHKEY)
+        try:
+            assert client.extract_text(b"\xff\xd8jpeg") == ["ASPIRIN 100MG", repr(b"\xff\xd8jpeg")]
+        finally:
+            client.close()
+            server.stop()
+
+    def test_extract_segments_keep_confidence(self, tmp_path):
+        server = _start(tmp_path)
+        client = ModelServerClient(server.address, AUTHKEY)
+        try:
+            segments = client.extract_segments(b"front")
+            assert segments[0] == OCRSegment("ASPIRIN 100MG", 0.9, (0, 0, 120, 20))
+            assert isinstance(segments[0], OCRSegment)
+        finally:
+            client.close()
+            server.stop()
+
+    def test_extract_text_batch_round_trip(self, tmp_path):
+        server = _start(tmp_path)
+        client = ModelServerClient(server.address, AUTHKEY)
+        try:
+            assert client.extract_text_batch([b"front", b"back"]) == [["ASPIRIN 100MG"], ["ASPIRIN 100MG"]]
+        finally:
+            client.close()
+            server.stop()
+
+    def test_generate_explanation_uses_shared_model(self, tmp_path):
+        inference = StubInference()
+        server = _start(tmp_path, inference=inference)
+        client = ModelServerClient(server.address, AUTHKEY)
+        try:
+            result = client.generate_explanation({"drug_pair": ("aspirin", "warfarin")}, "PROMPT")
+            assert result == {"mechanism_of_interaction": ["stub for aspirin"]}
+            assert inference.prompts == ["PROMPT"]
+        finally:
+            client.close()
+            server.stop()
+
+    def test_mock_fallback_without_model(self, tmp_path):
+        server = _start(tmp_path)
+        client = ModelServerClient(server.address, AUTHKEY)
+        try:
+            result = client.generate_explanation({"drug_pair": ("aspirin", "warfarin")}, "PROMPT")
+            assert len(result["mechanism_of_interaction"]) > 0
+        finally:
+            client.close()
+            server.stop()
+
+    def test_server_errors_are_raised(self, tmp_path):
+        def broken_ocr(image):
+            raise ValueError(f"Failed to load image: {image}")
+
+        server = _start(tmp_path, ocr=broken_ocr)
+        client = ModelServerClient(server.address, AUTHKEY)
+        try:
+            with pytest.raises(RuntimeError, match="Failed to load image"):
+                client.extract_text("missing.jpg")
+            # Connection is still usable after an error
+            assert client.ping() == {"model_loaded": False}
+        finally:
+            client.close()
+            server.stop()
+
+    def test_invalid_image_is_raised_as_such(self, tmp_path):
+        server = _start(tmp_path, ocr=extract_segments)
+        client = ModelServerClient(server.address, AUTHKEY)
+        try:
+            with pytest.raises(ImageDecodeError, match="Failed to decode"):
+                client.extract_segments(b"not an image")
+        finally:
+            client.close()
+            server.stop()
+
+    def test_no_mock_translation_without_model(self, tmp_path):
+        server = _start(tmp_path)
+        client = ModelServerClient(server.address, AUTHKEY)
+        try:
+            with pytest.raises(RuntimeError, match="No translation model"):
+                client.translate_batch(["Bruising."], "Hindi")
+        finally:
+            client.close()
+            server.stop()
@@ -0,0 +1,179 @@
+"""
+Unit tests for the perceptual OCR cache (dHash + Hamming lookup, LRU, sqlite tier).
+"""
+
+import cv2
+import numpy as np
+import pytest
+from backend.app.ocr_cache import (
+    PerceptualOCRCache, dhash, hamming, text_signature, text_similarity
+)
+from backend.app.metrics import metrics
+from backend.app.schemas import OCRSegment
+
+
+def _strip_photo(seed: int = 0, word: str = "ASPIRIN") -> np.ndarray:
+    """Synthetic 'photo': textured background with a few printed labels."""
+    rng = np.random.default_rng(seed)
+    img = cv2.GaussianBlur(rng.integers(120, 255, (480, 640), dtype=np.uint8), (31, 31), 0)
+    for _ in range(5):
+        x, y = rng.integers(20, 500), rng.integers(20, 400)
+        cv2.putText(img, word, (int(x), int(y)), cv2.FONT_HERSHEY_SIMPLEX, 1.5, 0, 3)
+    return cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+
+
+def _jpeg(img: np.ndarray, quality: int = 90) -> bytes:
+    return cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, quality])[1].tobytes()
+
+
+SEGMENTS = [OCRSegment("ASPIRIN 100MG", 0.9, (10, 10, 200, 30))]
+
+
+class TestDHash:
+    """Test suite for the perceptual hash."""
+
+    def test_near_duplicates_are_close(self):
+        img = _strip_photo()
+        base = dhash(_jpeg(img, 95))
+        recompressed = dhash(_jpeg(img, 40))
+        resized = dhash(_jpeg(cv2.resize(img, (800, 600))))
+        brighter = dhash(_jpeg(cv2.convertScaleAbs(img, alpha=1.1, beta=15)))
+
+        assert hamming(base, recompressed) <= 6
+        assert hamming(base, resized) <= 6
+        assert hamming(base, brighter) <= 6
+
+    def test_different_images_are_far(self):
+        assert hamming(dhash(_jpeg(_strip_photo(0))), dhash(_jpeg(_strip_photo(1)))) > 10
+
+    def test_undecodable_bytes(self):
+        assert dhash(b"not an image") is None
+        assert dhash(b"") is None
+
+    def test_same_layout_different_text_collides(self):
+        # Why the cache also checks text signatures
+        aspirin = dhash(_jpeg(_strip_photo(word="ASPIRIN")))
+        warfarin = dhash(_jpeg(_strip_photo(word="WARFARIN")))
+        assert hamming(aspirin, warfarin) <= 6
+
+
+class TestTextSignature:
+    """Test suite for the text-stroke signature."""
+
+    def test_near_duplicates_match(self):
+        img = _strip_photo()
+        base = text_signature(_jpeg(img, 95))
+        resized = text_signature(_jpeg(cv2.resize(img, (800, 600))))
+        brighter = text_signature(_jpeg(cv2.convertScaleAbs(img, alpha=1.1, beta=15)))
+
+        assert text_similarity(base, resized) >= 0.9
+        assert text_similarity(base, brighter) >= 0.9
+
+    def test_different_text_same_layout(self):
+        for seed in range(3):
+            aspirin = text_signature(_jpeg(_strip_photo(seed, "ASPIRIN")))
+            for word in ("WARFARIN", "METFORMIN"):
+                other = text_signature(_jpeg(_strip_photo(seed, word)))
+                assert text_similarity(aspirin, other) < 0.9
+
+    def test_undecodable_bytes(self):
+        assert text_signature(b"not an image") is None
+        assert text_signature(b"") is None
+
+
+class TestPerceptualOCRCache:
+    """Test suite for near-duplicate OCR result caching."""
+
+    def test_near_duplicate_skips_ocr(self):
+        cache = PerceptualOCRCache(max_entries=8)
+        img = _strip_photo()
+        calls = []
+
+        def ocr():
+            calls.append(1)
+            return SEGMENTS
+
+        assert cache.get_or_compute(_jpeg(img, 95), ocr) == SEGMENTS
+        assert cache.get_or_compute(_jpeg(cv2.resize(img, (800, 600))), ocr) == SEGMENTS
+        assert len(calls) == 1
+
+    def test_same_layout_different_text_runs_ocr(self):
+        cache = PerceptualOCRCache(max_entries=8)
+        warfarin = [OCRSegment("WARFARIN 5MG", 0.9, (10, 10, 200, 30))]
+
+        assert cache.get_or_compute(_jpeg(_strip_photo(word="ASPIRIN")), lambda: SEGMENTS) == SEGMENTS
+        metrics.reset()
+        assert cache.get_or_compute(_jpeg(_strip_photo(word="WARFARIN")), lambda: warfarin) == warfarin
+        assert metrics.get("ocr_cache.text_mismatches") >= 1
+
+    def test_unsigned_entry_does_not_match_signed_query(self):
+        cache = PerceptualOCRCache(max_entries=8, max_distance=0)
+        cache.put(7, SEGMENTS, 1.0)
+        assert cache.get(7, text_signature(_jpeg(_strip_photo()))) is None
+
+    def test_distance_threshold(self):
+        cache = PerceptualOCRCache(max_entries=8, max_distance=2)
+        cache.put(0b1111, SEGMENTS, 100.0)
+        assert cache.get(0b1100) == SEGMENTS   # 2 bits apart
+        assert cache.get(0b1000) is None       # 3 bits apart
+
+    def test_lru_eviction(self):
+        cache = PerceptualOCRCache(max_entries=2, max_distance=0)
+        cache.put(1, SEGMENTS, 1.0)
+        cache.put(2, SEGMENTS, 1.0)
+        cache.get(1)  # 2 is now least recently used
+        cache.put(4, SEGMENTS, 1.0)
+        assert len(cache) == 2
+        assert cache.get(2) is None
+        assert cache.get(1) == SEGMENTS
+
+    def test_empty_results_not_cached(self):
+        cache = PerceptualOCRCache(max_entries=8)
+        cache.get_or_compute(_jpeg(_strip_photo()), lambda: [])
+        assert len(cache) == 0
+
+    def test_rejects_unindexable_distance(self):
+        with pytest.raises(ValueError):
+            PerceptualOCRCache(max_distance=8)
+
+    def test_disk_tier_survives_restart(self, tmp_path):
+        path = str(tmp_path / "ocr_cache.sqlite")
+        first = PerceptualOCRCache(max_entries=8, disk_path=path)
+        first.put(0xDEADBEEFCAFEF00D, SEGMENTS, 250.0)
+        first.close()
+
+        second = PerceptualOCRCache(max_entries=8, disk_path=path)
+        try:
+            # One bit off, found on disk and promoted to memory
+            assert second.get(0xDEADBEEFCAFEF00C) == SEGMENTS
+            assert len(second) == 1
+        finally:
+            second.close()
+
+    def test_disk_tier_checks_text(self, tmp_path):
+        path = str(tmp_path / "ocr_cache.sqlite")
+        aspirin = _jpeg(_strip_photo(word="ASPIRIN"))
+        warfarin = _jpeg(_strip_photo(word="WARFARIN"))
+        first = PerceptualOCRCache(max_entries=8, disk_path=path)
+        first.put(dhash(aspirin), SEGMENTS, 250.0, text_signature(aspirin))
+        first.close()
+
+        second = PerceptualOCRCache(max_entries=8, disk_path=path)
+        try:
+            assert second.get(dhash(warfarin), text_signature(warfarin)) is None
+            assert second.get(dhash(aspirin), text_signature(aspirin)) == SEGMENTS
+        finally:
+            second.close()
+
+    def test_metrics(self):
+        metrics.reset()
+        cache = PerceptualOCRCache(max_entries=8, max_distance=0)
+        cache.put(7, SEGMENTS, 120.0)
+        cache.get(7)
+        cache.get(8)
+
+        snapshot = metrics.snapshot()
+        assert snapshot["counters"]["ocr_cache.hits"] == 1
+        assert snapshot["counters"]["ocr_cache.misses"] == 1
+        assert snapshot["gauges"]["ocr_cache.hit_rate"] == 0.5
+        assert snapshot["timings"]["ocr_cache.saved_ms"]["total"] == 120.0
@@ -0,0 +1,147 @@
+"""
+Unit tests for the ONNX Runtime OCR engine.
+Sessions are replaced by stubs, so no model files or onnxruntime are needed.
+"""
+
+from types import SimpleNamespace
+import numpy as np
+import pytest
+from backend.app import ocr
+from backend.app.ocr_onnx import (
+    ENGLISH_G2_CHARACTERS, ONNXOCREngine, ctc_greedy_decode,
+    detection_boxes, merge_line_boxes
+)
+from backend.app.schemas import OCRSegment
+
+
+def _one_hot(text: str, steps: int = 20) -> np.ndarray:
+    """Recognizer probabilities spelling `text` with blanks between repeats."""
+    classes = len(ENGLISH_G2_CHARACTERS) + 1
+    probs = np.full((steps, classes), 0.01 / classes, dtype=np.float32)
+    sequence = []
+    for ch in text:
+        sequence += [ENGLISH_G2_CHARACTERS.index(ch) + 1, 0]
+    for t in range(steps):
+        probs[t, sequence[t] if t < len(sequence) else 0] = 0.99
+    return probs
+
+
+class StubDetector:
+    """CRAFT stand-in: one text blob over the given region of the input canvas."""
+
+    def __init__(self, box):
+        self.box = box
+
+    def get_inputs(self):
+        return [SimpleNamespace(name="image")]
+
+    def run(self, _, feeds):
+        _, _, h, w = feeds["image"].shape
+        scores = np.zeros((1, h // 2, w // 2, 2), dtype=np.float32)
+        x, y, bw, bh = (v // 2 for v in self.box)
+        scores[0, y:y + bh, x:x + bw, 0] = 0.9
+        return [scores]
+
+
+class StubRecognizer:
+    """CRNN stand-in: every crop reads as `text` (logits, like the real model)."""
+
+    def __init__(self, text):
+        self.text = text
+        self.batches = []
+
+    def get_inputs(self):
+        return [SimpleNamespace(name="image")]
+
+    def run(self, _, feeds):
+        batch = feeds["image"]
+        self.batches.append(batch.shape)
+        return [np.log(np.stack([_one_hot(self.text)] * batch.shape[0]))]
+
+
+class TestONNXEngine:
+    """Test suite for ONNX OCR pre/post-processing."""
+
+    def test_ctc_greedy_decode(self):
+        probs = _one_hot("ASPIRIN")[np.newaxis]
+        [(text, confidence)] = ctc_greedy_decode(probs, ENGLISH_G2_CHARACTERS)
+        assert text == "ASPIRIN"
+        assert 0.9 < confidence <= 1.0
+
+    def test_ctc_all_blank(self):
+        probs = _one_hot("")[np.newaxis]
+        assert ctc_greedy_decode(probs, ENGLISH_G2_CHARACTERS) == [("", 0.0)]
+
+    def test_detection_boxes_filters_weak_components(self):
+        text_map = np.zeros((100, 200), dtype=np.float32)
+        link_map = np.zeros_like(text_map)
+        text_map[20:30, 10:80] = 0.9   # strong word
+        text_map[60:70, 10:80] = 0.5   # never reaches text_threshold
+        boxes = detection_boxes(text_map, link_map)
+        assert len(boxes) == 1
+        x, y, w, h = boxes[0]
+        assert x <= 10 and y <= 20 and x + w >= 80 and y + h >= 30
+
+    def test_merge_line_boxes(self):
+        words = [(10, 10, 50, 20), (65, 11, 40, 20), (10, 60, 50, 20)]
+        lines = merge_line_boxes(words, margin=0)
+        assert lines == [(10, 10, 95, 21), (10, 60, 50, 20)]
+
+    def test_readtext_detects_and_recognises(self):
+        recognizer = StubRecognizer("ASPIRIN")
+        engine = ONNXOCREngine(StubDetector((100, 40, 200, 40)), recognizer)
+        image = np.full((200, 400), 255, dtype=np.uint8)
+
+        segments = engine.readtext(image)
+
+        assert [seg.text for seg in segments] == ["ASPIRIN"]
+        # Box covers the text core plus CRAFT's dilation margin, in image coordinates
+        x, y, w, h = segments[0].bbox
+        assert 70 <= x <= 100 and 10 <= y <= 40
+        assert 300 <= x + w <= 330 and 80 <= y + h <= 110
+        assert recognizer.batches[0][1:3] == (1, 64)
+
+    def test_readtext_with_regions_skips_detector(self):
+        class FailingDetector(StubDetector):
+            def run(self, *_):
+                raise AssertionError("detector should not run")
+
+        recognizer = StubRecognizer("WARFARIN")
+        engine = ONNXOCREngine(FailingDetector((0, 0, 0, 0)), recognizer, batch_size=2)
+        image = np.full((200, 400), 255, dtype=np.uint8)
+        regions = [(0, 0, 100, 20), (0, 50, 300, 20), (0, 100, 50, 20)]
+
+        segments = engine.readtext(image, regions)
+
+        assert [seg.bbox for seg in segments] == regions
+        assert len(recognizer.batches) == 2
+
+    def test_missing_models(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            ONNXOCREngine.load(str(tmp_path))
+
+
+class TestEngineSelection:
+    """extract_segments honours PSL_OCR_ENGINE."""
+
+    def test_onnx_engine_selected(self, monkeypatch):
+        engine = ONNXOCREngine(StubDetector((100, 40, 200, 40)), StubRecognizer("ASPIRIN"))
+        monkeypatch.setattr(ocr.settings, "OCR_ENGINE", "onnx")
+        monkeypatch.setattr(ocr, "_onnx_engine", engine)
+        monkeypatch.setattr(ocr, "_segments_easyocr",
+                            lambda *a: pytest.fail("EasyOCR should not run"))
+
+        image = np.full((200, 400, 3), 255, dtype=np.uint8)
+        segments = ocr.extract_segments(image)
+
+        assert [seg.text for seg in segments] == ["ASPIRIN"]
+        assert isinstance(segments[0], OCRSegment)
+
+    def test_onnx_failure_falls_back_to_tesseract(self, monkeypatch):
+        monkeypatch.setattr(ocr.settings, "OCR_ENGINE", "onnx")
+        monkeypatch.setattr(ocr, "_onnx_engine", False)
+        monkeypatch.setattr(ocr, "_segments_tesseract",
+                            lambda *a: [OCRSegment("WARFARIN", 0.8)])
+
+        image = np.full((200, 400, 3), 255, dtype=np.uint8)
+        assert ocr.extract_text(image) == ["WARFARIN"]
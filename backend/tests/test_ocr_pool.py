@@ -0,0 +1,63 @@
+"""
+Unit tests for the OCR worker pool.
+"""
+
+import pytest
+from backend.app.ocr_pool import OCRWorkerPool, OCRPoolBusy
+
+
+def _encoded_image(size=(100, 300), text='ASPIRIN'):
+    import cv2
+    import numpy as np
+
+    img = np.ones(size, dtype=np.uint8) * 255
+    cv2.putText(img, text, (20, 50), cv2.FONT_HERSHEY_SIMPLEX, 1, 0, 2)
+    ok, encoded = cv2.imencode(".png", img)
+    assert ok
+    return encoded.tobytes()
+
+
+class TestOCRWorkerPool:
+    """Test suite for the process-pool OCR farm."""
+
+    @pytest.fixture
+    def pool(self):
+        pool = OCRWorkerPool(workers=2, max_pending=4, preload=False)
+        yield pool
+        pool.shutdown()
+
+    def test_extract_text_in_worker(self, pool):
+        result = pool.extract_text(_encoded_image())
+        assert isinstance(result, list)
+
+    def test_concurrent_jobs(self, pool):
+        futures = [pool.submit(_encoded_image()) for _ in range(4)]
+        assert all(isinstance(f.result(timeout=60), list) for f in futures)
+
+    def test_backpressure_rejects_when_full(self):
+        pool = OCRWorkerPool(workers=1, max_pending=1, preload=False)
+        try:
+            # NL-means on a large frame keeps the only slot busy for a while
+            slow = pool.submit(_encoded_image(size=(1500, 1500)), preprocess_mode="quality")
+            with pytest.raises(OCRPoolBusy):
+                pool.submit(_encoded_image())
+            slow.result(timeout=120)
+            # Slot is released once the job finishes
+            assert isinstance(pool.extract_text(_encoded_image()), list)
+        finally:
+            pool.shutdown()
+
+    def test_shutdown_backend_stops_pool(self, monkeypatch):
+        from backend.app import ocr
+        from backend.app.api import endpoints
+
+        pool = OCRWorkerPool(workers=1, max_pending=1, preload=False)
+        monkeypatch.setattr(endpoints, "ocr_pool", pool)
+        monkeypatch.setattr(endpoints, "extract_segments", pool.extract_segments)
+
+        endpoints.shutdown_backend()
+
+        assert endpoints.ocr_pool is None
+        assert endpoints.extract_segments is ocr.extract_segments
+        with pytest.raises(RuntimeError):
+            pool.submit(_encoded_image())
@@ -0,0 +1,156 @@
+"""
+Unit tests for the EasyOCR / Tesseract race strategy.
+Engines are replaced with stubs so timing and confidences are controlled.
+"""
+
+import time
+import numpy as np
+import pytest
+from backend.app import ocr
+from backend.app.schemas import OCRSegment
+
+
+IMG = np.full((50, 50), 255, dtype=np.uint8)
+
+
+def _engine(segments, delay=0.0, calls=None):
+    def run(processed_img, regions=None, cancel=None):
+        time.sleep(delay)
+        if calls is not None:
+            calls.append(cancel.is_set() if cancel is not None else None)
+        return segments
+    return run
+
+
+class TestOCRRace:
+    """Test suite for concurrent engine racing with early exit."""
+
+    def test_fast_confident_engine_wins(self, monkeypatch):
+        monkeypatch.setattr(ocr, "_segments_easyocr", _engine([OCRSegment("WARFARIN", 0.9)], delay=0.5))
+        monkeypatch.setattr(ocr, "_segments_tesseract", _engine([OCRSegment("ASPIRIN 100MG", 0.8)]))
+
+        start = time.perf_counter()
+        result = ocr._race_engines(IMG, accept=lambda segs: True, min_confidence=0.5)
+
+        assert [seg.text for seg in result] == ["ASPIRIN 100MG"]
+        assert time.perf_counter() - start < 0.4  # did not wait for EasyOCR
+
+    def test_low_confidence_result_is_not_accepted(self, monkeypatch):
+        monkeypatch.setattr(ocr, "_segments_easyocr", _engine([OCRSegment("WARFARIN", 0.9)], delay=0.1))
+        monkeypatch.setattr(ocr, "_segments_tesseract", _engine([OCRSegment("W4RF@R1N", 0.2)]))
+
+        result = ocr._race_engines(IMG, accept=lambda segs: True, min_confidence=0.5)
+
+        assert [seg.text for seg in result] == ["WARFARIN"]
+
+    def test_acceptance_requires_known_drug(self, monkeypatch):
+        monkeypatch.setattr(ocr, "_segments_easyocr", _engine([OCRSegment("ASPIRIN", 0.9)], delay=0.1))
+        monkeypatch.setattr(ocr, "_segments_tesseract", _engine([OCRSegment("MFG: 2024", 0.95)]))
+
+        result = ocr._race_engines(IMG, min_confidence=0.5)
+
+        assert [seg.text for seg in result] == ["ASPIRIN"]
+
+    def test_no_acceptable_result_prefers_easyocr(self, monkeypatch):
+        monkeypatch.setattr(ocr, "_segments_easyocr", _engine([OCRSegment("BATCH A1", 0.9)], delay=0.1))
+        monkeypatch.setattr(ocr, "_segments_tesseract", _engine([OCRSegment("EXP 2026", 0.9)]))
+
+        result = ocr._race_engines(IMG, accept=lambda segs: False)
+
+        assert [seg.text for seg in result] == ["BATCH A1"]
+
+    def test_unavailable_easyocr(self, monkeypatch):
+        monkeypatch.setattr(ocr, "_segments_easyocr", _engine(None))
+        monkeypatch.setattr(ocr, "_segments_tesseract", _engine([OCRSegment("ASPIRIN", 0.9)], delay=0.05))
+
+        result = ocr._race_engines(IMG, accept=lambda segs: True)
+
+        assert [seg.text for seg in result] == ["ASPIRIN"]
+
+    def test_loser_is_signalled_to_cancel(self, monkeypatch):
+        calls = []
+        monkeypatch.setattr(ocr, "_segments_easyocr", _engine([OCRSegment("ASPIRIN", 0.9)]))
+        monkeypatch.setattr(ocr, "_segments_tesseract", _engine([], delay=0.2, calls=calls))
+
+        ocr._race_engines(IMG, accept=lambda segs: True)
+        time.sleep(0.3)
+
+        assert calls == [True]
+
+
+class TestTesseractSegments:
+    """Test grouping of Tesseract word data into line segments."""
+
+    def test_words_grouped_by_line_with_confidence(self, monkeypatch):
+        data = {
+            "text": ["ASPIRIN", "100MG", "", "MFG"],
+            "conf": ["90", "70", "-1", "50"],
+            "block_num": [1, 1, 1, 1],
+            "par_num": [1, 1, 1, 1],
+            "line_num": [1, 1, 1, 2],
+            "left": [10, 100, 0, 10],
+            "top": [5, 6, 0, 40],
+            "width": [80, 50, 0, 30],
+            "height": [20, 18, 0, 15],
+        }
+        monkeypatch.setattr(ocr.pytesseract, "image_to_data", lambda img, output_type=None: data)
+
+        segments = ocr._tesseract_lines(IMG, origin=(100, 200))
+
+        assert segments[0].text == "ASPIRIN 100MG"
+        assert segments[0].confidence == pytest.approx(0.8)
+        assert segments[0].bbox == (110, 205, 140, 20)
+        assert segments[1] == OCRSegment("MFG", 0.5, (110, 240, 30, 15))
+
+    def test_large_images_are_tiled_inside_the_race(self, monkeypatch):
+        shapes = []
+
+        def engine(text, delay=0.0):
+            def run(tile, regions=None, cancel=None):
+                time.sleep(delay)
+                shapes.append(tile.shape)
+                return [OCRSegment(text, 0.9, (10, 10, 50, 20))]
+            return run
+
+        monkeypatch.setattr(ocr.settings, "OCR_TILE_SIZE", 500)
+        monkeypatch.setattr(ocr.settings, "OCR_TILE_OVERLAP", 100)
+        monkeypatch.setattr(ocr, "_segments_easyocr", engine("WARFARIN", delay=0.3))
+        monkeypatch.setattr(ocr, "_segments_tesseract", engine("ASPIRIN"))
+
+        img = np.full((400, 1200), 255, dtype=np.uint8)
+        result = ocr._race_engines(img, accept=lambda segs: True, tiled=True)
+        time.sleep(0.5)
+
+        # Every engine call saw a tile, never the whole photo
+        assert shapes and all(max(shape) <= 500 for shape in shapes)
+        assert {seg.text for seg in result} == {"ASPIRIN"}
+        # Boxes are in full-image coordinates
+        assert sorted(seg.bbox[0] for seg in result) == [10, 410, 710]
+
+    def test_extract_segments_races_tiled_for_large_images(self, monkeypatch):
+        calls = []
+        monkeypatch.setattr(ocr.settings, "OCR_STRATEGY", "race")
+        monkeypatch.setattr(ocr.settings, "OCR_TILE_SIZE", 500)
+        monkeypatch.setattr(ocr.settings, "OCR_TILE_OVERLAP", 100)
+        monkeypatch.setattr(ocr, "_race_engines",
+                            lambda img, regions=None, tiled=False: calls.append(tiled) or [])
+
+        ocr.extract_segments(np.full((400, 500, 3), 255, dtype=np.uint8), preprocess_mode="fast")
+        ocr.extract_segments(np.full((400, 1200, 3), 255, dtype=np.uint8), preprocess_mode="fast")
+
+        assert calls == [False, True]
+
+    def test_batch_uses_the_same_strategy(self, monkeypatch):
+        calls = []
+        monkeypatch.setattr(ocr.settings, "OCR_STRATEGY", "race")
+        monkeypatch.setattr(ocr.settings, "OCR_TILE_SIZE", 500)
+        monkeypatch.setattr(ocr.settings, "OCR_TILE_OVERLAP", 100)
+        monkeypatch.setattr(ocr, "_race_engines",
+                            lambda img, regions=None, tiled=False: calls.append(tiled) or [OCRSegment("ASPIRIN", 0.9)])
+        images = [np.full((400, 500, 3), 255, dtype=np.uint8), np.full((400, 1200, 3), 255, dtype=np.uint8)]
+
+        batch = ocr.extract_segments_batch(images, preprocess_mode="fast")
+        single = [ocr.extract_segments(image, preprocess_mode="fast") for image in images]
+
+        assert batch == single
+        assert calls == [False, True, False, True]
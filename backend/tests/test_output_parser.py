@@ -0,0 +1,92 @@
+"""
+Unit tests for the model output parser.
+
+Golden files: backend/tests/golden/parser/<name>.txt holds a raw model reply,
+<name>.json the expected structured explanation, and SOURCES.json where each
+reply came from (capture new ones with benchmarks/capture_parser_replies.py)
+and which intended behaviour changes make the parser that output_parser.py
+replaced (legacy_output_parser.py) read it differently. After an intended
+parser change, review the diff and regenerate with:
+    python -m backend.tests.test_output_parser
+"""
+
+import json
+from pathlib import Path
+import pytest
+from backend.app.output_parser import ExplanationParser, SECTIONS, clean_line, parse_explanation
+from backend.tests.legacy_output_parser import legacy_parse
+
+GOLDEN = Path(__file__).resolve().parent / "golden" / "parser"
+DRUG_PAIR = ("warfarin", "aspirin")
+CASES = sorted(path.stem for path in GOLDEN.glob("*.txt"))
+SOURCES = json.loads((GOLDEN / "SOURCES.json").read_text())
+
+
+def _parse_incrementally(text: str, chunk: int):
+    parser = ExplanationParser(DRUG_PAIR)
+    for i in range(0, len(text), chunk):
+        parser.feed(text[i:i + chunk])
+    return parser.close()
+
+
+class TestOutputParser:
+    """Test suite for parsing TxGemma replies."""
+
+    @pytest.mark.parametrize("case", CASES)
+    def test_golden(self, case):
+        text = (GOLDEN / f"{case}.txt").read_text()
+        expected = json.loads((GOLDEN / f"{case}.json").read_text())
+        assert parse_explanation(text, DRUG_PAIR) == expected
+
+    @pytest.mark.parametrize("case", CASES)
+    @pytest.mark.parametrize("chunk", [1, 3, 17])
+    def test_incremental_matches_one_call(self, case, chunk):
+        text = (GOLDEN / f"{case}.txt").read_text()
+        assert _parse_incrementally(text, chunk) == parse_explanation(text, DRUG_PAIR)
+
+    def test_every_reply_has_a_source(self):
+        assert sorted(SOURCES) == CASES
+
+    @pytest.mark.parametrize("case", [c for c in CASES if not SOURCES.get(c, {}).get("behaviour_changes")])
+    def test_agrees_with_legacy_parser(self, case):
+        text = (GOLDEN / f"{case}.txt").read_text()
+        assert parse_explanation(text, DRUG_PAIR) == legacy_parse(text, DRUG_PAIR)
+
+    def test_header_inside_a_list(self):
+        result = parse_explanation(
+            "**2. SYMPTOMS:**\n* Muscle pain.\n* **3. RISK FACTORS:**\n* Older age and kidney disease.\n",
+            DRUG_PAIR)
+        assert result["clinical_manifestations"] == ["Muscle pain."]
+        assert result["risk_factors"] == ["Older age and kidney disease."]
+
+    def test_feed_reports_completed_sections(self):
+        parser = ExplanationParser(DRUG_PAIR)
+        assert parser.feed("**1. MECHANISM:**\n* Additive antiplatelet effect.\n") == []
+        assert parser.feed("**2. SYMPTOMS:**\n") == ["mechanism_of_interaction"]
+        parser.feed("* Bruising and bleeding gums.")
+        result = parser.close()
+        assert result["clinical_manifestations"] == ["Bruising and bleeding gums."]
+
+    def test_numbered_point_is_not_a_header(self):
+        result = parse_explanation(
+            "4. MONITORING:\n1. Monitor INR weekly\n2. Check haemoglobin monthly\n", DRUG_PAIR)
+        assert result["monitoring_recommendations"] == ["Monitor INR weekly", "Check haemoglobin monthly"]
+
+    def test_missing_sections_get_defaults(self):
+        result = parse_explanation("1. Mechanism: Both drugs prolong the QT interval.", DRUG_PAIR)
+        assert result["mechanism_of_interaction"] == ["Both drugs prolong the QT interval."]
+        assert all(len(result[key]) == 1 for key in SECTIONS)
+        assert "Warfarin" in result["clinical_manifestations"][0]
+
+    def test_clean_line(self):
+        assert clean_line("## **Bold** and *italic* and _under_  score") == "Bold and italic and under score"
+        assert clean_line("* bullet stays") == "* bullet stays"
+        assert clean_line("snake_case_name and 2*3*4") == "snake_case_name and 2*3*4"
+
+
+if __name__ == "__main__":
+    for case in CASES:
+        text = (GOLDEN / f"{case}.txt").read_text()
+        (GOLDEN / f"{case}.json").write_text(
+            json.dumps(parse_explanation(text, DRUG_PAIR), indent=2, ensure_ascii=False) + "\n")
+        print(f"updated {case}.json")
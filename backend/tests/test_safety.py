@@ -1,5 +1,5 @@
 import pytest
-from backend.app.safety import SafetyGuard
+from backend.app.safety import RuleSet, SafetyGuard, SafetyRule, StreamingSafetyGuard
 
 class TestSafetyGuard:
     def test_safe_explanation(self):
@@ -36,3 +36,141 @@ class TestSafetyGuard:
         is_safe, msg = SafetyGuard.validate_output(dangerous_text)
         assert is_safe is False
         assert "SAFETY ALERT" in msg
+
+
+class TestRuleSet:
+    """Test suite for the compiled single-pass matcher."""
+
+    def test_reports_rule_that_fired(self):
+        violation = SafetyGuard.find_violation("Your doctor may decrease the dose of warfarin.")
+        assert violation.rule_id == "dose_change"
+        assert violation.match.lower() == "decrease the dose"
+
+    def test_clean_text_has_no_violation(self):
+        assert SafetyGuard.find_violation("Monitor for bleeding and bruising.") is None
+
+    def test_leftmost_match_wins(self):
+        text = "A treatment plan may prescribe changes."
+        assert SafetyGuard.find_violation(text).rule_id == "treatment_plan"
+
+    def test_trigger_prefix_matches_inflections(self):
+        assert SafetyGuard.find_violation("This was prescribed earlier.").rule_id == "prescription"
+
+    def test_matches_original_per_pattern_loop(self):
+        import re
+        texts = [
+            "You should take 500mg of Aspirin daily.",
+            "Use 2 tablets",
+            "Diagnosis is pending",
+            "stop using immediately",
+            "Increase dose slowly",
+            "Take care and use caution.",
+            "Aspirin and Warfarin increase bleeding risk.",
+        ]
+        for text in texts:
+            expected = any(re.search(p, text, re.IGNORECASE) for p in SafetyGuard.DANGEROUS_PATTERNS)
+            assert (SafetyGuard.find_violation(text) is not None) == expected, text
+
+    def test_many_rules_only_triggered_candidates(self):
+        rules = [SafetyRule(f"rule_{i}", rf"\bterm{i}x\s+danger", (f"term{i}x",)) for i in range(500)]
+        rule_set = RuleSet(rules + [SafetyRule("untriggered", r"\bxyz\d")])
+        assert rule_set.candidates("term42x danger and term7x") == (7, 42, 500)
+        assert rule_set.search("then TERM42X danger").rule_id == "rule_42"
+        assert rule_set.search("xyz1").rule_id == "untriggered"
+        assert rule_set.search("term42x safe") is None
+
+    def test_group_references_keep_their_numbering(self):
+        rule_set = RuleSet([
+            SafetyRule("dose", r"\b(\d+)\s*mg\b", ("mg",)),
+            SafetyRule("repeat", r"\b(take)\s+\1\b", ("take",)),
+            SafetyRule("named", r"(?P<w>stop)\s+(?P=w)", ("stop",)),
+        ])
+        violation = rule_set.search("please take TAKE it")
+        assert violation.rule_id == "repeat"
+        assert violation.match == "take TAKE"
+        assert violation.span == (7, 16)
+        assert rule_set.search("take one, stop stop").rule_id == "named"
+        assert rule_set.search("take take 5 mg").rule_id == "repeat"
+        assert rule_set.search("5 mg then take take").rule_id == "dose"
+        assert rule_set.search("take it") is None
+
+    def test_bad_pattern_fails_at_load(self):
+        import re
+        with pytest.raises(re.error):
+            RuleSet([SafetyRule("broken", r"(unclosed", ("unclosed",))])
+
+
+class TestStreamingSafetyGuard:
+    """Test suite for incremental validation of decoded text."""
+
+    def test_pattern_split_across_chunks(self):
+        guard = StreamingSafetyGuard()
+        for chunk in ["Patients should ", "take 5", "00", "mg daily"]:
+            violation = guard.feed(chunk)
+        assert guard.blocked
+        assert violation.rule_id == "dosage_instruction"
+        text = "Patients should take 500mg daily"
+        assert text[violation.span[0]:violation.span[1]] == violation.match
+
+    def test_clean_stream(self):
+        guard = StreamingSafetyGuard(overlap=16)
+        for word in "Monitor INR closely and watch for bruising or bleeding gums.".split():
+            assert guard.feed(word + " ") is None
+        assert not guard.blocked
+
+    def test_tail_never_starts_mid_word(self):
+        # "untreatment plan" must not match \btreatment once the window is cut
+        guard = StreamingSafetyGuard(overlap=12)
+        guard.feed("a long preamble about untreatment")
+        assert guard.feed(" plan") is None
+
+    def test_matches_full_text_validation(self):
+        text = "Mechanism: additive effect.\nClinical: your doctor may decrease the dose if needed."
+        guard = StreamingSafetyGuard()
+        for i in range(0, len(text), 3):
+            guard.feed(text[i:i + 3])
+        assert guard.violation.rule_id == SafetyGuard.find_violation(text).rule_id
+
+
+class TestValidateExplanation:
+    """Test suite for structured explanation validation."""
+
+    EXPLANATION = {
+        "mechanism_of_interaction": ["Both drugs impair haemostasis.", "Effects are additive."],
+        "clinical_manifestations": ["Bruising.", "GI bleeding."],
+        "monitoring_recommendations": ["Check INR.", "Watch for black stools.", "Your doctor may decrease the dose."],
+        "alternative_suggestions": ["Paracetamol for pain.", "I prescribe rest."],
+    }
+
+    def test_safe_explanation(self):
+        safe = {k: v for k, v in self.EXPLANATION.items()
+                if k in ("mechanism_of_interaction", "clinical_manifestations")}
+        verdict = SafetyGuard.validate_explanation(safe)
+        assert verdict.is_safe
+        assert list(verdict.sections) == list(safe)
+        assert verdict.violation is None
+
+    def test_violation_beyond_first_points_is_found(self):
+        verdict = SafetyGuard.validate_explanation(self.EXPLANATION)
+        assert not verdict.is_safe
+        failed = verdict.violation
+        assert failed.section == "monitoring_recommendations"
+        assert failed.point == 2
+        assert failed.violation.rule_id == "dose_change"
+        # Short-circuit: sections after the first hit are not scanned
+        assert "alternative_suggestions" not in verdict.sections
+
+    def test_full_scan_reports_every_section(self):
+        verdict = SafetyGuard.validate_explanation(self.EXPLANATION, short_circuit=False)
+        blocked = {name: v.violation.rule_id for name, v in verdict.sections.items() if not v.is_safe}
+        assert blocked == {"monitoring_recommendations": "dose_change",
+                           "alternative_suggestions": "prescription"}
+        assert verdict.sections["mechanism_of_interaction"].is_safe
+
+    def test_string_sections_and_non_text_values(self):
+        verdict = SafetyGuard.validate_explanation({"summary": "Avoid the treatment plan.", "score": 3})
+        assert not verdict.is_safe
+        assert verdict.violation.point is None
+
+    def test_empty_explanation_is_not_safe(self):
+        assert not SafetyGuard.validate_explanation({"mechanism_of_interaction": []}).is_safe
@@ -0,0 +1,167 @@
+"""
+Unit tests for JSON-constrained explanation generation.
+"""
+
+import json
+import sys
+import threading
+import types
+from concurrent.futures import ThreadPoolExecutor
+
+from backend.app.config import settings
+from backend.app.inference import RealMedGemmaInference
+from backend.app.output_parser import SECTIONS
+from backend.app.safety import SafetyViolation
+from backend.app.structured_output import (
+    explanation_schema, json_max_new_tokens, json_prefix_allowed_tokens_fn, parse_json_explanation
+)
+from backend.tests.test_inference import StubPipeline
+
+REPLY = {
+    "mechanism_of_interaction": ["Both drugs impair hemostasis."],
+    "clinical_manifestations": ["Bruising", "Gastrointestinal bleeding"],
+    "risk_factors": ["Age over 65"],
+    "monitoring_recommendations": ["Check INR regularly."],
+    "alternative_suggestions": ["Ask about paracetamol for pain."],
+}
+INTERACTION = {"drug_pair": ("warfarin", "aspirin"), "risk_level": "high"}
+
+
+class TestParseJsonExplanation:
+    """JSON replies map onto the structured explanation format."""
+
+    def test_valid_reply(self):
+        result = parse_json_explanation(json.dumps(REPLY), ("warfarin", "aspirin"))
+        for key in SECTIONS:
+            assert result[key] == REPLY[key]
+        assert result["_raw_response"].startswith("{")
+
+    def test_text_around_object(self):
+        text = "Here is the analysis:\n```json\n" + json.dumps(REPLY) + "\n```"
+        assert parse_json_explanation(text)["risk_factors"] == ["Age over 65"]
+
+    def test_missing_sections_get_defaults(self):
+        result = parse_json_explanation('{"mechanism_of_interaction": "Single string."}', ("warfarin", "aspirin"))
+        assert result["mechanism_of_interaction"] == ["Single string."]
+        assert "Warfarin" in result["clinical_manifestations"][0]
+
+    def test_limits(self, monkeypatch):
+        monkeypatch.setattr(settings, "JSON_MAX_POINTS", 2)
+        monkeypatch.setattr(settings, "JSON_MAX_POINT_CHARS", 10)
+        reply = dict(REPLY, risk_factors=["a" * 50, "  ", 7, "b", "c"])
+        result = parse_json_explanation(json.dumps(reply))
+        assert result["risk_factors"] == ["a" * 10, "b"]
+
+    def test_unusable_replies(self):
+        assert parse_json_explanation("1. MECHANISM: no JSON here") is None
+        assert parse_json_explanation('{"mechanism_of_interaction": [') is None
+        assert parse_json_explanation("[1, 2]") is None
+        assert parse_json_explanation('{"other": ["x"]}') is None
+
+
+class TestSchema:
+    def test_schema_matches_sections(self):
+        schema = explanation_schema(max_points=3, max_chars=160)
+        assert schema["required"] == SECTIONS
+        assert schema["properties"]["risk_factors"]["maxItems"] == 3
+        assert schema["properties"]["risk_factors"]["items"]["maxLength"] == 160
+
+    def test_token_budget_covers_schema(self):
+        # Every point at full length (~4 chars/token) must fit the budget
+        assert json_max_new_tokens(3, 160) >= len(SECTIONS) * 3 * 40
+
+    def test_prefix_fn_needs_lm_format_enforcer(self, monkeypatch):
+        monkeypatch.setitem(sys.modules, "lmformatenforcer", None)
+        assert json_prefix_allowed_tokens_fn(object()) is None
+
+    def test_prefix_fn_per_call_tokenizer_data_cached(self, monkeypatch):
+        built = []
+        enforcer = types.ModuleType("lmformatenforcer")
+        enforcer.JsonSchemaParser = lambda schema: schema
+        integration = types.ModuleType("lmformatenforcer.integrations.transformers")
+        integration.build_token_enforcer_tokenizer_data = lambda tokenizer: built.append(tokenizer) or object()
+        integration.build_transformers_prefix_allowed_tokens_fn = lambda data, parser: lambda *args: [data]
+        monkeypatch.setitem(sys.modules, "lmformatenforcer", enforcer)
+        monkeypatch.setitem(sys.modules, "lmformatenforcer.integrations", types.ModuleType("integrations"))
+        monkeypatch.setitem(sys.modules, "lmformatenforcer.integrations.transformers", integration)
+
+        class Tokenizer:
+            pass
+
+        tokenizer = Tokenizer()
+        first, second = json_prefix_allowed_tokens_fn(tokenizer), json_prefix_allowed_tokens_fn(tokenizer)
+        assert first is not second
+        assert first() == second()
+        assert built == [tokenizer]
+        assert json_prefix_allowed_tokens_fn(None) is None
+
+
+class RecordingPipeline(StubPipeline):
+    """StubPipeline that also records the generate kwargs of every call."""
+
+    def __init__(self):
+        super().__init__()
+        self.kwargs = []
+
+    def __call__(self, chats, **kwargs):
+        self.kwargs.append(kwargs)
+        return super().__call__(chats, **kwargs)
+
+
+class TestConstrainedGeneration:
+    """JSON explanation mode in RealMedGemmaInference."""
+
+    def test_constrained_and_free_jobs_are_not_mixed(self):
+        inference = RealMedGemmaInference()
+        inference.batch_size = 8
+        pipe = inference.pipe = RecordingPipeline()
+
+        with ThreadPoolExecutor(5) as pool:
+            first = pool.submit(inference._generate, [{"role": "user", "content": "p0"}])
+            pipe.started.wait(5)
+            rest = [pool.submit(inference._generate_checked, [{"role": "user", "content": f"p{i}"}],
+                                64, i % 2 == 1)
+                    for i in range(1, 5)]
+            while len(inference._pending) < 4:
+                threading.Event().wait(0.01)
+            pipe.release.set()
+            replies = [first.result()] + [f.result()[0] for f in rest]
+
+        assert replies == [f"reply to p{i}" for i in range(5)]
+        # p0 alone, then the constrained p1+p3, then the free p2+p4
+        assert pipe.calls == [1, 2, 2]
+        assert [kw["max_new_tokens"] for kw in pipe.kwargs[1:]] == [64, 64]
+
+    def test_json_mode_parses_json(self, monkeypatch):
+        monkeypatch.setattr(settings, "EXPLANATION_FORMAT", "json")
+        inference = RealMedGemmaInference()
+        inference.pipe = object()
+        calls = []
+
+        def generate(messages, max_new_tokens=512, constrained=False):
+            calls.append((max_new_tokens, constrained))
+            return json.dumps(REPLY), None
+
+        monkeypatch.setattr(inference, "_generate_checked", generate)
+        explanation = inference.generate_explanation(INTERACTION, "prompt")
+        assert explanation["clinical_manifestations"] == REPLY["clinical_manifestations"]
+        assert calls == [(json_max_new_tokens(), True)]
+
+    def test_json_mode_falls_back_to_text_parser(self, monkeypatch):
+        monkeypatch.setattr(settings, "EXPLANATION_FORMAT", "json")
+        inference = RealMedGemmaInference()
+        inference.pipe = object()
+        monkeypatch.setattr(inference, "_generate_checked", lambda *args, **kwargs: (
+            "1. MECHANISM:\n- Both drugs impair hemostasis.\n", None))
+        explanation = inference.generate_explanation(INTERACTION, "prompt")
+        assert explanation["mechanism_of_interaction"] == ["Both drugs impair hemostasis."]
+
+    def test_json_mode_keeps_safety_stop(self, monkeypatch):
+        monkeypatch.setattr(settings, "EXPLANATION_FORMAT", "json")
+        inference = RealMedGemmaInference()
+        inference.pipe = object()
+        violation = SafetyViolation("dose_change", "increase the dose", (30, 47))
+        monkeypatch.setattr(inference, "_generate_checked", lambda *args, **kwargs: (
+            '{"mechanism_of_interaction": ["You may increase the dose', violation))
+        explanation = inference.generate_explanation(INTERACTION, "prompt")
+        assert explanation["safety_violation"] == "dose_change"
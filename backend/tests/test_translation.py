@@ -0,0 +1,107 @@
+"""
+Unit tests for the batched translation stage.
+"""
+
+import pytest
+from backend.app.coalesce import TTLCache
+from backend.app.inference import AIInference
+from backend.app.prompts import PromptTemplates
+from backend.app.translation import Translator, parse_languages, parse_numbered
+
+
+class RecordingBackend:
+    """Mock translation backend that records each job."""
+
+    def __init__(self, skip=()):
+        self.jobs = []
+        self.skip = set(skip)
+
+    def translate_batch(self, texts, target_lang):
+        self.jobs.append((list(texts), target_lang))
+        return "\n".join(f"[{i}] {target_lang}:{text}"
+                         for i, text in enumerate(texts, start=1) if text not in self.skip)
+
+
+EXPLANATIONS = [
+    {"mechanism_of_interaction": ["Both affect clotting.", "Effects add up."],
+     "clinical_manifestations": ["Bruising."],
+     "_raw_response": "raw text is not translated"},
+    {"mechanism_of_interaction": ["Both affect clotting."],
+     "risk_factors": ["Older age."]},
+]
+
+
+class TestTranslator:
+    """Test suite for Translator."""
+
+    def test_all_sections_of_all_interactions_in_one_job(self):
+        backend = RecordingBackend()
+        translated = Translator().translate_explanations(EXPLANATIONS, "hi", backend)
+
+        assert len(backend.jobs) == 1
+        texts, language = backend.jobs[0]
+        assert language == "Hindi"
+        # Duplicate points are translated once
+        assert texts == ["Both affect clotting.", "Effects add up.", "Bruising.", "Older age."]
+        assert translated[0] == {
+            "mechanism_of_interaction": ["Hindi:Both affect clotting.", "Hindi:Effects add up."],
+            "clinical_manifestations": ["Hindi:Bruising."],
+        }
+        assert translated[1]["risk_factors"] == ["Hindi:Older age."]
+
+    def test_cache_by_text_and_language(self):
+        backend = RecordingBackend()
+        translator = Translator(TTLCache(ttl=60))
+        translator.translate_explanations(EXPLANATIONS[:1], "te", backend)
+        translator.translate_explanations(EXPLANATIONS, "te", backend)
+
+        assert len(backend.jobs) == 2
+        assert backend.jobs[1][0] == ["Older age."]
+        translator.translate_explanations(EXPLANATIONS, "hi", backend)
+        assert len(backend.jobs[2][0]) == 4
+
+    def test_skipped_segment_falls_back_to_source_and_is_not_cached(self):
+        backend = RecordingBackend(skip={"Bruising."})
+        translator = Translator()
+        result = translator.translate_texts(["Bruising.", "Older age."], "hi", backend)
+        assert result == ["Bruising.", "Hindi:Older age."]
+
+        retry = RecordingBackend()
+        translator.translate_texts(["Bruising.", "Older age."], "hi", retry)
+        assert retry.jobs == [(["Bruising."], "Hindi")]
+
+    def test_partly_translated_sections_are_marked(self):
+        backend = RecordingBackend(skip={"Effects add up."})
+        translated = Translator().translate_explanations(EXPLANATIONS, "hi", backend)
+        assert translated[0]["mechanism_of_interaction"] == ["Hindi:Both affect clotting.", "Effects add up."]
+        assert translated[0]["untranslated_sections"] == ["mechanism_of_interaction"]
+        assert "untranslated_sections" not in translated[1]
+
+    def test_large_requests_are_split(self):
+        backend = RecordingBackend()
+        Translator(max_segments=3).translate_texts([f"point {i}" for i in range(7)], "hi", backend)
+        assert [len(texts) for texts, _ in backend.jobs] == [3, 3, 1]
+
+    def test_mock_backend_round_trip(self):
+        result = Translator().translate_texts(["Bruising."], "te", AIInference)
+        assert result == ["[MOCK TRANSLATION to Telugu]: Bruising."]
+
+
+class TestTranslationHelpers:
+    """Test suite for prompt formatting and reply parsing."""
+
+    def test_batch_prompt_numbers_segments(self):
+        prompt = PromptTemplates.format_batch_translation_prompt(["Bruising.", "GI\nbleeding"], "Hindi")
+        assert "[1] Bruising.\n[2] GI bleeding" in prompt
+        assert "Hindi" in prompt
+
+    def test_parse_numbered_formats(self):
+        reply = "Here you go:\n[1] पहला\n2. दूसरा\n3) तीसरा\n[9] extra"
+        assert parse_numbered(reply, 4) == ["पहला", "दूसरा", "तीसरा", None]
+        assert parse_numbered("[1] पहला\n[2]\n[3] तीसरा", 3) == ["पहला", None, "तीसरा"]
+
+    def test_parse_languages(self):
+        assert parse_languages("hi, TE,hi") == ["hi", "te"]
+        assert parse_languages(None) == []
+        with pytest.raises(ValueError):
+            parse_languages("xx")